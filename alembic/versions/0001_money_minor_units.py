@@ -0,0 +1,116 @@
+"""store money columns as BIGINT minor units (opt-in via MONEY_STORAGE)
+
+Only converts when MONEY_STORAGE=minor_units is set for the migration run:
+every money column goes from NUMERIC(12, 2) to BIGINT cents in id-range
+batches so large ledgers are not rewritten in a single statement. With the
+default MONEY_STORAGE=numeric it changes nothing, so the later revisions
+never depend on the conversion. If the columns are already BIGINT while
+MONEY_STORAGE=numeric, it fails instead of letting the app read cents as
+whole amounts.
+
+To convert a database that is already past this revision:
+    MONEY_STORAGE=minor_units alembic downgrade base
+    MONEY_STORAGE=minor_units alembic upgrade head
+
+Revision ID: 0001_money_minor_units
+Revises: 
+Create Date: 2026-10-19 00:00:00
+
+"""
+import os
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.models.types import MINOR_UNITS
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_money_minor_units'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "10000"))
+
+MONEY_COLUMNS = {
+    "transactions": ["amount"],
+    "work_payments": ["amount"],
+    "transaction_daily_rollups": ["debt_total", "payment_total"],
+    "balance_snapshots": ["debt_total", "payment_total"],
+}
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _stored_as_minor_units(tables):
+    """Whether the money columns are already BIGINT; None when no money table exists yet"""
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in MONEY_COLUMNS.items():
+        if table in tables:
+            column_types = {column["name"]: column["type"] for column in inspector.get_columns(table)}
+            return isinstance(column_types[columns[0]], sa.Integer)
+    return None
+
+
+def _copy_in_batches(table, assignments):
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar()
+    if max_id is None:
+        return
+    low = 0
+    while low < max_id:
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {assignments} WHERE id > :low AND id <= :high"),
+            {"low": low, "high": low + BATCH_SIZE}
+        )
+        low += BATCH_SIZE
+
+
+def _convert(table, columns, new_type, expression):
+    # Indexes on a converted column (e.g. ix_work_payments_provider_date, which create_all also builds) would
+    # be carried into SQLite's rebuilt table ahead of the renamed column; drop them and rebuild them after
+    indexes = [
+        index for index in sa.inspect(op.get_bind()).get_indexes(table)
+        if set(index["column_names"]) & set(columns)
+    ]
+    for index in indexes:
+        op.drop_index(index["name"], table_name=table)
+    with op.batch_alter_table(table) as batch:
+        for column in columns:
+            batch.add_column(sa.Column(f"{column}_new", new_type, nullable=True))
+    _copy_in_batches(table, ", ".join(f"{column}_new = {expression.format(column=column)}" for column in columns))
+    with op.batch_alter_table(table) as batch:
+        for column in columns:
+            batch.drop_column(column)
+            batch.alter_column(f"{column}_new", new_column_name=column, existing_type=new_type, nullable=False)
+    for index in indexes:
+        op.create_index(index["name"], table, index["column_names"], unique=bool(index["unique"]))
+
+
+def upgrade() -> None:
+    tables = _existing_tables()
+    minor_units = _stored_as_minor_units(tables)
+    if settings.MONEY_STORAGE != MINOR_UNITS:
+        if minor_units:
+            raise RuntimeError(
+                "Money columns are stored as BIGINT minor units but MONEY_STORAGE is "
+                f"{settings.MONEY_STORAGE!r}; set MONEY_STORAGE=minor_units for the migration and the app"
+            )
+        return
+    if minor_units is not False:
+        return  # Already converted, or created as BIGINT by create_all
+    for table, columns in MONEY_COLUMNS.items():
+        if table in tables:
+            _convert(table, columns, sa.BigInteger(), "CAST(ROUND({column} * 100) AS BIGINT)")
+
+
+def downgrade() -> None:
+    tables = _existing_tables()
+    if not _stored_as_minor_units(tables):
+        return
+    for table, columns in MONEY_COLUMNS.items():
+        if table in tables:
+            _convert(table, columns, sa.Numeric(12, 2), "CAST({column} AS NUMERIC(12, 2)) / 100.0")  # 100.0: SQLite divides integers
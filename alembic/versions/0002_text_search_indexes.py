@@ -0,0 +1,57 @@
+"""text search indexes for employers and work payments
+
+Postgres: tsvector GIN indexes for word-prefix search plus pg_trgm GIN indexes
+for substring matches. SQLite: FTS5 external-content tables kept in sync by
+triggers, rebuilt from the existing rows.
+
+Revision ID: 0002_text_search_indexes
+Revises: 0001_money_minor_units
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+
+from app.models.text_search import fts_table, postgres_search_ddl, search_document, sqlite_fts_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_text_search_indexes'
+down_revision = '0001_money_minor_units'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = {
+    "employers": ["name", "contact_info"],
+    "work_payments": ["description"],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, columns in SEARCH_COLUMNS.items():
+        if dialect == "postgresql":
+            for statement in postgres_search_ddl(table, columns):
+                op.execute(statement)
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search_trgm ON {table} "
+                f"USING gin (({search_document(columns)}) gin_trgm_ops)"
+            )
+        elif dialect == "sqlite":
+            for statement in sqlite_fts_ddl(table, columns):
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table in SEARCH_COLUMNS:
+        if dialect == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_trgm")
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
+        elif dialect == "sqlite":
+            fts = fts_table(table)
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
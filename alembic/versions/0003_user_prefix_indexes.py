@@ -0,0 +1,34 @@
+"""partial prefix indexes for provider user search
+
+Indexes (lower(name), id) and (lower(email), id) for role USER rows only, so
+prefix searches with keyset paging are range scans instead of table scans.
+
+Revision ID: 0003_user_prefix_indexes
+Revises: 0002_text_search_indexes
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+
+from app.models.text_search import prefix_index_ddl
+from app.models.user import USER_SEARCH_ROLE_FILTER
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_user_prefix_indexes'
+down_revision = '0002_text_search_indexes'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ["name", "email"]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for column in COLUMNS:
+        op.execute(prefix_index_ddl(dialect, "users", column, USER_SEARCH_ROLE_FILTER))
+
+
+def downgrade() -> None:
+    for column in COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_users_{column}_prefix")
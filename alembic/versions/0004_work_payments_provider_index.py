@@ -0,0 +1,30 @@
+"""index work payments by provider and payment date
+
+Serves per-provider payment listings, and covers the cash-flow analytics
+scan (employer_id and amount included) so it reads only the index.
+
+Revision ID: 0004_work_payments_provider_index
+Revises: 0003_user_prefix_indexes
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_work_payments_provider_index'
+down_revision = '0003_user_prefix_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The model declares the same index, so on a fresh database create_all has already made it
+    op.create_index(
+        'ix_work_payments_provider_date', 'work_payments', ['provider_id', 'payment_date', 'employer_id', 'amount'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_work_payments_provider_date', table_name='work_payments')
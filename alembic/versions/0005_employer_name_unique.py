@@ -0,0 +1,31 @@
+"""unique employer name per provider
+
+Employer creates and renames rely on this constraint instead of a SELECT
+for a duplicate first, which also closes the race between two requests.
+Fails if a provider already has two employers with the same name; rename
+those before upgrading.
+
+Revision ID: 0005_employer_name_unique
+Revises: 0004_work_payments_provider_index
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_employer_name_unique'
+down_revision = '0004_work_payments_provider_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A unique index rather than ALTER TABLE ADD CONSTRAINT: SQLite would rebuild the table for the
+    # constraint and drop the FTS triggers attached to it. The model declares the same index, so on a
+    # fresh database create_all has already made it
+    op.create_index('uq_employer_provider_name', 'employers', ['created_by', 'name'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_employer_provider_name', table_name='employers')
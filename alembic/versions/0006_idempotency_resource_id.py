@@ -0,0 +1,36 @@
+"""idempotency key records the row written for it
+
+The ledger write sets resource_id in its own transaction, so a retry can
+tell a committed write from one that never happened even when the process
+died before the response was stored.
+
+Revision ID: 0006_idempotency_resource_id
+Revises: 0005_employer_name_unique
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_idempotency_resource_id'
+down_revision = '0005_employer_name_unique'
+branch_labels = None
+depends_on = None
+
+
+def _has_column() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns('idempotency_keys')
+    return any(column['name'] == 'resource_id' for column in columns)
+
+
+def upgrade() -> None:
+    # On a fresh database create_all has already made the column
+    if not _has_column():
+        op.add_column('idempotency_keys', sa.Column('resource_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('idempotency_keys') as batch:
+        batch.drop_column('resource_id')
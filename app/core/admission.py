@@ -0,0 +1,131 @@
+import json
+from typing import Dict, Optional
+from app.core.config import settings
+
+HEALTH = "health"
+AUTH = "auth"
+WRITE = "write"
+READ = "read"
+STREAM = "stream"
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_class(method: str, path: str) -> str:
+    """Bucket a request by the resource it mostly waits on"""
+    if path == "/health":
+        return HEALTH
+    if path.startswith("/events"):
+        return STREAM  # Long-lived; counted separately so open streams never starve short requests
+    if path.startswith("/auth"):
+        return AUTH  # bcrypt hashing holds a worker thread for tens of milliseconds
+    if method in _READ_METHODS:
+        return READ
+    return WRITE
+
+
+class AdmissionController:
+    """
+    Bounds in-flight requests per route class and in total, rejecting the excess at once instead of
+    letting it queue behind the threadpool and DB pool. Priority comes from the shared budget: reads
+    are admitted only while total in-flight is below `read_share` of it, writes and auth up to all of it,
+    and /health is never shed.
+    """
+
+    def __init__(self, limits: Dict[str, int], total_limit: int, read_share: float = 0.75, retry_after_seconds: int = 1):
+        self.limits = limits
+        self.total_limit = total_limit
+        self.read_share = read_share
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight: Dict[str, int] = {name: 0 for name in (HEALTH, AUTH, WRITE, READ, STREAM)}
+        self.peak: Dict[str, int] = dict(self.in_flight)
+        self.admitted: Dict[str, int] = dict(self.in_flight)
+        self.shed: Dict[str, int] = dict(self.in_flight)
+
+    def _total(self) -> int:
+        # Streams have their own limit and idle most of the time, so they do not use the shared budget
+        return sum(count for name, count in self.in_flight.items() if name not in (HEALTH, STREAM))
+
+    def try_acquire(self, name: str) -> bool:
+        # Called from the event loop only, so the check-and-increment cannot interleave
+        if name != HEALTH:
+            limit = self.limits.get(name)
+            if limit is not None and self.in_flight[name] >= limit:
+                self.shed[name] += 1
+                return False
+            if name != STREAM:
+                budget = self.total_limit * self.read_share if name == READ else self.total_limit
+                if self._total() >= budget:
+                    self.shed[name] += 1
+                    return False
+        self.in_flight[name] += 1
+        self.admitted[name] += 1
+        self.peak[name] = max(self.peak[name], self.in_flight[name])
+        return True
+
+    def release(self, name: str) -> None:
+        self.in_flight[name] -= 1
+
+    def stats(self) -> dict:
+        return {
+            "total_limit": self.total_limit,
+            "read_budget": int(self.total_limit * self.read_share),
+            "classes": {
+                name: {
+                    "in_flight": self.in_flight[name],
+                    "limit": self.limits.get(name),
+                    "peak": self.peak[name],
+                    "admitted": self.admitted[name],
+                    "shed": self.shed[name]
+                }
+                for name in self.in_flight
+            }
+        }
+
+
+admission = AdmissionController(
+    limits={
+        AUTH: settings.ADMISSION_AUTH_LIMIT,
+        WRITE: settings.ADMISSION_WRITE_LIMIT,
+        READ: settings.ADMISSION_READ_LIMIT,
+        STREAM: settings.ADMISSION_STREAM_LIMIT
+    },
+    total_limit=settings.ADMISSION_TOTAL_LIMIT,
+    read_share=settings.ADMISSION_READ_SHARE,
+    retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS
+)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: holds an admission slot from the start of a request until its response is fully sent"""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        if not self.controller.try_acquire(name):
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after_seconds).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
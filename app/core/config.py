@@ -6,6 +6,121 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Money columns: "numeric" (NUMERIC(12, 2)) or "minor_units" (BIGINT cents); must match the migrated schema
+    MONEY_STORAGE: str = "numeric"
+
+    # OTP verification
+    OTP_STEP_SECONDS: int = 60
+    OTP_DRIFT_STEPS: int = 1  # Accept codes from +/- this many steps
+    OTP_SECRET_CACHE_SIZE: int = 10000
+    OTP_REPLAY_CACHE_SIZE: int = 100000
+
+    # Idempotency-Key handling for retried writes
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS: int = 60  # A reservation older than this is treated as abandoned
+
+    # Group commit: hand validated ledger inserts to a background writer that commits them in batches
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_MAX_BATCH_SIZE: int = 100
+    GROUP_COMMIT_MAX_LATENCY_MS: float = 5.0
+    GROUP_COMMIT_TIMEOUT_SECONDS: float = 10.0  # Wait for a queued row before withdrawing it
+    GROUP_COMMIT_OUTCOME_TIMEOUT_SECONDS: float = 30.0  # Further wait for a row the writer has already taken
+
+    # Live event streams
+    EVENT_BACKEND: str = "local"  # "local" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+    EVENT_QUEUE_SIZE: int = 100  # Per-connection buffer before the stream is dropped
+    EVENT_HEARTBEAT_SECONDS: float = 15.0
+    EVENT_REPLAY_LIMIT: int = 500  # Max events replayed for Last-Event-ID; a longer backlog gets a resync event instead
+    EVENT_REPLAY_COMMIT_LAG_SECONDS: float = 10.0  # Longest a ledger write may stay uncommitted after its event row is flushed
+    EVENT_CURSOR_MAX_IDS: int = 200  # Ids inside the commit lag a resume cursor lists before settling the oldest
+    EVENT_LISTEN_RECONNECT_MAX_SECONDS: float = 30.0  # Backoff cap when the Postgres LISTEN connection is lost
+
+    # Per-user response cache for read-heavy GETs (invalidated locally on commit; TTL bounds staleness across workers)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Public profile lookups
+    PUBLIC_LOOKUP_MAX_IDS: int = 100
+    PUBLIC_PROFILE_CACHE_SIZE: int = 10000
+    PUBLIC_PROFILE_CACHE_TTL_SECONDS: float = 300.0
+
+    # Balance snapshots
+    BALANCE_SNAPSHOT_VERIFY: bool = False  # Compare every snapshot-based balance read with a full recompute
+    BALANCE_SNAPSHOT_LAG_SECONDS: int = 300  # Only snapshot rows older than this, so in-flight inserts with lower ids are never skipped
+
+    # Full-text search over employers and work payments
+    SEARCH_MAX_LIMIT: int = 100  # Page size cap
+    SEARCH_MAX_TERMS: int = 8  # Extra words in a query are ignored
+
+    # Provider search for client accounts
+    USER_SEARCH_MIN_PREFIX: int = 2
+    USER_SEARCH_MAX_LIMIT: int = 50
+    USER_SEARCH_RATE_LIMIT: int = 30  # Searches per provider per window
+    USER_SEARCH_RATE_WINDOW_SECONDS: float = 60.0
+
+    # Admission control: reject with 503 + Retry-After instead of queueing past these in-flight counts
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TOTAL_LIMIT: int = 40  # Shared by auth, writes and reads; anyio's default threadpool size
+    ADMISSION_READ_SHARE: float = 0.75  # Reads are shed once this fraction of the total is in flight
+    ADMISSION_AUTH_LIMIT: int = 8
+    ADMISSION_WRITE_LIMIT: int = 30
+    ADMISSION_READ_LIMIT: int = 30
+    ADMISSION_STREAM_LIMIT: int = 1000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Background jobs (python -m app.worker)
+    JOB_WORKER_PROCESSES: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = 600.0  # A running job whose worker is silent this long is run again
+    JOB_HEARTBEAT_SECONDS: float = 30.0  # How often a running job's lock is extended (at most a third of its timeout)
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # Doubled after each failed attempt
+
+    # Debt aging reports, memoized per provider until its next ledger write
+    AGING_CACHE_SIZE: int = 1000
+
+    # Work payment cash-flow analytics, cached per provider until its next work payment write
+    ANALYTICS_CACHE_SIZE: int = 1000
+    ANALYTICS_MAX_MONTHS: int = 60
+
+    # Anomaly scan over debts (incremental, from a persisted high-water mark)
+    ANOMALY_SCAN_CHUNK_SIZE: int = 5000  # Transactions per committed chunk
+    ANOMALY_SCAN_LAG_SECONDS: int = 300  # Only scan rows older than this, so in-flight inserts with lower ids are never skipped
+    ANOMALY_ZSCORE_THRESHOLD: float = 3.0  # Flag debts this many standard deviations above the pair's mean
+    ANOMALY_MIN_HISTORY: int = 5  # Debts a pair needs before amounts are scored
+    ANOMALY_BURST_COUNT: int = 5  # Flag the debt that makes this many debts of a pair inside the window
+    ANOMALY_BURST_WINDOW_SECONDS: int = 600
+    ANOMALY_FLAGS_MAX_LIMIT: int = 100
+
+    # Slow-query log (engine events); see GET /admin/slow-queries
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1  # Share of slow SELECTs whose plan is captured with EXPLAIN
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500  # Distinct normalized statements kept for the admin listing
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"  # JSON lines; empty to only keep the in-memory aggregates
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+
+    # Request tracing (OTLP/JSON spans); see GET /admin/traces
+    TRACING_ENABLED: bool = False  # Read at startup: when off nothing is wrapped at all
+    TRACING_SAMPLE_RATIO: float = 1.0  # Share of requests that get a trace
+    TRACING_EXPORTER: str = "memory"  # "memory" or "file"
+    TRACING_FILE: str = "logs/traces.jsonl"  # One OTLP/JSON ExportTraceServiceRequest per line
+    TRACING_MEMORY_MAX_TRACES: int = 1000  # Recent traces kept in memory for the admin listing
+
+    # Logging (records are written by a listener thread, off the request path)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per-logger overrides, e.g. "app.core.jobs=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_FILE: str = ""  # Also write to this rotating file; empty for stderr only
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # Records waiting for the listener (0: unbounded); further records are dropped, never blocked on
+    LOG_ACCESS: bool = True  # One app.access record per request with status and duration
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,9 +1,13 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.slow_queries import install_slow_query_log
 
 engine = create_engine(settings.DATABASE_URL, future=True, echo=False)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+install_slow_query_log(engine)
+# Instances keep their loaded values after commit: what a write just sent (or got back from RETURNING)
+# is what the response needs, so reading it must not cost a refresh SELECT
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False, future=True)
 Base = declarative_base()
 from app.models import user, user_provider, transaction
 Base.metadata.create_all(bind=engine)
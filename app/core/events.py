@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+Dispatch = Callable[[List[str], dict], None]
+
+
+class Subscription:
+    """
+    A connection's view of the broker: a bounded queue fed from any thread and read from the event loop.
+    Publishers never block on a slow reader. When the queue is full the subscription either drops its
+    oldest event and counts it (`drop_oldest=True`) or is marked overflowed so the stream can end.
+    """
+
+    def __init__(self, broker: "EventBroker", topics: Iterable[str], max_queue: int, drop_oldest: bool = False):
+        self.broker = broker
+        self.topics = list(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_queue)
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self.overflowed = False
+        self.closed = False
+
+    def deliver(self, event_data: dict) -> None:
+        if not self.closed:
+            try:
+                self.loop.call_soon_threadsafe(self._put, event_data)
+            except RuntimeError:
+                # Event loop already closed; the connection is gone
+                self.close()
+
+    def _put(self, event_data: dict) -> None:
+        if self.drop_oldest and self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        try:
+            self.queue.put_nowait(event_data)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+
+class LocalBackend:
+    """Delivers events to subscribers of this process only"""
+
+    def start(self, dispatch: Dispatch, dispatch_all: Callable[[dict], None]) -> None:
+        self._dispatch = dispatch
+
+    def publish(self, topics: List[str], event_data: dict) -> None:
+        self._dispatch(topics, event_data)
+
+
+class PostgresNotifyBackend:
+    """Fans events out to every worker through Postgres LISTEN/NOTIFY"""
+
+    channel = "debtme_events"
+
+    def __init__(self, bind=engine):
+        self.engine = bind
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, dispatch: Dispatch, dispatch_all: Callable[[dict], None]) -> None:
+        self._dispatch = dispatch
+        self._dispatch_all = dispatch_all
+        self._thread = threading.Thread(target=self._listen, name="event-listener", daemon=True)
+        self._thread.start()
+
+    def publish(self, topics: List[str], event_data: dict) -> None:
+        payload = json.dumps({"topics": topics, "event": event_data}, default=str)
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+
+    def _listen(self) -> None:
+        """Keeps a LISTEN connection open, reconnecting with exponential backoff when it is lost"""
+        delay = 1.0
+        connected_before = False
+        while True:
+            try:
+                raw = self.engine.raw_connection()
+            except Exception:
+                logger.exception("Event listener could not connect; retrying in %.0fs", delay)
+                time.sleep(delay)
+                delay = min(delay * 2, settings.EVENT_LISTEN_RECONNECT_MAX_SECONDS)
+                continue
+            try:
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                delay = 1.0
+                if connected_before:
+                    # Notifications sent while disconnected are gone; ledger clients replay them from the
+                    # change log, link clients refetch
+                    self._dispatch_all({"event": "resync", "data": {"reason": "listener_reconnected"}})
+                connected_before = True
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        self._dispatch(message["topics"], message["event"])
+            except Exception:
+                logger.exception("Event listener connection lost; reconnecting in %.0fs", delay)
+                try:
+                    raw.invalidate()  # Never hand the broken connection back to the pool
+                except Exception:
+                    pass
+                time.sleep(delay)
+                delay = min(delay * 2, settings.EVENT_LISTEN_RECONNECT_MAX_SECONDS)
+
+
+class EventBroker:
+    """In-process pub/sub keyed by topic (e.g. "user:4", "provider:2") on top of a pluggable backend"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.backend.start(self._dispatch, self._dispatch_all)
+
+    def subscribe(self, topics: Iterable[str], max_queue: int = settings.EVENT_QUEUE_SIZE, drop_oldest: bool = False) -> Subscription:
+        """Must be called from the event loop that will consume the subscription"""
+        self._ensure_started()
+        subscription = Subscription(self, topics, max_queue, drop_oldest)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topics: List[str], event_data: dict) -> None:
+        self._ensure_started()
+        self.backend.publish(topics, event_data)
+
+    def _dispatch(self, topics: List[str], event_data: dict) -> None:
+        with self._lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self._subscribers.get(topic, ()))
+        for subscription in targets:
+            subscription.deliver(event_data)
+
+    def _dispatch_all(self, event_data: dict) -> None:
+        with self._lock:
+            targets = {s for subs in self._subscribers.values() for s in subs}
+        for subscription in targets:
+            subscription.deliver(event_data)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+
+def _create_backend():
+    if settings.EVENT_BACKEND == "postgres":
+        return PostgresNotifyBackend()
+    return LocalBackend()
+
+
+broker = EventBroker(_create_backend())
+
+
+def publish_after_commit(db: Session, topics: List[str], event_data: dict) -> None:
+    """Queue an event on the session; it is published only if the current transaction commits"""
+    db.info.setdefault("pending_events", []).append((topics, event_data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for topics, event_data in session.info.pop("pending_events", []):
+        try:
+            broker.publish(topics, event_data)
+        except Exception:
+            # The write is already committed; subscribers can resume from the change log
+            logger.exception("Failed to publish event to %s", topics)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_events(session: Session, transaction) -> None:
+    # Only when the outermost transaction ends without committing; rolling back a savepoint keeps
+    # what the rest of the unit of work queued
+    if transaction.parent is None:
+        session.info.pop("pending_events", None)
@@ -0,0 +1,257 @@
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.logging_setup import configure_logging
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable[..., Any]  # func(db, **payload) -> JSON-serializable result
+    max_attempts: int
+    timeout_seconds: float
+
+
+tasks: Dict[str, Task] = {}
+
+
+def task(name: str, max_attempts: Optional[int] = None, timeout_seconds: Optional[float] = None):
+    """Register `func(db, **payload)` as a job task under `name`"""
+    def register(func):
+        tasks[name] = Task(
+            name=name,
+            func=func,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            timeout_seconds=timeout_seconds or settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+        )
+        return func
+    return register
+
+
+def enqueue_job(db: Session, name: str, payload: Optional[dict] = None, run_after: Optional[datetime] = None) -> Job:
+    """
+    Queue task `name` with keyword arguments `payload`.
+    Does not commit: the job becomes visible to workers with the caller's transaction.
+    """
+    if name not in tasks:
+        raise ValueError(f"Unknown job task: {name}")
+    job = Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=tasks[name].max_attempts,
+        run_after=run_after or datetime.utcnow()
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def job_stats(db: Session) -> Dict[str, int]:
+    counts = {status.value: 0 for status in JobStatus}
+    for status, count in db.query(Job.status, func.count(Job.id)).group_by(Job.status).all():
+        counts[status.value] = count
+    return counts
+
+
+class JobWorker:
+    """
+    Claims and runs queued jobs one at a time.
+    A claim is a conditional UPDATE that only succeeds for one worker, so it works the same on SQLite and Postgres;
+    on Postgres candidates are read with SKIP LOCKED so concurrent workers do not contend on the same rows.
+    Every later write for the job is conditional on still holding that claim, and a heartbeat extends the lock
+    while the task runs.
+    """
+
+    def __init__(self, session_factory=SessionLocal, worker_id: Optional[str] = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _fail_exhausted(self, db: Session, now: datetime) -> None:
+        # Workers that died mid-job leave an expired lock; give up once the attempts are used
+        db.query(Job).filter(
+            Job.status == JobStatus.RUNNING,
+            Job.locked_until < now,
+            Job.attempts >= Job.max_attempts
+        ).update({
+            Job.status: JobStatus.FAILED,
+            Job.last_error: "Visibility timeout expired",
+            Job.locked_by: None,
+            Job.finished_at: now
+        }, synchronize_session=False)
+        db.commit()
+
+    def claim(self, db: Session) -> Optional[Job]:
+        now = datetime.utcnow()
+        self._fail_exhausted(db, now)
+        runnable = or_(
+            and_(Job.status == JobStatus.QUEUED, Job.run_after <= now),
+            and_(Job.status == JobStatus.RUNNING, Job.locked_until < now)
+        )
+        candidates = db.query(Job.id, Job.name).filter(runnable).order_by(Job.run_after, Job.id).limit(10).with_for_update(skip_locked=True).all()
+        for job_id, name in candidates:
+            timeout = tasks[name].timeout_seconds if name in tasks else settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+            claimed = db.query(Job).filter(Job.id == job_id, runnable).update({
+                Job.status: JobStatus.RUNNING,
+                Job.attempts: Job.attempts + 1,
+                Job.locked_until: now + timedelta(seconds=timeout),
+                Job.locked_by: self.worker_id
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                return db.get(Job, job_id)
+        db.commit()
+        return None
+
+    def _owned(self, job_id: int, attempt: int) -> list:
+        # The attempt number tells this claim apart from a later one by the same worker id
+        return [Job.id == job_id, Job.status == JobStatus.RUNNING, Job.locked_by == self.worker_id, Job.attempts == attempt]
+
+    def _update_owned(self, db: Session, job_id: int, attempt: int, values: dict) -> bool:
+        """Write `values` only while this worker still holds the claim; False when another worker took the job over"""
+        updated = db.query(Job).filter(*self._owned(job_id, attempt)).update(values, synchronize_session=False)
+        db.commit()
+        if not updated:
+            logger.warning("Job %s was claimed again after its lock expired; dropping attempt %s's outcome", job_id, attempt)
+        return bool(updated)
+
+    def _finish(self, db: Session, job: Job, result: Any) -> bool:
+        return self._update_owned(db, job.id, job.attempts, {
+            Job.status: JobStatus.DONE,
+            Job.result: json.dumps(result, default=str),
+            Job.locked_until: None,
+            Job.locked_by: None,
+            Job.finished_at: datetime.utcnow()
+        })
+
+    def _retry_or_fail(self, db: Session, job: Job, error: str) -> bool:
+        values = {Job.last_error: error, Job.locked_until: None, Job.locked_by: None}
+        if job.attempts < job.max_attempts:
+            values[Job.status] = JobStatus.QUEUED
+            values[Job.run_after] = datetime.utcnow() + timedelta(seconds=settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+        else:
+            values[Job.status] = JobStatus.FAILED
+            values[Job.finished_at] = datetime.utcnow()
+        return self._update_owned(db, job.id, job.attempts, values)
+
+    def _heartbeat(self, job_id: int, attempt: int, timeout: float, done: threading.Event) -> None:
+        """Keep extending the job's lock while its task runs, so only a silent worker loses the job"""
+        while not done.wait(min(settings.JOB_HEARTBEAT_SECONDS, timeout / 3)):
+            db = self.session_factory()
+            try:
+                extended = db.query(Job).filter(*self._owned(job_id, attempt)).update(
+                    {Job.locked_until: datetime.utcnow() + timedelta(seconds=timeout)}, synchronize_session=False
+                )
+                db.commit()
+            except Exception:
+                # Missing one beat is fine; the lock still has two thirds of its timeout left
+                logger.exception("Heartbeat for job %s failed", job_id)
+                continue
+            finally:
+                db.close()
+            if not extended:
+                return
+
+    def run_once(self) -> bool:
+        """Run one job if any is runnable. Returns False when the queue was empty."""
+        db = self.session_factory()
+        try:
+            job = self.claim(db)
+            if job is None:
+                return False
+            job_id = job.id
+            task_def = tasks.get(job.name)
+            if task_def is None:
+                self._retry_or_fail(db, job, f"Unknown job task: {job.name}")
+                return True
+            logger.info("Running job %s (%s), attempt %s", job_id, job.name, job.attempts)
+            done = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._heartbeat, args=(job_id, job.attempts, task_def.timeout_seconds, done),
+                name=f"job-heartbeat-{job_id}", daemon=True
+            )
+            heartbeat.start()
+            task_db = self.session_factory()
+            try:
+                result = task_def.func(task_db, **json.loads(job.payload))
+                task_db.commit()
+            except Exception:
+                task_db.rollback()
+                logger.exception("Job %s (%s) failed", job_id, job.name)
+                self._retry_or_fail(db, job, traceback.format_exc(limit=5))
+                return True
+            finally:
+                done.set()
+                heartbeat.join()
+                task_db.close()
+            self._finish(db, job, result)
+            return True
+        finally:
+            db.close()
+
+    def run_pending(self, max_jobs: Optional[int] = None) -> int:
+        """Run runnable jobs until the queue is empty (or `max_jobs` ran). Returns the number run."""
+        ran = 0
+        while (max_jobs is None or ran < max_jobs) and self.run_once():
+            ran += 1
+        return ran
+
+    def run_forever(self, poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                # Database unavailable or similar; back off and retry
+                logger.exception("Job worker %s loop error", self.worker_id)
+            self._stop.wait(poll_interval)
+
+
+def _worker_process(index: int) -> None:
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    configure_logging()
+    worker = JobWorker(worker_id=f"{socket.gethostname()}:{os.getpid()}:{index}")
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    logger.info("Job worker %s started", worker.worker_id)
+    worker.run_forever()
+
+
+def run_worker_pool(processes: int) -> None:
+    """Start `processes` worker processes and wait; SIGINT/SIGTERM stop them after their current job"""
+    children: List[multiprocessing.Process] = []
+    for index in range(processes):
+        process = multiprocessing.Process(target=_worker_process, args=(index,), name=f"job-worker-{index}")
+        process.start()
+        children.append(process)
+
+    def shutdown(*_):
+        for process in children:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for process in children:
+        process.join()
@@ -0,0 +1,220 @@
+"""
+Structured logging.
+Every logger hands its records to a QueueHandler; a QueueListener thread formats them as JSON lines and does
+the actual I/O, so a request thread only pays for building the record and a queue put. RequestIdMiddleware
+gives each request an id (X-Request-ID, taken from the client when sent) that is stamped on every record
+logged while serving it.
+
+    LOG_LEVEL=INFO LOG_LEVELS="app.core.jobs=DEBUG,sqlalchemy.engine=WARNING"
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+from app.core.config import settings
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+_listeners: List[QueueListener] = []
+_queue_handlers: List["BackgroundQueueHandler"] = []
+_configured_pid: Optional[int] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on the record; runs on the calling thread, before the record is queued"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.processName
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        # Anything passed with extra={...}
+        for key, value in vars(record).items():
+            if key not in self._RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already rendered by BackgroundQueueHandler.prepare
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue without formatting them: only the message arguments are merged and a
+    traceback rendered to text here, the JSON formatting happens on the listener thread. When the queue is
+    full the record is dropped and counted instead of blocking the request; once there is room again a
+    warning with the number lost is queued ahead of the next record.
+    """
+
+    _traceback_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Like QueueHandler.prepare: the queue must not keep the traceback (and every frame's locals) alive
+            record.exc_text = record.exc_text or self._traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped > self._reported:
+                self.queue.put_nowait(self._drop_warning(self.dropped - self._reported))
+                self._reported = self.dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def _drop_warning(count: int) -> logging.LogRecord:
+        return logging.makeLogRecord({
+            "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING", "request_id": None,
+            "msg": f"Log queue was full; dropped {count} records"
+        })
+
+
+def queued(*handlers: logging.Handler) -> BackgroundQueueHandler:
+    """A queue handler whose records are written by `handlers` on a listener thread"""
+    handler = BackgroundQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestIdFilter())
+    listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    _queue_handlers.append(handler)
+    return handler
+
+
+def rotating_file_handler(path: str, max_bytes: int, backup_count: int) -> RotatingFileHandler:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+
+
+def parse_levels(spec: str) -> dict:
+    """"app.core.jobs=DEBUG, sqlalchemy.engine=WARNING" -> {"app.core.jobs": "DEBUG", ...}"""
+    levels = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, level = item.partition("=")
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging() -> None:
+    """
+    Route the root logger through a queue to stderr (and LOG_FILE when set) and apply LOG_LEVEL/LOG_LEVELS.
+    Idempotent per process; a forked worker process calls it again to get its own listener thread.
+    """
+    global _configured_pid
+    if _configured_pid == os.getpid():
+        return
+    if _configured_pid is not None:
+        # A forked process inherits the handlers and their queues but not the listener threads
+        for listener in _listeners:
+            listener.start()
+        _configured_pid = os.getpid()
+        return
+
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+    )
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if settings.LOG_FILE:
+        handlers.append(rotating_file_handler(settings.LOG_FILE, settings.LOG_FILE_MAX_BYTES, settings.LOG_FILE_BACKUP_COUNT))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queued(*handlers))
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    _configured_pid = os.getpid()
+
+
+def logging_stats() -> dict:
+    """Records waiting for the listener threads and records dropped because a queue was full"""
+    return {
+        "queued": sum(handler.queue.qsize() for handler in _queue_handlers),
+        "dropped": sum(handler.dropped for handler in _queue_handlers)
+    }
+
+
+def stop_logging() -> None:
+    """Write out what is still queued and stop the listener threads"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_logging)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware: binds the request id for the request's log records and writes one access record"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        current = incoming[:64] if incoming else uuid.uuid4().hex
+        token = request_id.set(current)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", current.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if settings.LOG_ACCESS:
+                access_logger.info(
+                    "%s %s %s", scope["method"], scope["path"], status_code,
+                    extra={"status": status_code, "duration_ms": round((time.perf_counter() - start) * 1000, 2)}
+                )
+            request_id.reset(token)
@@ -8,8 +8,6 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    print(hashed_password)
-    print(plain_password)
     return pwd_context.verify(plain_password, hashed_password)
 
 
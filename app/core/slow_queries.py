@@ -0,0 +1,199 @@
+"""
+Slow-query log.
+Engine events time every statement; those over SLOW_QUERY_THRESHOLD_MS are fingerprinted (SQL with literals
+and IN lists normalized away), attributed to the app function that issued them, aggregated for
+GET /admin/slow-queries and written as JSON lines to a rotating log file. A sample of slow SELECTs also gets
+its query plan captured with EXPLAIN on the same connection.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.logging_setup import queued, rotating_file_handler
+
+logger = logging.getLogger("app.slow_queries")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def normalize_sql(statement: str) -> str:
+    """The statement with every literal and placeholder as ?, IN lists collapsed and whitespace folded"""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Types (never values) of the bound parameters"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def calling_function() -> Optional[str]:
+    """module:function of the innermost app frame (outside this module) that led to the statement"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_ROOT) and filename != _THIS_FILE:
+            module = os.path.relpath(filename, os.path.dirname(_APP_ROOT))[:-3].replace(os.sep, ".")
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, statement: str, parameters) -> Optional[List[str]]:
+    """Query plan of a SELECT through the raw DBAPI connection, so it is neither timed nor logged itself"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    dialect = connection.dialect.name
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None:
+        return None
+    cursor = connection.connection.cursor()
+    # On Postgres a failed statement aborts the whole transaction, so the EXPLAIN runs in a savepoint
+    savepoint = dialect == "postgresql"
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as exc:  # The plan is best effort; never fail the query that was already run
+        if savepoint:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        cursor.close()
+    if dialect == "sqlite":
+        return [str(row[-1]) for row in rows]
+    return [str(row[0]) for row in rows]
+
+
+class SlowQueryLog:
+    """Per-fingerprint aggregates of slow statements, bounded to `max_fingerprints` entries"""
+
+    def __init__(self, threshold_ms: float, explain_sample_rate: float = 0.1, max_fingerprints: int = 500):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_fingerprints = max_fingerprints
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, connection, statement: str, parameters, executemany: bool, duration_ms: float) -> dict:
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        plan = None
+        if random.random() < self.explain_sample_rate and not executemany:
+            plan = explain(connection, statement, parameters)
+        entry = {
+            "event": "slow_query",
+            "timestamp": datetime.utcnow().isoformat(),
+            "fingerprint": key,
+            "duration_ms": round(duration_ms, 2),
+            "sql": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "caller": calling_function(),
+            "plan": plan
+        }
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    # Drop the fingerprint that cost the least so far
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k]["total_ms"])]
+                stats = self._entries[key] = {
+                    "fingerprint": key, "sql": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "callers": {}, "plan": None, "last_seen": None
+                }
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["last_seen"] = entry["timestamp"]
+            if entry["caller"]:
+                stats["callers"][entry["caller"]] = stats["callers"].get(entry["caller"], 0) + 1
+            if plan is not None:
+                stats["plan"] = plan
+        logger.warning(json.dumps(entry, default=str))
+        return entry
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[dict]:
+        with self._lock:
+            entries = [dict(stats, callers=dict(stats["callers"])) for stats in self._entries.values()]
+        for stats in entries:
+            stats["mean_ms"] = round(stats["total_ms"] / stats["count"], 2)
+            stats["total_ms"] = round(stats["total_ms"], 2)
+            stats["max_ms"] = round(stats["max_ms"], 2)
+        return sorted(entries, key=lambda stats: stats[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    max_fingerprints=settings.SLOW_QUERY_MAX_FINGERPRINTS
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    if duration_ms >= slow_query_log.threshold_ms:
+        slow_query_log.record(conn, statement, parameters, executemany, duration_ms)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def install_slow_query_log(engine: Engine) -> None:
+    """Time every statement of `engine` and write the slow ones to SLOW_QUERY_LOG_FILE"""
+    if not settings.SLOW_QUERY_LOG_ENABLED or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    if settings.SLOW_QUERY_LOG_FILE and not logger.handlers:
+        handler = rotating_file_handler(settings.SLOW_QUERY_LOG_FILE, settings.SLOW_QUERY_LOG_MAX_BYTES, settings.SLOW_QUERY_LOG_BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter("%(message)s"))  # Each record is already a JSON object
+        # Written by a listener thread like every other log record, not on the querying thread
+        logger.addHandler(queued(handler))
+        logger.propagate = False
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,296 @@
+"""
+Lightweight request tracing.
+A sampled request gets a root span from TracingMiddleware; get_current_user, every public function in
+app/services, each SQL statement and response serialization add child spans. A finished trace is handed
+to the exporter as one OTLP/JSON document (the OpenTelemetry protocol's JSON encoding), so the file can be
+replayed into any OpenTelemetry collector.
+
+Nothing is wrapped unless TRACING_ENABLED is set when the app starts; unsampled requests only pay for
+a context-variable lookup per traced call.
+"""
+import asyncio
+import functools
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.logging_setup import request_id
+from app.core.slow_queries import normalize_sql
+
+SERVICE_NAME = "debt-backend"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = "%032x" % random.getrandbits(128)
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"] = None, kind: int = 1, attributes: Optional[dict] = None):
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind  # OTLP SpanKind: 1 internal, 2 server, 3 client
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_document(trace: Trace) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "app.core.tracing"},
+                "spans": [span.to_otlp() for span in trace.spans]
+            }]
+        }]
+    }
+
+
+class InMemoryExporter:
+    """Keeps the latest `max_traces` traces for GET /admin/traces"""
+
+    def __init__(self, max_traces: int = 1000):
+        self.traces = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(otlp_document(trace))
+
+    def recent(self, limit: int) -> List[dict]:
+        return list(self.traces)[-limit:][::-1]
+
+
+class FileExporter(InMemoryExporter):
+    """Also appends each trace as one OTLP/JSON line to `path`"""
+
+    def __init__(self, path: str, max_traces: int = 1000):
+        super().__init__(max_traces)
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, trace: Trace) -> None:
+        document = otlp_document(trace)
+        self.traces.append(document)
+        line = json.dumps(document) + "\n"
+        with self._lock, open(self.path, "a") as file:
+            file.write(line)
+
+
+def _make_exporter():
+    if settings.TRACING_EXPORTER == "file":
+        return FileExporter(settings.TRACING_FILE, settings.TRACING_MEMORY_MAX_TRACES)
+    return InMemoryExporter(settings.TRACING_MEMORY_MAX_TRACES)
+
+
+exporter = _make_exporter()
+
+
+@contextmanager
+def span(name: str, kind: int = 1, **attributes):
+    """Child span of the current one; does nothing outside a sampled request"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def traced(func, name: Optional[str] = None):
+    """Wrap `func` in a span named module:function (sync and async functions)"""
+    name = name or f"{func.__module__}:{func.__qualname__}"
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await func(*args, **kwargs)
+            with span(name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return func(*args, **kwargs)
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def instrument_app_functions() -> None:
+    """
+    Wrap get_current_user and every public function defined in app/services, and rebind them wherever an
+    app module imported them. Must run before the routes are imported so their Depends() see the wrappers.
+    """
+    import app.services
+    import app.utils.dependencies
+
+    modules = [importlib.import_module(f"app.services.{info.name}") for info in pkgutil.iter_modules(app.services.__path__)]
+    wrappers: Dict[Any, Any] = {}
+    for module in modules:
+        for attribute, value in vars(module).items():
+            if (
+                inspect.isfunction(value) and value.__module__ == module.__name__ and not attribute.startswith("_")
+                and not inspect.isgeneratorfunction(value) and not inspect.isasyncgenfunction(value)
+            ):
+                wrappers[value] = traced(value)
+    dependency = app.utils.dependencies.get_current_user
+    wrappers[dependency] = traced(dependency, "dependency:get_current_user")
+
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == "app" or name.startswith("app.")):
+            continue
+        for attribute, value in list(vars(module).items()):
+            if inspect.isfunction(value) and value in wrappers:
+                setattr(module, attribute, wrappers[value])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, "db.query", parent, 3, {
+        "db.system": conn.dialect.name,
+        "db.statement": normalize_sql(statement)
+    })
+    conn.info.setdefault("trace_spans", []).append((child, _current.set(child)))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        child, token = spans.pop()
+        _current.reset(token)
+        child.end()
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    spans = connection.info.get("trace_spans") if connection is not None else None
+    if spans:
+        child, token = spans.pop()
+        child.error = str(exception_context.original_exception)
+        _current.reset(token)
+        child.end()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """A client span per SQL statement executed inside a sampled request"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def instrument_serialization() -> None:
+    """Spans around response_model validation/dumping and JSON rendering"""
+    import fastapi.routing
+    from starlette.responses import JSONResponse
+
+    serialize_response = fastapi.routing.serialize_response
+    if getattr(serialize_response, "__wrapped__", None) is None:
+        fastapi.routing.serialize_response = traced(serialize_response, "response.serialize")
+    render = JSONResponse.render
+    if getattr(render, "__wrapped__", None) is None:
+        JSONResponse.render = traced(render, "response.render")
+
+
+class TracingMiddleware:
+    """ASGI middleware: samples requests at TRACING_SAMPLE_RATIO and exports each sampled trace when it ends"""
+
+    def __init__(self, app, sample_ratio: Optional[float] = None):
+        self.app = app
+        self.sample_ratio = settings.TRACING_SAMPLE_RATIO if sample_ratio is None else sample_ratio
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_ratio:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(Trace(), f"{scope['method']} {scope['path']}", kind=2, attributes={
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+            "http.request_id": request_id.get() or ""
+        })
+        token = _current.set(root)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            root.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            if root.attributes.get("http.status_code", 500) >= 500:
+                root.error = root.error or "Server error"
+            root.end()
+            exporter.export(root.trace)
@@ -0,0 +1,173 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# (model class, column values, hook run inside the batch transaction after the row is flushed)
+_Item = Tuple[type, dict, Optional[Callable[[Session, Any], None]], Future]
+
+
+class WriteOutcomeUnknown(Exception):
+    """The writer took the row but did not report back in time: it may or may not be committed"""
+
+
+class GroupCommitWriter:
+    """
+    Background writer that commits inserts in groups.
+    Request threads hand over already-validated rows with `submit` and block on the returned future;
+    the writer collects rows for up to `max_latency_ms` (or `max_batch_size` rows), inserts them in a
+    single transaction and resolves every future with the committed row. The row is detached, so the
+    session factory must not expire instances on commit (SessionLocal does not).
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_batch_size: int = 100, max_latency_ms: float = 5.0):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    logger.error("Group commit writer thread died; starting a new one")
+                self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush queued rows and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, model: type, values: dict, after_insert: Optional[Callable[[Session, Any], None]] = None) -> Future:
+        future: Future = Future()
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            # Never queue a row that no thread will take
+            self.start()
+        self._queue.put((model, values, after_insert, future))
+        return future
+
+    def insert(self, model: type, values: dict, after_insert: Optional[Callable[[Session, Any], None]] = None) -> Any:
+        """
+        Submit a row and wait for the committed instance.
+        Raises TimeoutError when the row was still queued after GROUP_COMMIT_TIMEOUT_SECONDS and has been
+        withdrawn, i.e. nothing was written. Once the writer has taken the row its outcome is awaited for up
+        to GROUP_COMMIT_OUTCOME_TIMEOUT_SECONDS more, so a slow batch is not reported as a failure; past that
+        (a writer stuck in a commit) it raises WriteOutcomeUnknown rather than hold the request thread.
+        """
+        future = self.submit(model, values, after_insert)
+        try:
+            return future.result(timeout=settings.GROUP_COMMIT_TIMEOUT_SECONDS)
+        except TimeoutError:
+            if future.cancel():
+                raise
+        try:
+            return future.result(timeout=settings.GROUP_COMMIT_OUTCOME_TIMEOUT_SECONDS)
+        except TimeoutError:
+            raise WriteOutcomeUnknown() from None
+
+    def _collect(self, first: _Item) -> Tuple[List[_Item], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect(first)
+            self._write_or_fail(self._claim(batch))
+        # Drain anything submitted before the stop marker was seen
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._write_or_fail(self._claim([item]))
+
+    def _write_or_fail(self, batch: List[_Item]) -> None:
+        # Whatever escapes _write must not kill the thread and leave the batch's callers waiting
+        try:
+            self._write(batch)
+        except Exception as exc:
+            logger.exception("Group commit batch failed")
+            for item in batch:
+                if not item[3].done():
+                    item[3].set_exception(exc)
+
+    @staticmethod
+    def _claim(batch: List[_Item]) -> List[_Item]:
+        """Drop the rows whose caller gave up waiting; the rest can no longer be cancelled"""
+        return [item for item in batch if item[3].set_running_or_notify_cancel()]
+
+    def _write(self, batch: List[_Item]) -> None:
+        if not batch:
+            return
+        db = self.session_factory()
+        try:
+            rows = [model(**values) for model, values, _, _ in batch]
+            db.add_all(rows)
+            db.flush()
+            for row, (_, _, after_insert, _) in zip(rows, batch):
+                if after_insert is not None:
+                    after_insert(db, row)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            db.close()
+            if len(batch) > 1:
+                # Isolate the failing row(s) so the rest of the group still commits
+                for item in batch:
+                    self._write([item])
+            else:
+                batch[0][3].set_exception(exc)
+            return
+        db.close()
+        self.batches += 1
+        self.rows += len(batch)
+        for row, (_, _, _, future) in zip(rows, batch):
+            future.set_result(row)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": (self.rows / self.batches) if self.batches else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+
+group_writer = GroupCommitWriter(
+    max_batch_size=settings.GROUP_COMMIT_MAX_BATCH_SIZE,
+    max_latency_ms=settings.GROUP_COMMIT_MAX_LATENCY_MS
+)
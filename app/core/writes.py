@@ -0,0 +1,38 @@
+"""
+Write helpers that return the written row from the same statement.
+With the session's expire_on_commit=False the instances they return stay usable after commit,
+so services never need db.refresh() (a SELECT per write) to build their response.
+"""
+from typing import Any, Iterable, Optional, Type, TypeVar
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+M = TypeVar("M")
+
+
+def insert_returning(db: Session, model: Type[M], values: dict) -> M:
+    """INSERT ... RETURNING every column; the new row comes back as an instance in the session"""
+    return db.scalars(insert(model).returning(model), [values]).one()
+
+
+def update_returning(db: Session, model: Type[M], criteria: Iterable[Any], values: dict) -> Optional[M]:
+    """
+    UPDATE ... WHERE criteria RETURNING every column, refreshing the instance if the session already has it.
+    Returns None when no row matched, so the ownership check is the WHERE clause instead of a prior SELECT.
+    """
+    statement = update(model).where(*criteria).values(values).returning(model)
+    return db.scalars(statement, execution_options={"synchronize_session": False, "populate_existing": True}).one_or_none()
+
+
+def upsert_statement(db: Session, model: Type[M], values: dict):
+    """
+    INSERT of `values` in the session's dialect, ready for .on_conflict_do_update(...): the conflict is
+    resolved inside the statement, so concurrent first writers need no savepoint and retry.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).values(values)
+    if dialect == "sqlite":
+        return sqlite.insert(model).values(values)
+    raise NotImplementedError(f"No upsert for the {dialect} dialect")
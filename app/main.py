@@ -1,8 +1,32 @@
 from fastapi import FastAPI
 
-from app.routes import auth, user, provider, user_provider, transaction, otp, employer, work_payment
+from app.core.admission import AdmissionMiddleware
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logging_setup import RequestIdMiddleware, configure_logging
+from app.core.write_pipeline import group_writer
+from app.models.types import verify_money_storage
+
+configure_logging()
+verify_money_storage(engine)
+
+if settings.TRACING_ENABLED:
+    from app.core.tracing import instrument_app_functions, instrument_engine, instrument_serialization
+    # Before the routes import the services and get_current_user, so they bind the traced versions
+    instrument_app_functions()
+    instrument_engine(engine)
+    instrument_serialization()
+
+from app.routes import auth, user, provider, user_provider, transaction, otp, employer, work_payment, admin, events  # noqa: E402
 
 app = FastAPI(title="DebtMe API")
+app.add_middleware(AdmissionMiddleware)
+if settings.TRACING_ENABLED:
+    from app.core.tracing import TracingMiddleware
+    # Outside admission control, so the root span also covers it
+    app.add_middleware(TracingMiddleware)
+# Outermost, so admission rejections and traces are logged with the request id too
+app.add_middleware(RequestIdMiddleware)
 
 # Routers will be included after implementation to avoid import cycles if any.
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -13,6 +37,13 @@ app.include_router(transaction.router, prefix="/transactions", tags=["transactio
 app.include_router(otp.router, prefix="/otp", tags=["otp"])
 app.include_router(employer.router, prefix="/employers", tags=["employers"])
 app.include_router(work_payment.router, prefix="/work-payments", tags=["work-payments"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(events.router, prefix="/events", tags=["events"])
+
+@app.on_event("shutdown")
+def flush_group_commit_writer():
+    # Commit anything still queued before the worker exits
+    group_writer.stop(timeout=5)
 
 @app.get("/health")
 async def health():
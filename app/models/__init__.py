@@ -4,3 +4,10 @@ from .transaction import Transaction  # noqa
 from .otp import OTP  # noqa
 from .employer import Employer  # noqa
 from .work_payment import WorkPayment  # noqa
+from .transaction_rollup import TransactionDailyRollup  # noqa
+from .idempotency_key import IdempotencyKey  # noqa
+from .ledger_event import LedgerEvent  # noqa
+from .resource_version import ResourceVersion  # noqa
+from .balance_snapshot import BalanceSnapshot  # noqa
+from .job import Job  # noqa
+from .anomaly import TransactionFlag, PairDebtStats, ScanCheckpoint  # noqa
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index, UniqueConstraint
+from app.core.database import Base
+
+
+class TransactionFlag(Base):
+    """A transaction the anomaly scan found unusual for its pair"""
+    __tablename__ = "transaction_flags"
+    __table_args__ = (
+        UniqueConstraint('transaction_id', 'reason', name='uq_transaction_flag_reason'),
+        Index('ix_transaction_flags_provider_id_id', 'provider_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    reason = Column(String, nullable=False)  # amount_zscore, debt_burst
+    score = Column(Float, nullable=False)  # z-score, or number of debts inside the burst window
+    detail = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PairDebtStats(Base):
+    """Running debt statistics per pair carried between anomaly scans, so history is never rescanned"""
+    __tablename__ = "pair_debt_stats"
+    __table_args__ = (UniqueConstraint('user_id', 'provider_id', name='uq_pair_debt_stats_pair'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    debt_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Float, nullable=False, default=0.0)  # Cents
+    amount_sum_squares = Column(Float, nullable=False, default=0.0)
+    recent_debt_times = Column(Text, nullable=False, default="[]")  # JSON epoch seconds of the latest debts, for bursts
+
+
+class ScanCheckpoint(Base):
+    """High-water mark of an incremental scan: the last transaction id it has processed"""
+    __tablename__ = "scan_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
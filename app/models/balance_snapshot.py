@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from app.core.database import Base
+from app.models.types import Money
+
+
+class BalanceSnapshot(Base):
+    """Confirmed totals of a user-provider pair for all transactions with id <= last_transaction_id"""
+    __tablename__ = "balance_snapshots"
+    __table_args__ = (UniqueConstraint('user_id', 'provider_id', name='uq_balance_snapshot_pair'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_transaction_id = Column(Integer, nullable=False)
+    debt_total = Column(Money(), nullable=False, default=0)
+    payment_total = Column(Money(), nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -1,11 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.text_search import register_text_search
 
 
 class Employer(Base):
     __tablename__ = "employers"
+    # Employer names are unique per provider; services rely on it instead of checking first
+    __table_args__ = (Index('uq_employer_provider_name', 'created_by', 'name', unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -15,4 +18,8 @@ class Employer(Base):
 
     # Relationships
     provider = relationship("User", back_populates="employers")
-    work_payments = relationship("WorkPayment", back_populates="employer", cascade="all, delete-orphan")
\ No newline at end of file
+    work_payments = relationship("WorkPayment", back_populates="employer", cascade="all, delete-orphan")
+
+
+# Full-text index used by search (FTS5 on SQLite, tsvector GIN on Postgres)
+register_text_search(Employer.__table__, ["name", "contact_info"])
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a write request sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint('user_id', 'key', name='uq_idempotency_user_key'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String, nullable=False)  # Endpoint the key was first used with
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is still running
+    response_body = Column(Text, nullable=True)  # JSON
+    resource_id = Column(Integer, nullable=True)  # Row written for the request, set in the write's own transaction
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
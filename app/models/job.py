@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Index
+import enum
+from app.core.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """Background job queued for the worker processes (see app/worker.py)"""
+    __tablename__ = "jobs"
+    # Workers poll for runnable jobs in (status, run_after) order
+    __table_args__ = (Index('ix_jobs_status_run_after', 'status', 'run_after'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)  # Registered task name, e.g. "rollups.rebuild"
+    payload = Column(Text, nullable=False, default="{}")  # JSON keyword arguments for the task
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Not claimed before this (retry backoff)
+    locked_until = Column(DateTime, nullable=True)  # Visibility timeout; an expired lock means the worker died
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
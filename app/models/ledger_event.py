@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from app.core.database import Base
+
+
+class LedgerEvent(Base):
+    """Append-only change log of ledger writes; the id doubles as the SSE event id"""
+    __tablename__ = "ledger_events"
+    __table_args__ = (
+        Index('ix_ledger_events_user_id_id', 'user_id', 'id'),
+        Index('ix_ledger_events_provider_id_id', 'provider_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=True)
+    kind = Column(String, nullable=False)  # transaction.created, transaction.confirmed
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.core.database import Base
+
+
+class ResourceVersion(Base):
+    """Change counter per resource scope (e.g. "pair:4:2"), bumped in the same transaction as the write"""
+    __tablename__ = "resource_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,64 @@
+from typing import List
+from sqlalchemy import DDL, Table, event
+
+# Postgres text search configuration: no stemming or stop words, names and free-text notes are mixed-language
+TS_CONFIG = "simple"
+
+
+def search_document(columns: List[str], alias: str = "") -> str:
+    """SQL expression concatenating the searchable columns; must match the index expression exactly"""
+    prefix = f"{alias}." if alias else ""
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+
+
+def fts_table(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def sqlite_fts_ddl(table_name: str, columns: List[str]) -> List[str]:
+    """FTS5 index kept in sync with `table_name` by triggers (external content, so text is not stored twice)"""
+    fts = fts_table(table_name)
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table_name}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def postgres_search_ddl(table_name: str, columns: List[str]) -> List[str]:
+    """GIN index over the tsvector of the searchable columns (the trigram index is created by migration)"""
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search ON {table_name} "
+        f"USING gin (to_tsvector('{TS_CONFIG}', {search_document(columns)}))",
+    ]
+
+
+def register_text_search(table: Table, columns: List[str]) -> None:
+    """Create the dialect's text index whenever `table` is created through metadata.create_all"""
+    for statement in sqlite_fts_ddl(table.name, columns):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in postgres_search_ddl(table.name, columns):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+def prefix_index_ddl(dialect: str, table_name: str, column: str, where: str) -> str:
+    """
+    Partial B-tree index on (lower(column), id) for case-insensitive prefix search with keyset paging.
+    Postgres sorts it with the "C" collation so range scans follow byte order like SQLite's BINARY.
+    """
+    key = f'lower({column}) COLLATE "C"' if dialect == "postgresql" else f"lower({column})"
+    return f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{column}_prefix ON {table_name} ({key}, id) WHERE {where}"
+
+
+def register_prefix_index(table: Table, column: str, where: str) -> None:
+    for dialect in ("sqlite", "postgresql"):
+        statement = prefix_index_ddl(dialect, table.name, column, where)
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect=dialect))
@@ -1,8 +1,9 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Numeric
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 from app.core.database import Base
+from app.models.types import Money
 
 class TransactionType(str, enum.Enum):
     DEBT = "debt"
@@ -14,13 +15,15 @@ class TransactionStatus(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # Pair lookups and "rows after snapshot X" range scans
+    __table_args__ = (Index('ix_transactions_pair_id', 'user_id', 'provider_id', 'id'),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     status = Column(Enum(TransactionStatus), nullable=False, default=TransactionStatus.PENDING)
-    amount = Column(Numeric(12, 2), nullable=False)
+    amount = Column(Money(), nullable=False)
     date = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     user = relationship("User", foreign_keys=[user_id], back_populates="user_transactions")
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, UniqueConstraint
+from app.core.database import Base
+from app.models.types import Money
+
+
+class TransactionDailyRollup(Base):
+    """Confirmed debt/payment totals per user-provider pair and calendar day (UTC)"""
+    __tablename__ = "transaction_daily_rollups"
+    __table_args__ = (UniqueConstraint('user_id', 'provider_id', 'day', name='uq_rollup_pair_day'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    debt_total = Column(Money(), nullable=False, default=0)
+    payment_total = Column(Money(), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
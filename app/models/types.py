@@ -0,0 +1,56 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+from sqlalchemy import BigInteger, Integer, Numeric, inspect
+from sqlalchemy.types import TypeDecorator
+from app.core.config import settings
+
+MINOR_UNITS = "minor_units"
+
+
+class Money(TypeDecorator):
+    """
+    Monetary amount exposed to Python as Decimal with 2 places.
+    Stored as NUMERIC(12, 2), or as BIGINT minor units (cents) when MONEY_STORAGE = "minor_units";
+    integer storage makes SUM/aggregates integer arithmetic in the database.
+    """
+
+    impl = Numeric(12, 2)
+    cache_ok = True
+
+    def __init__(self, minor_units: Optional[bool] = None):
+        super().__init__()
+        self.minor_units = settings.MONEY_STORAGE == MINOR_UNITS if minor_units is None else minor_units
+
+    def load_dialect_impl(self, dialect):
+        if self.minor_units:
+            return dialect.type_descriptor(BigInteger())
+        return dialect.type_descriptor(Numeric(12, 2))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not self.minor_units:
+            return value
+        return int(Decimal(value).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        if self.minor_units:
+            return Decimal(int(value)).scaleb(-2)
+        return value
+
+
+def verify_money_storage(bind, table: str = "transactions", column: str = "amount") -> None:
+    """
+    Fail at startup when MONEY_STORAGE does not match the stored money columns: BIGINT cents read as
+    NUMERIC (or the reverse) would make every amount silently wrong by a factor of 100.
+    """
+    columns = {info["name"]: info["type"] for info in inspect(bind).get_columns(table)}
+    if column not in columns:
+        return
+    stored_minor_units = isinstance(columns[column], Integer)
+    if stored_minor_units != (settings.MONEY_STORAGE == MINOR_UNITS):
+        stored = "BIGINT minor units" if stored_minor_units else "NUMERIC"
+        raise RuntimeError(
+            f"{table}.{column} is stored as {stored} but MONEY_STORAGE is {settings.MONEY_STORAGE!r}; "
+            "set MONEY_STORAGE to match, or run migration 0001_money_minor_units to convert the columns"
+        )
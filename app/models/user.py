@@ -4,6 +4,7 @@ from sqlalchemy.orm import relationship
 import enum
 import secrets
 from app.core.database import Base
+from app.models.text_search import register_prefix_index
 
 class UserRole(str, enum.Enum):
     USER = "User"
@@ -41,3 +42,9 @@ class User(Base):
     def generate_secret_key() -> str:
         """Generate a secure random secret key for the user"""
         return secrets.token_hex(16)
+
+
+# Client search for providers: prefix lookups on name/email, restricted to role USER
+USER_SEARCH_ROLE_FILTER = "role = 'USER'"
+for _column in ("name", "email"):
+    register_prefix_index(User.__table__, _column, USER_SEARCH_ROLE_FILTER)
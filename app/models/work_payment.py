@@ -1,20 +1,31 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.text_search import register_text_search
+from app.models.types import Money
 
 
 class WorkPayment(Base):
     __tablename__ = "work_payments"
+    # Per-provider listings by date; employer_id and amount make it cover the cash-flow analytics scan.
+    # Same index as migration 0004
+    __table_args__ = (
+        Index('ix_work_payments_provider_date', 'provider_id', 'payment_date', 'employer_id', 'amount'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employer_id = Column(Integer, ForeignKey("employers.id", ondelete="CASCADE"), nullable=False)
     provider_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # Contractor who received payment
-    amount = Column(Numeric(12, 2), nullable=False)
+    amount = Column(Money(), nullable=False)
     description = Column(Text, nullable=True)  # Work description, project name, etc.
     payment_date = Column(DateTime, default=datetime.utcnow, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
     employer = relationship("Employer", back_populates="work_payments")
-    provider = relationship("User", back_populates="work_payments")
\ No newline at end of file
+    provider = relationship("User", back_populates="work_payments")
+
+
+# Full-text index used by search (FTS5 on SQLite, tsvector GIN on Postgres)
+register_text_search(WorkPayment.__table__, ["description"])
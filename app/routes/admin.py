@@ -0,0 +1,171 @@
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from app.core.admission import admission
+from app.core.database import get_db
+from app.core.jobs import enqueue_job, job_stats
+from app.core.logging_setup import logging_stats
+from app.core.slow_queries import slow_query_log
+from app.core.tracing import exporter
+from app.models.job import Job
+from app.utils.dependencies import get_current_user
+from app.models.user import User, UserRole
+from app.services.anomaly import scan_anomalies
+from app.services.idempotency import cleanup_expired_keys
+from app.services.snapshot import snapshot_balances, verify_snapshots
+from app.services import tasks  # noqa: F401  registers the job tasks
+from app.utils.response_cache import response_cache
+
+router = APIRouter()
+
+
+def require_admin(current: User = Depends(get_current_user)) -> User:
+    if current.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return current
+
+
+def queue_job_response(db: Session, name: str, payload: dict) -> JSONResponse:
+    """Queue a job for the background workers and answer 202 with its id"""
+    job = enqueue_job(db, name, payload)
+    db.commit()
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"job_id": job.id, "status": job.status.value})
+
+
+@router.post("/idempotency/cleanup")
+def cleanup_idempotency_keys(batch_size: int = 1000, background: bool = False, current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Delete expired Idempotency-Key records
+    WHO CAN USE: ADMIN only
+    - Deletes batch_size rows per committed batch
+    - background=true queues a job instead (202 with job_id; see GET /admin/jobs/{job_id})
+    """
+    if background:
+        return queue_job_response(db, "idempotency.cleanup", {"batch_size": batch_size})
+    deleted = cleanup_expired_keys(db, batch_size=batch_size)
+    return {"deleted": deleted}
+
+
+@router.get("/cache/stats")
+def response_cache_stats(current: User = Depends(require_admin)):
+    """
+    Response cache metrics (entries, bytes, hit ratio, evictions, invalidations)
+    WHO CAN USE: ADMIN only
+    """
+    return response_cache.stats()
+
+
+@router.get("/admission/stats")
+def admission_stats(current: User = Depends(require_admin)):
+    """
+    Admission control metrics per route class (in flight, peak, admitted, shed)
+    WHO CAN USE: ADMIN only
+    """
+    return admission.stats()
+
+
+@router.get("/logging/stats")
+def log_queue_stats(current: User = Depends(require_admin)):
+    """
+    Log queue metrics (records waiting to be written, records dropped because the queue was full)
+    WHO CAN USE: ADMIN only
+    """
+    return logging_stats()
+
+
+@router.get("/slow-queries")
+def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: Literal["total_ms", "max_ms", "count"] = "total_ms",
+    current: User = Depends(require_admin)
+):
+    """
+    Slowest query fingerprints since startup (statements over SLOW_QUERY_THRESHOLD_MS)
+    WHO CAN USE: ADMIN only
+    - Each entry has the normalized SQL, count, total/mean/max milliseconds, calling functions and a sampled plan
+    - Per worker process; every slow statement is also in the rotating SLOW_QUERY_LOG_FILE
+    """
+    return slow_query_log.top(limit, order_by)
+
+
+@router.get("/traces")
+def recent_traces(limit: int = Query(20, ge=1, le=200), current: User = Depends(require_admin)):
+    """
+    Most recent sampled request traces, newest first
+    WHO CAN USE: ADMIN only
+    - Each trace is an OTLP/JSON document (resourceSpans) with the request, dependency, service, SQL and serialization spans
+    - Empty unless TRACING_ENABLED; per worker process, TRACING_EXPORTER=file also appends them to TRACING_FILE
+    """
+    return exporter.recent(limit)
+
+
+@router.post("/snapshots/run")
+def run_balance_snapshots(batch_size: int = 500, background: bool = False, current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Advance per-pair balance snapshots so balance reads only sum rows after them
+    WHO CAN USE: ADMIN only
+    - Processes batch_size pairs per committed chunk
+    - background=true queues a job instead
+    """
+    if background:
+        return queue_job_response(db, "snapshots.run", {"batch_size": batch_size})
+    written = snapshot_balances(db, batch_size=batch_size)
+    return {"snapshots_written": written}
+
+
+@router.get("/snapshots/verify")
+def verify_balance_snapshots(batch_size: int = 500, current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Compare snapshot-based balances with a full recompute for every pair
+    WHO CAN USE: ADMIN only
+    - For large ledgers queue it instead: python -m app.worker --enqueue snapshots.verify
+    """
+    mismatches = verify_snapshots(db, batch_size=batch_size)
+    return {"mismatches": mismatches}
+
+
+@router.post("/anomalies/scan")
+def run_anomaly_scan(chunk_size: Optional[int] = None, background: bool = False, current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Flag unusual debts (amount far above the pair's history, or a burst of debts) added since the last scan
+    WHO CAN USE: ADMIN only
+    - Processes chunk_size debts per committed chunk, from the last scanned transaction id
+    - background=true queues a job instead
+    """
+    if background:
+        return queue_job_response(db, "anomalies.scan", {"chunk_size": chunk_size})
+    return scan_anomalies(db, chunk_size=chunk_size)
+
+
+@router.get("/jobs")
+def background_job_stats(current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Number of background jobs per status
+    WHO CAN USE: ADMIN only
+    """
+    return job_stats(db)
+
+
+@router.get("/jobs/{job_id}")
+def background_job_status(job_id: int, current: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """
+    Status, attempts and result of a background job
+    WHO CAN USE: ADMIN only
+    """
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status.value,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_after": job.run_after,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
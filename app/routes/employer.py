@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.models.user import User, UserRole, ProviderType
 from app.schemas.employer import (
     EmployerCreate, 
     EmployerRead, 
@@ -15,8 +16,12 @@ from app.services.employer import (
     get_employer,
     update_employer,
     delete_employer,
-    get_employer_payment_count
+    get_employer_payment_count,
+    search_employers
 )
+from app.services.versioning import employers_scope
+from app.utils.response_cache import cached_json_response
+from app.utils.etag import conditional_response
 
 router = APIRouter()
 
@@ -40,12 +45,23 @@ def add_employer(payload: EmployerCreate, current: User = Depends(get_current_us
 
 
 @router.get("/", response_model=List[EmployerRead])
-def get_my_employers(current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_employers(
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Get all employers for current provider
     WHO CAN USE: PAYER PROVIDER only (contractors)
     - Returns list of all employers with payment counts
+    - Returns an ETag; send it back in If-None-Match to get 304 when nothing changed
     """
+    if current.role == UserRole.PROVIDER and current.provider_type == ProviderType.PAYER:
+        not_modified = conditional_response(db, employers_scope(current.id), "employers", if_none_match, response)
+        if not_modified:
+            return not_modified
+    
     employers = get_provider_employers(db, current)
     
     # Add payment counts to each employer
@@ -59,20 +75,48 @@ def get_my_employers(current: User = Depends(get_current_user), db: Session = De
     return result
 
 
+@router.get("/search", response_model=List[EmployerRead])
+def search_my_employers(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in employer name or contact info"),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search employers by name and contact info
+    WHO CAN USE: PAYER PROVIDER only (contractors)
+    - Every word must match (as a word prefix); best matches first
+    - Paginate with limit/offset
+    """
+    employers = search_employers(db, current, q, limit, offset)
+    
+    result = []
+    for employer in employers:
+        employer_data = EmployerRead.model_validate(employer)
+        employer_data.payment_count = get_employer_payment_count(db, employer.id)
+        result.append(employer_data)
+    
+    return result
+
+
 @router.get("/{employer_id}", response_model=EmployerRead)
 def get_employer_details(employer_id: int, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """
     Get details of a specific employer
     WHO CAN USE: PAYER PROVIDER only (employers they created)
     """
-    employer = get_employer(db, current, employer_id)
-    
-    # Add payment count
-    payment_count = get_employer_payment_count(db, employer.id)
-    employer_data = EmployerRead.model_validate(employer)
-    employer_data.payment_count = payment_count
+    def build():
+        employer = get_employer(db, current, employer_id)
+        
+        # Add payment count
+        payment_count = get_employer_payment_count(db, employer.id)
+        employer_data = EmployerRead.model_validate(employer)
+        employer_data.payment_count = payment_count
+        
+        return employer_data
     
-    return employer_data
+    return cached_json_response("employers.detail", current.id, [employers_scope(current.id)], build, employer_id=employer_id)
 
 
 @router.put("/{employer_id}", response_model=EmployerRead)
@@ -0,0 +1,121 @@
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.events import broker, Subscription
+from app.utils.dependencies import get_current_user
+from app.models.user import User
+from app.services.ledger_events import LedgerCursor, ledger_topic, get_ledger_events_since, resync_cursor
+from app.services.user_provider import link_topic
+
+router = APIRouter()
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event_data: dict) -> str:
+    lines = []
+    if event_data.get("cursor") is not None:
+        lines.append(f"id: {event_data['cursor']}")
+    elif event_data.get("id") is not None:
+        lines.append(f"id: {event_data['id']}")
+    lines.append(f"event: {event_data['event']}")
+    lines.append(f"data: {json.dumps(event_data['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(request: Request, subscription: Subscription, backlog: List[dict], cursor: Optional[LedgerCursor] = None):
+    """
+    Backlog first, then live events. With a cursor every event carries the stream's resume cursor as its id
+    instead of its own id.
+    """
+    replayed = set()
+
+    def with_cursor(event_data: dict) -> dict:
+        if cursor is None or event_data.get("id") is None:
+            return event_data
+        cursor.advance(event_data["id"], event_data.get("created_at"))
+        return dict(event_data, cursor=str(cursor))
+
+    try:
+        for event_data in backlog:
+            if event_data.get("id") is not None:
+                replayed.add(event_data["id"])
+            yield format_sse(with_cursor(event_data))
+        while not await request.is_disconnected():
+            if subscription.overflowed:
+                # Client fell too far behind; it reconnects with Last-Event-ID and resumes from the log
+                yield "event: overflow\ndata: {}\n\n"
+                break
+            if subscription.dropped:
+                # Oldest events were discarded for a slow client; tell it to refetch its state once
+                yield format_sse({"event": "resync", "data": {"dropped": subscription.dropped}})
+                subscription.dropped = 0
+            event_data = await subscription.get(timeout=settings.EVENT_HEARTBEAT_SECONDS)
+            if event_data is None:
+                yield ": keepalive\n\n"
+                continue
+            # Skip events already sent from the backlog; ids are not commit ordered, so a lower id arriving
+            # live is new, not a duplicate
+            if event_data.get("id") in replayed:
+                continue
+            yield format_sse(with_cursor(event_data))
+    finally:
+        subscription.close()
+
+
+@router.get("/ledger")
+async def ledger_stream(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of ledger changes
+    WHO CAN USE: USER (their transactions with any provider), PROVIDER (transactions with any client)
+    - Emits transaction.created / transaction.confirmed with the pair's new balance
+    - Send Last-Event-ID to resume; missed events are replayed from the change log first
+    - Event ids are resume cursors, not transaction or event numbers; send the last one back unchanged
+    - When more than EVENT_REPLAY_LIMIT events were missed, a resync event (with a fresh id) replaces the
+      replay: refetch the balances and lists, then keep reading the stream
+    """
+    topic = ledger_topic(current)
+    cursor = LedgerCursor.parse(last_event_id)
+    # Subscribe before reading the backlog so nothing committed in between is lost
+    subscription = broker.subscribe([topic])
+    backlog = []
+    if cursor is not None:
+        try:
+            backlog, truncated = await run_in_threadpool(get_ledger_events_since, db, current, cursor)
+            if truncated:
+                cursor = await run_in_threadpool(resync_cursor, db, current)
+                backlog = [{"event": "resync", "data": {"reason": "replay_limit"}, "cursor": str(cursor)}]
+        except Exception:
+            subscription.close()
+            raise
+    else:
+        # A new connection starts from what is committed now, like a client that just fetched its state
+        try:
+            cursor = await run_in_threadpool(resync_cursor, db, current)
+        except Exception:
+            subscription.close()
+            raise
+    return StreamingResponse(sse_stream(request, subscription, backlog, cursor), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/links")
+async def link_stream(request: Request, current: User = Depends(get_current_user)):
+    """
+    Server-Sent Events stream of link invitation changes (replaces polling /links/invitations and /links/applications)
+    WHO CAN USE: USER (invitations they receive), PROVIDER (invitations they send)
+    - Emits link.invited, link.approved and link.rejected with both parties' names
+    - If the connection falls behind, the oldest events are dropped and a resync event asks the client to refetch once
+    """
+    topic = link_topic(current)
+    subscription = broker.subscribe([topic], drop_oldest=True)
+    return StreamingResponse(sse_stream(request, subscription, []), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
 from app.schemas.user import UserRead
+from app.schemas.transaction import DebtAgingReport
 from app.models.user import User, UserRole
 from app.services.user_provider import get_provider_clients
+from app.services.aging import get_debt_aging
+from app.services.versioning import provider_links_scope
+from app.utils.response_cache import cached_json_response
 
 router = APIRouter()
 
@@ -12,5 +18,17 @@ router = APIRouter()
 def my_clients(current: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a provider")
-    clients = get_provider_clients(db, current)
-    return [UserRead.model_validate(client) for client in clients]
+    return cached_json_response(
+        "providers.me.clients", current.id, [provider_links_scope(current.id)],
+        lambda: [UserRead.model_validate(client) for client in get_provider_clients(db, current)]
+    )
+
+@router.get("/me/aging", response_model=DebtAgingReport)
+def my_debt_aging(as_of: Optional[date] = None, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Get outstanding debt per client split into 0-30, 31-60, 61-90 and 90+ days old
+    WHO CAN USE: LENDER PROVIDER only
+    - Payments settle the oldest debts first; fully paid clients are left out
+    - as_of defaults to today
+    """
+    return DebtAgingReport.model_validate(get_debt_aging(db, current, as_of))
@@ -1,17 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from decimal import Decimal
+from datetime import date
+from typing import Literal, Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
 from app.models.user import User, UserRole
-from app.schemas.transaction import TransactionCreate, TransactionRead, DebtApprove, BalanceSummary
+from app.schemas.transaction import TransactionCreate, TransactionRead, DebtApprove, BalanceSummary, PairHistory, PairStatement, TransactionFlagRead
 from app.models.transaction import TransactionType
-from app.services.transaction import create_transaction, approve_debt, list_transactions_for_pair, compute_balance
+from app.services.transaction import create_transaction, get_provider_transaction, approve_debt, list_transactions_for_pair, compute_balance, get_pair_history, authorize_pair_access
+from app.services.versioning import pair_scope
+from app.utils.etag import conditional_response
+from app.services.rollup import rebuild_rollups
+from app.services.anomaly import list_transaction_flags
+from app.services.statement import statement_csv_chunks, statement_json_chunks
+from app.routes.admin import queue_job_response
+from app.services.idempotency import begin_request, complete_request, release_request
 
 router = APIRouter()
 
 @router.post("/", response_model=TransactionRead)
-def create(payload: TransactionCreate, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create(
+    payload: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Create a transaction
     WHO CAN USE: PROVIDER only
@@ -27,11 +43,31 @@ def create(payload: TransactionCreate, current: User = Depends(get_current_user)
     OTP Requirements:
     - DEBT transactions: Must include valid OTP in request (server OTP = '1')
     - PAYMENT transactions: No OTP required (auto-confirmed)
+
+    Retries:
+    - Send an Idempotency-Key header; repeating the same key returns the stored response without re-running the write
     """
     if current.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only providers can create transactions")
-    tx = create_transaction(db, current, payload.user_id, payload.amount, payload.type, payload.otp)
-    return TransactionRead.model_validate(tx)
+    stored = None
+    if idempotency_key:
+        stored = begin_request(db, current.id, idempotency_key, "POST /transactions/", payload.model_dump(mode="json"))
+        if stored is not None and "body" in stored:
+            return JSONResponse(status_code=stored["status_code"], content=stored["body"])
+    if stored is not None:
+        # Written by an earlier attempt that never stored its response
+        tx = get_provider_transaction(db, current, stored["resource_id"])
+    else:
+        try:
+            tx = create_transaction(db, current, payload.user_id, payload.amount, payload.type, payload.otp, idempotency_key)
+        except Exception:
+            if idempotency_key:
+                release_request(db, current.id, idempotency_key)
+            raise
+    response = TransactionRead.model_validate(tx)
+    if idempotency_key:
+        complete_request(db, current.id, idempotency_key, response.model_dump(mode="json"))
+    return response
 
 @router.post("/approve", response_model=TransactionRead)
 def approve(payload: DebtApprove, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -45,19 +81,117 @@ def approve(payload: DebtApprove, current: User = Depends(get_current_user), db:
     return TransactionRead.model_validate(tx)
 
 @router.get("/pair/{user_id}/{provider_id}", response_model=list[TransactionRead])
-def list_pair(user_id: int, provider_id: int, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def list_pair(
+    user_id: int,
+    provider_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     List all transactions between a user and provider
     WHO CAN USE: USER (for their own transactions), PROVIDER (for their transactions), ADMIN (all)
+    - Returns an ETag; send it back in If-None-Match to get 304 when nothing changed
     """
-    txs = list_transactions_for_pair(db, current, user_id, provider_id)
+    authorize_pair_access(db, current, user_id, provider_id)
+    not_modified = conditional_response(db, pair_scope(user_id, provider_id), "pair", if_none_match, response)
+    if not_modified:
+        return not_modified
+    txs = list_transactions_for_pair(db, current, user_id, provider_id, authorized=True)
     return [TransactionRead.model_validate(tx) for tx in txs]
 
 @router.get("/balance/{user_id}/{provider_id}", response_model=BalanceSummary)
-def balance(user_id: int, provider_id: int, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def balance(
+    user_id: int,
+    provider_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Get balance summary between a user and provider
     WHO CAN USE: USER (for their own balance), PROVIDER (for their balances), ADMIN (all)
+    - Returns an ETag; send it back in If-None-Match to get 304 when nothing changed
     """
-    summary = compute_balance(db, current, user_id, provider_id)
+    authorize_pair_access(db, current, user_id, provider_id)
+    not_modified = conditional_response(db, pair_scope(user_id, provider_id), "balance", if_none_match, response)
+    if not_modified:
+        return not_modified
+    summary = compute_balance(db, current, user_id, provider_id, authorized=True)
     return BalanceSummary.model_validate(summary)
+
+@router.get("/history/{user_id}/{provider_id}", response_model=PairHistory)
+def history(
+    user_id: int,
+    provider_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get daily debt/payment totals with cumulative balance between a user and provider
+    WHO CAN USE: USER (for their own history), PROVIDER (for their clients), ADMIN (all)
+    - Optional start/end dates (inclusive) limit the range; opening_balance carries everything before start
+    """
+    summary = get_pair_history(db, current, user_id, provider_id, start, end)
+    return PairHistory.model_validate(summary)
+
+@router.get("/statement/{user_id}/{provider_id}", responses={200: {"model": PairStatement}})
+def statement(
+    user_id: int,
+    provider_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: Literal["json", "csv"] = "json",
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a statement: every confirmed transaction in date order with the balance after it
+    WHO CAN USE: USER (for their own statement), PROVIDER (for their clients), ADMIN (all)
+    - Optional start/end dates (inclusive); opening_balance carries everything before start
+    - Streamed as it is read, so long histories are not built in memory; format=csv for printing
+    """
+    authorize_pair_access(db, current, user_id, provider_id)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if format == "csv":
+        return StreamingResponse(
+            statement_csv_chunks(user_id, provider_id, start, end),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="statement-{user_id}-{provider_id}.csv"'}
+        )
+    return StreamingResponse(statement_json_chunks(user_id, provider_id, start, end), media_type="application/json")
+
+@router.get("/flags", response_model=list[TransactionFlagRead])
+def flags(
+    limit: int = Query(50, ge=1, le=settings.ANOMALY_FLAGS_MAX_LIMIT),
+    before_id: Optional[int] = None,
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List debts the anomaly scan flagged for the current provider, newest first
+    WHO CAN USE: PROVIDER only
+    - reason is amount_zscore (far above the client's usual debt) or debt_burst (many debts in a short window)
+    - Paginate with before_id = id of the last flag on the previous page
+    """
+    return list_transaction_flags(db, current, limit, before_id)
+
+@router.post("/rollups/rebuild")
+def rebuild_history_rollups(batch_size: int = 500, background: bool = False, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Rebuild the daily rollups from the transaction ledger
+    WHO CAN USE: ADMIN only
+    - Processes batch_size user-provider pairs per committed chunk
+    - background=true queues a job instead (202 with job_id; see GET /admin/jobs/{job_id})
+    """
+    if current.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admin can rebuild rollups")
+    if background:
+        return queue_job_response(db, "rollups.rebuild", {"batch_size": batch_size})
+    pairs = rebuild_rollups(db, batch_size=batch_size)
+    return {"pairs_processed": pairs}
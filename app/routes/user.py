@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
-from app.schemas.user import UserRead, ProviderTypeUpdate, UserPublicInfo
-from app.models.user import User, UserRole
+from app.schemas.user import UserRead, ProviderTypeUpdate, UserPublicInfo, UserSearchPage
+from app.models.user import User
 from app.services.user_provider import get_client_providers
-from app.services.user import get_user_public_info
+from app.services.user import get_user_public_info, get_users_public_info, search_users, update_provider_type
+from app.services.versioning import user_links_scope
+from app.utils.response_cache import cached_json_response
+from app.utils.rate_limit import RateLimiter
 
 router = APIRouter()
 
+user_search_limiter = RateLimiter(settings.USER_SEARCH_RATE_LIMIT, settings.USER_SEARCH_RATE_WINDOW_SECONDS)
+
 @router.get("/me", response_model=UserRead)
 def read_me(current: User = Depends(get_current_user)):
     """
@@ -23,11 +30,13 @@ def my_providers(current: User = Depends(get_current_user), db: Session = Depend
     Get all linked providers for current user
     WHO CAN USE: CLIENT/USER only
     """
-    providers = get_client_providers(db, current)
-    return [UserRead.model_validate(provider) for provider in providers]
+    return cached_json_response(
+        "users.me.providers", current.id, [user_links_scope(current.id)],
+        lambda: [UserRead.model_validate(provider) for provider in get_client_providers(db, current)]
+    )
 
 @router.put("/me/provider-type", response_model=UserRead)
-def update_provider_type(
+def update_provider_type_endpoint(
     payload: ProviderTypeUpdate, 
     current: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
@@ -38,17 +47,47 @@ def update_provider_type(
     - LENDER: Can add debts and payments (shopkeeper/market owner)
     - PAYER: Can only add payments (contractor)
     """
-    if current.role != UserRole.PROVIDER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Only providers can set provider type"
-        )
-    
-    current.provider_type = payload.provider_type
-    db.commit()
-    db.refresh(current)
+    provider = update_provider_type(db, current, payload.provider_type)
+    return UserRead.model_validate(provider)
+
+
+@router.get("/public", response_model=list[UserPublicInfo])
+def get_users_public_info_endpoint(ids: str = Query(..., description="Comma-separated user ids, e.g. 1,2,3"), db: Session = Depends(get_db)):
+    """
+    Get public user information (id, name, email) for several users at once
+    WHO CAN USE: Anyone (no authentication required)
     
-    return UserRead.model_validate(current)
+    Resolves all ids in one request instead of one /users/{user_id}/public call per candidate.
+    Unknown ids are left out of the result.
+    """
+    try:
+        user_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma-separated integers")
+    users = get_users_public_info(db, user_ids)
+    return [UserPublicInfo.model_validate(user) for user in users]
+
+
+@router.get("/search", response_model=UserSearchPage)
+def search_users_endpoint(
+    q: str = Query(..., max_length=100, description="Start of the user's name or email"),
+    field: Optional[Literal["name", "email"]] = Query(None, description="Defaults to email when q contains @, otherwise name"),
+    limit: int = Query(20, ge=1, le=settings.USER_SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search client accounts (role USER) by name or email prefix
+    WHO CAN USE: PROVIDER only
+    - Use it to find a client's id before POST /links/link
+    - Returns next_cursor while more results exist; send it back as `cursor`
+    - Rate limited per provider (429 with Retry-After)
+    """
+    user_search_limiter.check(current.id)
+    if field is None:
+        field = "email" if "@" in q else "name"
+    return search_users(db, current, q, field, limit, cursor)
 
 
 @router.get("/{user_id}/public", response_model=UserPublicInfo)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
 from app.models.user import User, UserRole
@@ -22,6 +22,9 @@ from app.services.user_provider import (
     get_client_providers
 )
 from app.services.user import get_user
+from app.services.versioning import provider_links_scope, user_links_scope
+from app.utils.response_cache import cached_json_response
+from app.utils.etag import conditional_response
 
 router = APIRouter()
 
@@ -48,15 +51,6 @@ def link(payload: UserProviderLinkCreate, current: User = Depends(get_current_us
     if client.role == UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provider cannot link with another provider")
     
-    # Check if the link already exists
-    existing_link = db.query(UserProvider).filter(
-        UserProvider.provider_id == current.id,
-        UserProvider.user_id == payload.user_id
-    ).first()
-    
-    if existing_link:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provider is already linked with this user")
-    
     link_obj = link_user_provider(db, current, client)
     return UserProviderLinkRead.model_validate(link_obj)
 
@@ -126,36 +120,49 @@ def get_my_providers(current: User = Depends(get_current_user), db: Session = De
     WHO CAN USE: CLIENT/USER only
     - Users can see all providers they are linked with (approved links only)
     """
-    # Get all approved provider links for the current user
-    provider_links = db.query(UserProvider).filter(
-        UserProvider.user_id == current.id,
-        UserProvider.status == LinkStatus.APPROVED
-    ).all()
+    def build():
+        # Get all approved provider links for the current user
+        provider_links = db.query(UserProvider).filter(
+            UserProvider.user_id == current.id,
+            UserProvider.status == LinkStatus.APPROVED
+        ).all()
+        
+        return [
+            LinkedProviderRead(
+                id=link.id,
+                provider_id=link.provider_id,
+                provider_name=link.provider.name,
+                provider_email=link.provider.email,
+                status=link.status,
+                created_at=link.created_at
+            )
+            for link in provider_links
+        ]
     
-    return [
-        LinkedProviderRead(
-            id=link.id,
-            provider_id=link.provider_id,
-            provider_name=link.provider.name,
-            provider_email=link.provider.email,
-            status=link.status,
-            created_at=link.created_at
-        )
-        for link in provider_links
-    ]
+    return cached_json_response("links.my-providers", current.id, [user_links_scope(current.id)], build)
 
 
 @router.get("/my-clients", response_model=List[LinkedClientRead])
-def get_my_clients(current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_clients(
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Get all linked clients for the current provider
     WHO CAN USE: PROVIDER only
     - Providers can see all clients they are linked with (approved links only)
+    - Returns an ETag; send it back in If-None-Match to get 304 when nothing changed
     """
     # Check if current user is a provider
     if current.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only providers can access client list")
     
+    not_modified = conditional_response(db, provider_links_scope(current.id), "my-clients", if_none_match, response)
+    if not_modified:
+        return not_modified
+    
     # Get all approved client links for the current provider
     client_links = db.query(UserProvider).filter(
         UserProvider.provider_id == current.id,
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.models.user import User, UserRole, ProviderType
 from app.schemas.employer import (
     WorkPaymentCreate, 
     WorkPaymentRead, 
-    WorkPaymentSummary
+    WorkPaymentSummary,
+    WorkPaymentAnalytics
 )
 from app.services.work_payment import (
     create_work_payment,
@@ -16,33 +19,56 @@ from app.services.work_payment import (
     get_work_payment,
     update_work_payment,
     delete_work_payment,
-    get_work_payment_summary
+    get_work_payment_summary,
+    search_work_payments
 )
+from app.services.analytics import get_cash_flow_analytics
+from app.services.idempotency import begin_request, complete_request, release_request
+from app.services.versioning import work_payments_scope
+from app.utils.etag import conditional_response
 
 router = APIRouter()
 
 
 @router.post("/", response_model=WorkPaymentRead)
-def add_work_payment(payload: WorkPaymentCreate, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def add_work_payment(
+    payload: WorkPaymentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Record a new work payment received from an employer
     WHO CAN USE: PAYER PROVIDER only (contractors)
     - Contractors record payments they received for work done
+    - Send an Idempotency-Key header to make retries safe; a repeated key returns the stored response
     """
-    work_payment = create_work_payment(
-        db, 
-        current, 
-        payload.employer_id, 
-        payload.amount, 
-        payload.description,
-        payload.payment_date
-    )
-    
-    # Ensure employer relationship is loaded
-    db.refresh(work_payment)
+    stored = None
+    if idempotency_key:
+        stored = begin_request(db, current.id, idempotency_key, "POST /work-payments/", payload.model_dump(mode="json"))
+        if stored is not None and "body" in stored:
+            return JSONResponse(status_code=stored["status_code"], content=stored["body"])
+    if stored is not None:
+        # Written by an earlier attempt that never stored its response
+        work_payment = get_work_payment(db, current, stored["resource_id"])
+    else:
+        try:
+            work_payment = create_work_payment(
+                db, 
+                current, 
+                payload.employer_id, 
+                payload.amount, 
+                payload.description,
+                payload.payment_date,
+                idempotency_key
+            )
+        except Exception:
+            if idempotency_key:
+                release_request(db, current.id, idempotency_key)
+            raise
     
     # Create response with all required fields
-    return WorkPaymentRead(
+    response = WorkPaymentRead(
         id=work_payment.id,
         employer_id=work_payment.employer_id,
         provider_id=work_payment.provider_id,
@@ -52,15 +78,29 @@ def add_work_payment(payload: WorkPaymentCreate, current: User = Depends(get_cur
         employer_name=work_payment.employer.name,
         created_at=work_payment.created_at
     )
+    if idempotency_key:
+        complete_request(db, current.id, idempotency_key, response.model_dump(mode="json"))
+    return response
 
 
 @router.get("/", response_model=List[WorkPaymentRead])
-def get_my_work_payments(current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_work_payments(
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Get all work payments for current provider
     WHO CAN USE: PAYER PROVIDER only (contractors)
     - Returns all work payments received from all employers
+    - Returns an ETag; send it back in If-None-Match to get 304 when nothing changed
     """
+    if current.role == UserRole.PROVIDER and current.provider_type == ProviderType.PAYER:
+        not_modified = conditional_response(db, work_payments_scope(current.id), "work-payments", if_none_match, response)
+        if not_modified:
+            return not_modified
+    
     work_payments = get_provider_work_payments(db, current)
     
     # Create response with employer names
@@ -111,6 +151,37 @@ def get_payments_from_employer(
     return result
 
 
+@router.get("/search", response_model=List[WorkPaymentRead])
+def search_my_work_payments(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in payment descriptions"),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search work payments by description
+    WHO CAN USE: PAYER PROVIDER only (contractors)
+    - Every word must match (as a word prefix); best matches first
+    - Paginate with limit/offset
+    """
+    work_payments = search_work_payments(db, current, q, limit, offset)
+    
+    return [
+        WorkPaymentRead(
+            id=payment.id,
+            employer_id=payment.employer_id,
+            provider_id=payment.provider_id,
+            amount=payment.amount,
+            description=payment.description,
+            payment_date=payment.payment_date,
+            employer_name=payment.employer.name,
+            created_at=payment.created_at
+        )
+        for payment in work_payments
+    ]
+
+
 @router.get("/summary", response_model=WorkPaymentSummary)
 def get_payment_summary(current: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """
@@ -122,6 +193,23 @@ def get_payment_summary(current: User = Depends(get_current_user), db: Session =
     return WorkPaymentSummary.model_validate(summary)
 
 
+@router.get("/analytics", response_model=WorkPaymentAnalytics)
+def get_payment_analytics(
+    months: int = Query(12, ge=1, le=settings.ANALYTICS_MAX_MONTHS),
+    horizon: int = Query(3, ge=1, le=24),
+    current: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get cash-flow analytics over work payments
+    WHO CAN USE: PAYER PROVIDER only (contractors)
+    - Monthly totals for the last `months` months with 3 and 6 month moving averages
+    - Per-employer monthly totals, distribution of days between payments
+    - Linear income forecast for the next `horizon` months
+    """
+    return WorkPaymentAnalytics.model_validate(get_cash_flow_analytics(db, current, months, horizon))
+
+
 @router.get("/{payment_id}", response_model=WorkPaymentRead)
 def get_work_payment_details(
     payment_id: int, 
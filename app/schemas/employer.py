@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -55,4 +55,51 @@ class WorkPaymentSummary(BaseModel):
     total_payments: int
     total_amount: Decimal
     employers_count: int
-    last_payment_date: Optional[datetime] = None
\ No newline at end of file
+    last_payment_date: Optional[datetime] = None
+
+
+class MonthlyCashFlow(BaseModel):
+    month: str  # YYYY-MM
+    total: Decimal
+    moving_avg_3: Optional[Decimal] = None  # None until enough months are in the window
+    moving_avg_6: Optional[Decimal] = None
+
+
+class EmployerMonthlyTotal(BaseModel):
+    employer_id: int
+    employer_name: str
+    month: str
+    total: Decimal
+
+
+class IntervalBucket(BaseModel):
+    max_days: Optional[int] = None  # None for the open-ended last bucket
+    count: int
+
+
+class PaymentIntervals(BaseModel):
+    """Days between consecutive payments"""
+    count: int
+    mean_days: float
+    p10_days: float
+    p25_days: float
+    median_days: float
+    p75_days: float
+    p90_days: float
+    histogram: List[IntervalBucket]
+
+
+class ForecastPoint(BaseModel):
+    month: str
+    total: Decimal
+
+
+class WorkPaymentAnalytics(BaseModel):
+    """Cash-flow analytics for a PAYER provider"""
+    provider_id: int
+    payment_count: int
+    total_amount: Decimal
+    monthly: List[MonthlyCashFlow]
+    employer_monthly: List[EmployerMonthlyTotal]
+    intervals: Optional[PaymentIntervals] = None
+    forecast: List[ForecastPoint]
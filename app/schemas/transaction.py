@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from app.models.transaction import TransactionType, TransactionStatus
 
 class TransactionBase(BaseModel):
@@ -35,3 +35,58 @@ class BalanceSummary(BaseModel):
     total_debt: Decimal
     total_payments: Decimal
     balance: Decimal
+
+class DailyBalancePoint(BaseModel):
+    day: date
+    debt: Decimal
+    payments: Decimal
+    transaction_count: int
+    balance: Decimal  # Cumulative balance at the end of the day
+
+class PairHistory(BaseModel):
+    user_id: int
+    provider_id: int
+    opening_balance: Decimal  # Balance carried from before the requested range
+    points: List[DailyBalancePoint]
+
+class StatementEntry(BaseModel):
+    id: int
+    date: datetime
+    type: TransactionType
+    amount: Decimal
+    balance: Decimal  # Balance after this transaction
+
+class PairStatement(BaseModel):
+    user_id: int
+    provider_id: int
+    start: Optional[date] = None
+    end: Optional[date] = None
+    opening_balance: Decimal  # Balance carried from before start
+    entries: List[StatementEntry]
+    closing_balance: Decimal
+
+class AgingBuckets(BaseModel):
+    outstanding: Decimal  # Unpaid debt after allocating payments to the oldest debts first
+    days_0_30: Decimal
+    days_31_60: Decimal
+    days_61_90: Decimal
+    days_over_90: Decimal
+
+class ClientAging(AgingBuckets):
+    user_id: int
+    name: str
+
+class DebtAgingReport(BaseModel):
+    provider_id: int
+    as_of: date
+    clients: List[ClientAging]
+    totals: AgingBuckets
+
+class TransactionFlagRead(BaseModel):
+    id: int
+    transaction_id: int
+    user_id: int
+    reason: str  # amount_zscore or debt_burst
+    score: float  # z-score, or debts of the pair inside the burst window
+    detail: Optional[dict] = None
+    created_at: datetime
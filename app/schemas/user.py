@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from app.models.user import UserRole, ProviderType
 
@@ -47,3 +47,8 @@ class UserPublicInfo(BaseModel):
 
     class Config:
         from_attributes = True
+
+class UserSearchPage(BaseModel):
+    """A page of user search results; pass next_cursor back as `cursor` for the next page"""
+    items: List[UserPublicInfo]
+    next_cursor: Optional[str] = None
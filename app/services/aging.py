@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, select, type_coerce
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.models.types import Money
+from app.models.user import User, UserRole, ProviderType
+from app.services.versioning import get_version, provider_ledger_scope
+from app.utils.cache import TTLCache
+
+BUCKETS = ["days_0_30", "days_31_60", "days_61_90", "days_over_90"]
+
+# (provider_id, ledger version, as_of) -> report; a write bumps the version so stale entries are never read
+_reports = TTLCache(max_entries=settings.AGING_CACHE_SIZE)
+
+
+def aging_query(provider_id: int, as_of: date):
+    """
+    Outstanding debt per client split by age, in one query.
+    Payments are allocated to debts oldest first (FIFO): with D the running total of debts up to and including
+    a debt and P all payments of the client up to as_of, the unpaid part of that debt is clamp(D - P, 0, amount).
+    """
+    # Day boundaries computed here so the SQL is plain date comparisons on every dialect
+    day_start = datetime.combine(as_of, datetime.min.time())
+    # Only what was recorded up to the end of as_of: later debts and payments are not part of that day's report
+    confirmed = [
+        Transaction.provider_id == provider_id,
+        Transaction.status == TransactionStatus.CONFIRMED,
+        Transaction.date < day_start + timedelta(days=1)
+    ]
+
+    paid = select(
+        Transaction.user_id,
+        func.sum(Transaction.amount).label("paid")
+    ).where(*confirmed, Transaction.type == TransactionType.PAYMENT).group_by(Transaction.user_id).subquery("paid")
+
+    debts = select(
+        Transaction.user_id,
+        Transaction.date,
+        Transaction.amount,
+        func.sum(Transaction.amount).over(
+            partition_by=Transaction.user_id, order_by=(Transaction.date, Transaction.id)
+        ).label("debt_to_date")
+    ).where(*confirmed, Transaction.type == TransactionType.DEBT).subquery("debts")
+
+    uncovered = debts.c.debt_to_date - func.coalesce(paid.c.paid, 0)
+    remaining = case(
+        (uncovered <= 0, 0),
+        (uncovered >= debts.c.amount, debts.c.amount),
+        else_=uncovered
+    )
+
+    bounds = [day_start - timedelta(days=days) for days in (30, 60, 90)]
+    bucket_of = [
+        debts.c.date >= bounds[0],
+        (debts.c.date >= bounds[1]) & (debts.c.date < bounds[0]),
+        (debts.c.date >= bounds[2]) & (debts.c.date < bounds[1]),
+        debts.c.date < bounds[2],
+    ]
+    columns = [
+        type_coerce(func.sum(case((condition, remaining), else_=0)), Money()).label(name)
+        for name, condition in zip(BUCKETS, bucket_of)
+    ]
+
+    return select(
+        debts.c.user_id,
+        User.name,
+        type_coerce(func.sum(remaining), Money()).label("outstanding"),
+        *columns
+    ).select_from(
+        debts.outerjoin(paid, paid.c.user_id == debts.c.user_id).join(User, User.id == debts.c.user_id)
+    ).group_by(debts.c.user_id, User.name).order_by(debts.c.user_id)
+
+
+def _build_report(db: Session, provider_id: int, as_of: date) -> dict:
+    clients = []
+    totals = {name: Decimal("0") for name in ["outstanding"] + BUCKETS}
+    for row in db.execute(aging_query(provider_id, as_of)):
+        if not row.outstanding:
+            continue  # Fully paid
+        client = {"user_id": row.user_id, "name": row.name}
+        for name in totals:
+            value = Decimal(getattr(row, name) or 0)
+            client[name] = value
+            totals[name] += value
+        clients.append(client)
+    return {"provider_id": provider_id, "as_of": as_of, "clients": clients, "totals": totals}
+
+
+def get_debt_aging(db: Session, provider: User, as_of: Optional[date] = None) -> dict:
+    """Debt aging for all clients of a LENDER provider, memoized until the provider's next ledger write"""
+    if provider.role != UserRole.PROVIDER or provider.provider_type != ProviderType.LENDER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only LENDER providers have debt aging"
+        )
+    as_of = as_of or datetime.utcnow().date()  # Transaction dates are stored in UTC
+    key = (provider.id, get_version(db, provider_ledger_scope(provider.id)), as_of)
+    report = _reports.get(key)
+    if report is None:
+        report = _build_report(db, provider.id, as_of)
+        _reports.set(key, report)
+    return report
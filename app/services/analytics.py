@@ -0,0 +1,174 @@
+from datetime import date, datetime
+from itertools import chain
+from decimal import Decimal
+from typing import Dict, Optional
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, Integer, cast, func, select, type_coerce
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.employer import Employer
+from app.models.user import User, UserRole, ProviderType
+from app.models.work_payment import WorkPayment
+from app.services.versioning import get_version, work_payments_scope
+from app.utils.cache import TTLCache
+
+# (provider_id, work payments version, today, months, horizon) -> analytics; a write bumps the version
+_analytics = TTLCache(max_entries=settings.ANALYTICS_CACHE_SIZE)
+
+# Upper bounds (days) of the payment-interval histogram buckets; the last bucket is open-ended
+INTERVAL_BUCKETS = [7, 14, 30, 60]
+
+
+def _cents(values) -> list:
+    return [Decimal(int(value)).scaleb(-2) for value in values]
+
+
+def _round_cents(values) -> list:
+    return _cents(np.rint(values))
+
+
+def epoch_seconds(db: Session, column):
+    """SQL expression for a DateTime column as integer epoch seconds"""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.extract("epoch", column), BigInteger)
+    return cast(func.strftime("%s", column), Integer)
+
+
+def money_cents(column):
+    """SQL expression for a Money column as integer cents, whichever way it is stored"""
+    if column.type.minor_units:
+        return type_coerce(column, BigInteger)
+    return cast(func.round(column * 100), BigInteger)
+
+
+def load_payment_columns(db: Session, provider_id: int) -> Dict[str, np.ndarray]:
+    """
+    A provider's payments as columnar arrays: employer ids, payment dates (epoch seconds) and amounts (cents),
+    sorted by date. The conversion to integers happens in SQL so no Decimal/datetime objects are built per row.
+    """
+    statement = select(
+        WorkPayment.employer_id,
+        epoch_seconds(db, WorkPayment.payment_date),
+        money_cents(WorkPayment.amount)
+    ).where(WorkPayment.provider_id == provider_id)
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    # Executed through the connection so engine events (slow-query log, tracing) see it, then read straight
+    # from the DBAPI cursor into one flat int64 array: building a Row per payment costs more than the whole
+    # computation at a million rows
+    result = db.connection().exec_driver_sql(str(compiled), params)
+    try:
+        table = np.fromiter(chain.from_iterable(result.cursor), dtype=np.int64).reshape(-1, 3)
+    finally:
+        result.close()
+    # Sorting here is cheaper than ORDER BY and keeps the query a plain index range scan
+    table = table[np.argsort(table[:, 1], kind="stable")]
+    return {"employer_id": table[:, 0], "seconds": table[:, 1], "cents": table[:, 2]}
+
+
+def compute_cash_flow(columns: Dict[str, np.ndarray], employer_names: Dict[int, str], today: date, months: int = 12, horizon: int = 3) -> dict:
+    """Monthly totals with moving averages, per-employer monthly totals, payment intervals and a linear forecast"""
+    employer_ids = columns["employer_id"]
+    seconds = columns["seconds"]
+    cents = columns["cents"]
+
+    # Month index of every payment relative to the first month of the report window
+    last_month = np.datetime64(today, "M")
+    first_month = last_month - (months - 1)
+    payment_months = seconds.astype("datetime64[s]").astype("datetime64[M]")
+    offsets = (payment_months - first_month).astype(np.int64)
+    in_window = (offsets >= 0) & (offsets < months)
+
+    monthly = np.bincount(offsets[in_window], weights=cents[in_window], minlength=months)
+    month_labels = [str(first_month + i) for i in range(months)]
+
+    def moving_average(window: int) -> list:
+        if months < window:
+            return [None] * months
+        averages = np.convolve(monthly, np.ones(window) / window, mode="valid")
+        return [None] * (window - 1) + _round_cents(averages)
+
+    ma3 = moving_average(3)
+    ma6 = moving_average(6)
+
+    # Per-employer monthly totals: group on a combined (employer, month) key
+    employer_monthly = []
+    if in_window.any():
+        keys = employer_ids[in_window] * months + offsets[in_window]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=cents[in_window])
+        for key, total in zip(unique_keys.tolist(), _round_cents(totals)):
+            employer_id, offset = divmod(key, months)
+            employer_monthly.append({
+                "employer_id": employer_id,
+                "employer_name": employer_names.get(employer_id, ""),
+                "month": month_labels[offset],
+                "total": total
+            })
+
+    # Days between consecutive payments (all history)
+    intervals = np.diff(seconds) / 86400.0
+    if intervals.size:
+        percentiles = np.percentile(intervals, [10, 25, 50, 75, 90])
+        edges = np.array(INTERVAL_BUCKETS, dtype=float)
+        counts = np.bincount(np.searchsorted(edges, intervals, side="left"), minlength=len(edges) + 1)
+        interval_stats = {
+            "count": int(intervals.size),
+            "mean_days": round(float(intervals.mean()), 2),
+            "p10_days": round(float(percentiles[0]), 2),
+            "p25_days": round(float(percentiles[1]), 2),
+            "median_days": round(float(percentiles[2]), 2),
+            "p75_days": round(float(percentiles[3]), 2),
+            "p90_days": round(float(percentiles[4]), 2),
+            "histogram": [
+                {"max_days": edge, "count": int(count)}
+                for edge, count in zip(INTERVAL_BUCKETS + [None], counts.tolist())
+            ]
+        }
+    else:
+        interval_stats = None
+
+    # Least-squares trend over the window, projected `horizon` months ahead (never below zero)
+    forecast = []
+    if months >= 2 and monthly.any():
+        slope, intercept = np.polyfit(np.arange(months), monthly, 1)
+        projected = np.clip(intercept + slope * np.arange(months, months + horizon), 0, None)
+        forecast = [
+            {"month": str(last_month + i + 1), "total": total}
+            for i, total in enumerate(_round_cents(projected))
+        ]
+
+    return {
+        "payment_count": int(cents.size),
+        "total_amount": _cents([cents.sum()])[0],
+        "monthly": [
+            {"month": label, "total": total, "moving_avg_3": avg3, "moving_avg_6": avg6}
+            for label, total, avg3, avg6 in zip(month_labels, _round_cents(monthly), ma3, ma6)
+        ],
+        "employer_monthly": employer_monthly,
+        "intervals": interval_stats,
+        "forecast": forecast
+    }
+
+
+def get_cash_flow_analytics(db: Session, provider: User, months: int = 12, horizon: int = 3, today: Optional[date] = None) -> dict:
+    """Cash-flow analytics for a PAYER provider, cached until its next work payment write"""
+    if provider.role != UserRole.PROVIDER or provider.provider_type != ProviderType.PAYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only PAYER providers can access work payment analytics"
+        )
+    today = today or datetime.utcnow().date()  # Payment dates are stored in UTC
+    key = (provider.id, get_version(db, work_payments_scope(provider.id)), today, months, horizon)
+    result = _analytics.get(key)
+    if result is None:
+        columns = load_payment_columns(db, provider.id)
+        employer_names = dict(db.query(Employer.id, Employer.name).filter(Employer.created_by == provider.id).all())
+        result = compute_cash_flow(columns, employer_names, today, months, horizon)
+        result["provider_id"] = provider.id
+        _analytics.set(key, result)
+    return result
@@ -0,0 +1,230 @@
+import calendar
+import json
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.anomaly import TransactionFlag, PairDebtStats, ScanCheckpoint
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User, UserRole
+from app.services.analytics import epoch_seconds, money_cents
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = "anomalies"
+AMOUNT_ZSCORE = "amount_zscore"
+DEBT_BURST = "debt_burst"
+
+
+def _money(cents: float) -> str:
+    return str(Decimal(int(round(cents))).scaleb(-2))
+
+
+def _load_chunk(db: Session, after_id: int, limit: int, cutoff_seconds: int) -> dict:
+    """The next debts after `after_id` as columnar arrays, cut before the first row newer than the cutoff"""
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.user_id,
+            Transaction.provider_id,
+            epoch_seconds(db, Transaction.date),
+            money_cents(Transaction.amount)
+        ).where(
+            Transaction.id > after_id,
+            Transaction.type == TransactionType.DEBT
+        ).order_by(Transaction.id).limit(limit)
+    ).all()
+    table = np.array(rows, dtype=np.int64).reshape(-1, 5)
+    too_new = np.flatnonzero(table[:, 3] >= cutoff_seconds)
+    complete = too_new.size == 0 and len(rows) == limit
+    if too_new.size:
+        table = table[:too_new[0]]
+    return {
+        "id": table[:, 0],
+        "user_id": table[:, 1],
+        "provider_id": table[:, 2],
+        "seconds": table[:, 3],
+        "cents": table[:, 4].astype(np.float64),
+        "more": complete
+    }
+
+
+def score_chunk(chunk: dict, prior: dict, zscore_threshold: float, min_history: int, burst_count: int, burst_window: int):
+    """
+    Score a chunk of debts (in id order) against each pair's history.
+
+    `prior` maps (user_id, provider_id) -> (count, sum, sum of squares, recent debt times) from earlier scans.
+    Every debt is compared with the pair's debts before it: the prior stats plus the earlier debts of the
+    same chunk (an exclusive cumulative sum per pair). Returns (flags, updated stats per pair).
+    """
+    pairs, pair_index = np.unique(
+        np.stack([chunk["user_id"], chunk["provider_id"]], axis=1), axis=0, return_inverse=True
+    )
+    pair_index = pair_index.reshape(-1)
+    keys = [tuple(pair) for pair in pairs.tolist()]
+    empty = (0, 0.0, 0.0, [])
+    prior_count = np.array([prior.get(key, empty)[0] for key in keys], dtype=np.float64)
+    prior_sum = np.array([prior.get(key, empty)[1] for key in keys], dtype=np.float64)
+    prior_squares = np.array([prior.get(key, empty)[2] for key in keys], dtype=np.float64)
+
+    # Group the chunk by pair, keeping id order inside each group
+    order = np.argsort(pair_index, kind="stable")
+    group = pair_index[order]
+    cents = chunk["cents"][order]
+    seconds = chunk["seconds"][order]
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, group.size]))
+
+    def exclusive_cumsum(values):
+        before = np.cumsum(values) - values
+        return before - before[group_start]
+
+    count = prior_count[group] + (np.arange(group.size) - group_start)
+    total = prior_sum[group] + exclusive_cumsum(cents)
+    squares = prior_squares[group] + exclusive_cumsum(cents * cents)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, total / count, 0.0)
+        variance = np.clip(np.where(count > 0, squares / count, 0.0) - mean * mean, 0, None)
+    # A floor on the deviation so a pair with identical past amounts does not flag every small change
+    deviation = np.maximum(np.sqrt(variance), np.maximum(0.05 * np.abs(mean), 1.0))
+    zscores = (cents - mean) / deviation
+    unusual_amount = (count >= min_history) & (zscores >= zscore_threshold)
+
+    # Bursts: debts of the pair in (t - window, t], counting the recent times kept from earlier scans.
+    # One sorted array of (pair, time) keys answers every window with two binary searches.
+    recent = [(index, t) for index, key in enumerate(keys) for t in prior.get(key, empty)[3]]
+    all_groups = np.concatenate([np.array([index for index, _ in recent], dtype=np.int64), group])
+    all_seconds = np.concatenate([np.array([t for _, t in recent], dtype=np.int64), seconds])
+    all_keys = np.sort((all_groups << 32) + all_seconds)
+    own_keys = (group << 32) + seconds
+    in_window = np.searchsorted(all_keys, own_keys, side="right") - np.searchsorted(all_keys, own_keys - burst_window, side="right")
+    burst = in_window >= burst_count
+
+    flags = []
+    ids = chunk["id"][order]
+    for position in np.flatnonzero(unusual_amount | burst).tolist():
+        user_id, provider_id = keys[group[position]]
+        base = {"transaction_id": int(ids[position]), "user_id": user_id, "provider_id": provider_id}
+        if unusual_amount[position]:
+            flags.append(dict(base, reason=AMOUNT_ZSCORE, score=round(float(zscores[position]), 3), detail={
+                "amount": _money(cents[position]),
+                "mean": _money(mean[position]),
+                "std": _money(np.sqrt(variance[position])),
+                "history": int(count[position])
+            }))
+        if burst[position]:
+            flags.append(dict(base, reason=DEBT_BURST, score=float(in_window[position]), detail={
+                "debts_in_window": int(in_window[position]),
+                "window_seconds": burst_window
+            }))
+
+    # New running stats, and the latest times each pair needs to detect a burst in the next scan
+    ends = np.r_[starts[1:], group.size] - 1
+    last_count = np.bincount(group, minlength=len(keys))
+    new_sum = prior_sum + np.bincount(group, weights=cents, minlength=len(keys))
+    new_squares = prior_squares + np.bincount(group, weights=cents * cents, minlength=len(keys))
+    keep = max(burst_count - 1, 0)
+    updated = {}
+    for index, key in enumerate(keys):
+        times = sorted(prior.get(key, empty)[3] + seconds[starts[index]:ends[index] + 1].tolist())
+        updated[key] = (
+            int(prior_count[index] + last_count[index]),
+            float(new_sum[index]),
+            float(new_squares[index]),
+            times[-keep:] if keep else []
+        )
+    return flags, updated
+
+
+def scan_anomalies(db: Session, chunk_size: Optional[int] = None) -> dict:
+    """
+    Flag unusual debts from the last scanned transaction id on, `chunk_size` debts per committed chunk.
+    Pair statistics are carried in pair_debt_stats, so each run reads only the transactions added since the last.
+    Rows newer than ANOMALY_SCAN_LAG_SECONDS wait for the next run, so a row that took a lower id but commits
+    later is never skipped by the high-water mark.
+    """
+    chunk_size = chunk_size or settings.ANOMALY_SCAN_CHUNK_SIZE
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.ANOMALY_SCAN_LAG_SECONDS)
+    cutoff_seconds = calendar.timegm(cutoff.timetuple())
+    scanned = flagged = 0
+    while True:
+        # The row lock keeps two concurrent scans from processing the same chunk (Postgres)
+        checkpoint = db.query(ScanCheckpoint).filter(ScanCheckpoint.name == CHECKPOINT).with_for_update().first()
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint(name=CHECKPOINT, last_id=0)
+            db.add(checkpoint)
+            db.flush()
+        chunk = _load_chunk(db, checkpoint.last_id, chunk_size, cutoff_seconds)
+        if chunk["id"].size == 0:
+            db.commit()
+            break
+
+        pairs = sorted(set(zip(chunk["user_id"].tolist(), chunk["provider_id"].tolist())))
+        stored = {
+            (s.user_id, s.provider_id): s
+            for s in db.query(PairDebtStats).filter(
+                tuple_(PairDebtStats.user_id, PairDebtStats.provider_id).in_(pairs)
+            ).all()
+        }
+        prior = {
+            key: (s.debt_count, s.amount_sum, s.amount_sum_squares, json.loads(s.recent_debt_times))
+            for key, s in stored.items()
+        }
+        flags, updated = score_chunk(
+            chunk, prior,
+            zscore_threshold=settings.ANOMALY_ZSCORE_THRESHOLD,
+            min_history=settings.ANOMALY_MIN_HISTORY,
+            burst_count=settings.ANOMALY_BURST_COUNT,
+            burst_window=settings.ANOMALY_BURST_WINDOW_SECONDS
+        )
+
+        db.add_all(TransactionFlag(**dict(flag, detail=json.dumps(flag["detail"]))) for flag in flags)
+        for (user_id, provider_id), (count, total, squares, times) in updated.items():
+            stats = stored.get((user_id, provider_id))
+            if stats is None:
+                stats = PairDebtStats(user_id=user_id, provider_id=provider_id)
+                db.add(stats)
+            stats.debt_count = count
+            stats.amount_sum = total
+            stats.amount_sum_squares = squares
+            stats.recent_debt_times = json.dumps(times)
+        checkpoint.last_id = int(chunk["id"][-1])
+        db.commit()
+
+        scanned += int(chunk["id"].size)
+        flagged += len(flags)
+        logger.info("Anomaly scan: %s debts up to id %s, %s flags", chunk["id"].size, checkpoint.last_id, len(flags))
+        if not chunk["more"]:
+            break
+
+    last_id = db.query(ScanCheckpoint.last_id).filter(ScanCheckpoint.name == CHECKPOINT).scalar() or 0
+    return {"scanned": scanned, "flagged": flagged, "last_id": last_id}
+
+
+def list_transaction_flags(db: Session, provider: User, limit: int = 50, before_id: Optional[int] = None) -> List[dict]:
+    """A provider's flags, newest first; page with before_id (the last id of the previous page)"""
+    if provider.role != UserRole.PROVIDER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only providers can view transaction flags"
+        )
+    query = db.query(TransactionFlag).filter(TransactionFlag.provider_id == provider.id)
+    if before_id is not None:
+        query = query.filter(TransactionFlag.id < before_id)
+    return [
+        {
+            "id": flag.id,
+            "transaction_id": flag.transaction_id,
+            "user_id": flag.user_id,
+            "reason": flag.reason,
+            "score": flag.score,
+            "detail": json.loads(flag.detail) if flag.detail else None,
+            "created_at": flag.created_at
+        }
+        for flag in query.order_by(TransactionFlag.id.desc()).limit(limit).all()
+    ]
@@ -2,11 +2,29 @@ from datetime import datetime
 from decimal import Decimal
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from app.core.writes import insert_returning
 from app.models.user import User, UserRole, ProviderType
 from app.models.employer import Employer
 from app.models.work_payment import WorkPayment
+from app.services.search import ranked_ids, in_id_order
+from app.services.versioning import bump_version, employers_scope, work_payments_scope
+
+
+# Ownership check run by most employer and work payment requests; built once so its compiled SQL is reused
+_owned_employer = select(Employer).where(
+    Employer.id == bindparam("employer_id"),
+    Employer.created_by == bindparam("provider_id")
+)
+
+
+def _duplicate_name() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, 
+        detail="Employer with this name already exists"
+    )
 
 
 def create_employer(db: Session, provider: User, name: str, contact_info: Optional[str] = None) -> Employer:
@@ -24,26 +42,18 @@ def create_employer(db: Session, provider: User, name: str, contact_info: Option
             detail="Only PAYER providers (contractors) can add employers"
         )
     
-    # Check for duplicate employer name for this provider
-    existing = db.query(Employer).filter(
-        Employer.created_by == provider.id,
-        Employer.name == name
-    ).first()
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            detail="Employer with this name already exists"
-        )
-    
-    employer = Employer(
-        name=name,
-        contact_info=contact_info,
-        created_by=provider.id
-    )
-    db.add(employer)
+    # A duplicate name for this provider violates uq_employer_provider_name
+    try:
+        employer = insert_returning(db, Employer, dict(
+            name=name,
+            contact_info=contact_info,
+            created_by=provider.id
+        ))
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_name()
+    bump_version(db, employers_scope(provider.id))
     db.commit()
-    db.refresh(employer)
     return employer
 
 
@@ -64,12 +74,23 @@ def get_provider_employers(db: Session, provider: User) -> List[Employer]:
     return db.query(Employer).filter(Employer.created_by == provider.id).all()
 
 
+def search_employers(db: Session, provider: User, query: str, limit: int = 20, offset: int = 0) -> List[Employer]:
+    """Search a provider's employers by name and contact info, best match first"""
+    if provider.role != UserRole.PROVIDER or provider.provider_type != ProviderType.PAYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Only PAYER providers can access employers"
+        )
+    
+    ids = ranked_ids(db, Employer.__table__, ["name", "contact_info"], "created_by", provider.id, query, limit, offset)
+    if not ids:
+        return []
+    return in_id_order(db.query(Employer).filter(Employer.id.in_(ids)).all(), ids)
+
+
 def get_employer(db: Session, provider: User, employer_id: int) -> Employer:
     """Get a specific employer by ID"""
-    employer = db.query(Employer).filter(
-        Employer.id == employer_id,
-        Employer.created_by == provider.id
-    ).first()
+    employer = db.scalars(_owned_employer, {"employer_id": employer_id, "provider_id": provider.id}).first()
     
     if not employer:
         raise HTTPException(
@@ -91,26 +112,21 @@ def update_employer(
     employer = get_employer(db, provider, employer_id)
     
     if name is not None:
-        # Check for duplicate name
-        existing = db.query(Employer).filter(
-            Employer.created_by == provider.id,
-            Employer.name == name,
-            Employer.id != employer_id
-        ).first()
-        
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="Employer with this name already exists"
-            )
-        
         employer.name = name
     
     if contact_info is not None:
         employer.contact_info = contact_info
     
+    # Flushed here, so a rename to the name of another employer of this provider fails on
+    # uq_employer_provider_name before any other statement of the unit of work runs
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_name()
+    # Work payment listings show the employer name
+    bump_version(db, employers_scope(provider.id), work_payments_scope(provider.id))
     db.commit()
-    db.refresh(employer)
     return employer
 
 
@@ -128,6 +144,7 @@ def delete_employer(db: Session, provider: User, employer_id: int) -> bool:
         )
     
     db.delete(employer)
+    bump_version(db, employers_scope(provider.id))
     db.commit()
     return True
 
@@ -0,0 +1,176 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.cache import TTLCache
+
+# Front cache of completed responses: (user_id, key) -> (request_hash, status_code, body)
+_completed = TTLCache(max_entries=settings.IDEMPOTENCY_CACHE_SIZE, ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+
+
+def _request_hash(scope: str, payload: dict) -> str:
+    raw = json.dumps({"scope": scope, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _check_same_request(request_hash: str, stored_hash: str) -> None:
+    if stored_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+
+
+def begin_request(db: Session, user_id: int, key: str, scope: str, payload: dict) -> Optional[dict]:
+    """
+    Reserve `key` for this request, or return the stored response if it already completed.
+    Returns None when the caller should run the request and then call complete_request/release_request.
+    Returns {"resource_id": id} when the write committed (see mark_written) but its response was never
+    stored, e.g. the process died in between; the caller rebuilds the response from that row.
+    """
+    request_hash = _request_hash(scope, payload)
+
+    cached = _completed.get((user_id, key))
+    if cached is not None:
+        stored_hash, status_code, body = cached
+        _check_same_request(request_hash, stored_hash)
+        return {"status_code": status_code, "body": body}
+
+    record = IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        scope=scope,
+        request_hash=request_hash,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    )
+    db.add(record)
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    existing = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+    if existing is None:
+        # Expired and cleaned up between the insert and this read
+        return begin_request(db, user_id, key, scope, payload)
+    now = datetime.utcnow()
+    if existing.expires_at < now:
+        # Expired but not cleaned up yet: the key is free again, whatever it was used for before
+        return _take_over(db, existing, user_id, key, scope, payload, request_hash)
+    _check_same_request(request_hash, existing.request_hash)
+    if existing.status_code is None:
+        if existing.resource_id is not None:
+            return {"resource_id": existing.resource_id}
+        if existing.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS):
+            # The first request died before its write committed (the write would have set resource_id)
+            return _take_over(db, existing, user_id, key, scope, payload, request_hash)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed"
+        )
+
+    body = json.loads(existing.response_body)
+    _completed.set((user_id, key), (existing.request_hash, existing.status_code, body))
+    return {"status_code": existing.status_code, "body": body}
+
+
+def _take_over(
+    db: Session, existing: IdempotencyKey, user_id: int, key: str, scope: str, payload: dict, request_hash: str
+) -> Optional[dict]:
+    """
+    Re-reserve an expired or abandoned row for this request. The update only matches the row as it was
+    read, so when several retries race exactly one of them gets the reservation and the rest start over.
+    """
+    now = datetime.utcnow()
+    taken = db.query(IdempotencyKey).filter(
+        IdempotencyKey.id == existing.id,
+        IdempotencyKey.created_at == existing.created_at
+    ).update({
+        IdempotencyKey.scope: scope,
+        IdempotencyKey.request_hash: request_hash,
+        IdempotencyKey.status_code: None,
+        IdempotencyKey.response_body: None,
+        IdempotencyKey.resource_id: None,
+        IdempotencyKey.created_at: now,
+        IdempotencyKey.expires_at: now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    }, synchronize_session=False)
+    db.commit()
+    db.expire(existing)
+    if taken:
+        _completed.pop((user_id, key))
+        return None
+    return begin_request(db, user_id, key, scope, payload)
+
+
+def mark_written(db: Session, user_id: int, key: Optional[str], resource_id: int) -> None:
+    """
+    Record on the reservation the row written for it. Must run in the same transaction as the write, so
+    the key says whether the write committed even if the process dies before complete_request. Raises
+    409 (rolling the write back) when another request already wrote for this key.
+    """
+    if key is None:
+        return
+    marked = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.resource_id.is_(None)
+    ).update({IdempotencyKey.resource_id: resource_id}, synchronize_session=False)
+    if not marked:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key was already processed"
+        )
+
+
+def complete_request(db: Session, user_id: int, key: str, body: dict, status_code: int = status.HTTP_200_OK) -> None:
+    """Store the response of a reserved request so retries replay it"""
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+    if record is None:
+        return
+    record.status_code = status_code
+    record.response_body = json.dumps(body, default=str)
+    db.commit()
+    _completed.set((user_id, key), (record.request_hash, status_code, body))
+
+
+def release_request(db: Session, user_id: int, key: str) -> None:
+    """
+    Drop a reservation after the request failed so the client can retry it. A reservation whose write
+    committed (resource_id set) is kept, whatever failed afterwards: the retry gets that row back.
+    """
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.resource_id.is_(None)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def cleanup_expired_keys(db: Session, batch_size: int = 1000) -> int:
+    """Delete expired keys in batches of `batch_size`, committing each batch. Returns rows deleted."""
+    now = datetime.utcnow()
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(IdempotencyKey.id).filter(
+            IdempotencyKey.expires_at < now
+        ).order_by(IdempotencyKey.id).limit(batch_size).all()]
+        if not ids:
+            break
+        db.query(IdempotencyKey).filter(IdempotencyKey.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+    return deleted
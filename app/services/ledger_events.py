@@ -0,0 +1,140 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.events import publish_after_commit
+from app.models.ledger_event import LedgerEvent
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.models.user import User, UserRole
+
+
+def ledger_topic(user: User) -> str:
+    """Stream a user or provider receives ledger events on"""
+    if user.role == UserRole.USER:
+        return f"user:{user.id}"
+    if user.role == UserRole.PROVIDER:
+        return f"provider:{user.id}"
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only users and providers have ledger streams")
+
+
+def _event_dict(event_row: LedgerEvent, data: dict) -> dict:
+    # created_at is not sent to clients; the stream uses it to advance the resume cursor
+    return {"id": event_row.id, "event": event_row.kind, "data": data, "created_at": event_row.created_at.isoformat()}
+
+
+class LedgerCursor:
+    """
+    Resume position of a ledger stream, sent as the SSE id: "<floor>" or "<floor>:<id>,<id>,...".
+    Event ids are taken at flush, not at commit, so a lower id can commit after a higher one was delivered.
+    An event therefore only moves under the floor once it is EVENT_REPLAY_COMMIT_LAG_SECONDS old, by when
+    every lower id has committed too; newer delivered ids are listed, so a replay skips exactly those.
+    A plain integer Last-Event-ID is read as a floor with no listed ids.
+    """
+
+    def __init__(self, floor: int = 0, seen: Optional[Dict[int, Optional[datetime]]] = None):
+        self.floor = floor
+        self.seen = seen or {}  # Delivered ids above the floor -> created_at (None when parsed from a client)
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional["LedgerCursor"]:
+        if value is None:
+            return None
+        try:
+            floor, _, ids = value.partition(":")
+            return cls(int(floor), {int(event_id): None for event_id in ids.split(",") if event_id})
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID")
+
+    def advance(self, event_id: int, created_at: Optional[str]) -> None:
+        """Record a delivered event"""
+        if event_id <= self.floor:
+            return
+        self.seen[event_id] = datetime.fromisoformat(created_at) if created_at else None
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.EVENT_REPLAY_COMMIT_LAG_SECONDS)
+        settled = [seen_id for seen_id, seen_at in self.seen.items() if seen_at is not None and seen_at < cutoff]
+        if len(self.seen) - len(settled) > settings.EVENT_CURSOR_MAX_IDS:
+            # Keep the id a resumable header size under a burst: settle the oldest ids early
+            settled += sorted(self.seen)[:len(self.seen) - len(settled) - settings.EVENT_CURSOR_MAX_IDS]
+        if settled:
+            self.floor = max(self.floor, max(settled))
+            self.seen = {seen_id: seen_at for seen_id, seen_at in self.seen.items() if seen_id > self.floor}
+
+    def __str__(self) -> str:
+        if not self.seen:
+            return str(self.floor)
+        return f"{self.floor}:" + ",".join(str(seen_id) for seen_id in sorted(self.seen))
+
+
+def record_ledger_event(db: Session, tx: Transaction, kind: str) -> LedgerEvent:
+    """
+    Append a change-log row for `tx` and publish it to both sides of the pair once the transaction commits.
+    Must run after the rollup for `tx` has been applied so the carried balance includes it.
+    """
+    db.flush()
+    balance = db.query(
+        func.coalesce(func.sum(TransactionDailyRollup.debt_total - TransactionDailyRollup.payment_total), 0)
+    ).filter(
+        TransactionDailyRollup.user_id == tx.user_id,
+        TransactionDailyRollup.provider_id == tx.provider_id
+    ).scalar()
+
+    data = {
+        "transaction_id": tx.id,
+        "user_id": tx.user_id,
+        "provider_id": tx.provider_id,
+        "type": tx.type.value,
+        "status": tx.status.value,
+        "amount": str(tx.amount),
+        "date": tx.date.isoformat() if tx.date else None,
+        "balance": str(balance)
+    }
+    event_row = LedgerEvent(
+        user_id=tx.user_id,
+        provider_id=tx.provider_id,
+        transaction_id=tx.id,
+        kind=kind,
+        payload=json.dumps(data)
+    )
+    db.add(event_row)
+    db.flush()
+    publish_after_commit(db, [f"user:{tx.user_id}", f"provider:{tx.provider_id}"], _event_dict(event_row, data))
+    return event_row
+
+
+def _subscriber_events(db: Session, subscriber: User):
+    column = LedgerEvent.user_id if subscriber.role == UserRole.USER else LedgerEvent.provider_id
+    return db.query(LedgerEvent).filter(column == subscriber.id)
+
+
+def get_ledger_events_since(db: Session, subscriber: User, cursor: LedgerCursor, limit: Optional[int] = None) -> Tuple[List[dict], bool]:
+    """
+    Events of the subscriber's stream after `cursor`, oldest first, and whether more than `limit` are missed.
+    A truncated backlog is not replayed at all: the client has to resync its state instead.
+    """
+    limit = limit or settings.EVENT_REPLAY_LIMIT
+    query = _subscriber_events(db, subscriber).filter(LedgerEvent.id > cursor.floor)
+    if cursor.seen:
+        query = query.filter(LedgerEvent.id.notin_(list(cursor.seen)))
+    rows = query.order_by(LedgerEvent.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        return [], True
+    return [_event_dict(row, json.loads(row.payload)) for row in rows], False
+
+
+def resync_cursor(db: Session, subscriber: User) -> LedgerCursor:
+    """
+    Cursor for a client that refetches its state now: everything committed so far counts as delivered.
+    Events inside the commit lag are listed rather than put under the floor, so a lower id that commits
+    later is still replayed on the next reconnect.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.EVENT_REPLAY_COMMIT_LAG_SECONDS)
+    floor = _subscriber_events(db, subscriber).filter(LedgerEvent.created_at < cutoff).with_entities(func.max(LedgerEvent.id)).scalar() or 0
+    recent = _subscriber_events(db, subscriber).filter(LedgerEvent.id > floor).with_entities(LedgerEvent.id, LedgerEvent.created_at).all()
+    cursor = LedgerCursor(floor)
+    for event_id, created_at in recent:
+        cursor.advance(event_id, created_at.isoformat())
+    return cursor
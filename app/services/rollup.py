@@ -0,0 +1,145 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, tuple_
+from app.core.writes import upsert_statement
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.models.transaction_rollup import TransactionDailyRollup
+
+
+def _as_date(value) -> date:
+    # SQLite returns func.date() as an ISO string, Postgres as a date
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def record_confirmed_transaction(db: Session, tx: Transaction) -> None:
+    """
+    Add a confirmed transaction to its pair's daily rollup.
+    Does not commit: callers apply it inside the same unit of work as the ledger write.
+    """
+    day = (tx.date or datetime.utcnow()).date()
+    debt = tx.amount if tx.type == TransactionType.DEBT else Decimal("0")
+    payment = tx.amount if tx.type == TransactionType.PAYMENT else Decimal("0")
+
+    # One INSERT ... ON CONFLICT DO UPDATE that increments in SQL: the first write of a day creates the row,
+    # and a concurrent first write for the same pair and day adds to it instead of failing on uq_rollup_pair_day
+    now = datetime.utcnow()
+    statement = upsert_statement(db, TransactionDailyRollup, dict(
+        user_id=tx.user_id,
+        provider_id=tx.provider_id,
+        day=day,
+        debt_total=debt,
+        payment_total=payment,
+        transaction_count=1,
+        updated_at=now
+    ))
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[TransactionDailyRollup.user_id, TransactionDailyRollup.provider_id, TransactionDailyRollup.day],
+        set_={
+            "debt_total": TransactionDailyRollup.debt_total + statement.excluded.debt_total,
+            "payment_total": TransactionDailyRollup.payment_total + statement.excluded.payment_total,
+            "transaction_count": TransactionDailyRollup.transaction_count + 1,
+            "updated_at": now
+        }
+    ))
+
+
+def daily_series(db: Session, user_id: int, provider_id: int, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    """Daily totals for a pair with the balance carried from before `start`"""
+    pair = db.query(TransactionDailyRollup).filter(
+        TransactionDailyRollup.user_id == user_id,
+        TransactionDailyRollup.provider_id == provider_id
+    )
+
+    opening_balance = Decimal("0")
+    if start is not None:
+        opening_balance = pair.filter(TransactionDailyRollup.day < start).with_entities(
+            func.coalesce(func.sum(TransactionDailyRollup.debt_total - TransactionDailyRollup.payment_total), 0)
+        ).scalar() or Decimal("0")
+        pair = pair.filter(TransactionDailyRollup.day >= start)
+    if end is not None:
+        pair = pair.filter(TransactionDailyRollup.day <= end)
+
+    balance = Decimal(opening_balance)
+    points: List[dict] = []
+    for row in pair.order_by(TransactionDailyRollup.day).all():
+        balance += row.debt_total - row.payment_total
+        points.append({
+            "day": row.day,
+            "debt": row.debt_total,
+            "payments": row.payment_total,
+            "transaction_count": row.transaction_count,
+            "balance": balance
+        })
+
+    return {
+        "user_id": user_id,
+        "provider_id": provider_id,
+        "opening_balance": opening_balance,
+        "points": points
+    }
+
+
+def iter_pair_batches(db: Session, batch_size: int) -> Iterator[List[Tuple[int, int]]]:
+    """
+    Yield the ledger's (user_id, provider_id) pairs in chunks of `batch_size`.
+    Pairs are walked in keyset order so a chunk never rescans earlier pairs; callers may commit between chunks.
+    """
+    last_pair = None
+    while True:
+        pairs_query = db.query(Transaction.user_id, Transaction.provider_id).distinct()
+        if last_pair is not None:
+            pairs_query = pairs_query.filter(tuple_(Transaction.user_id, Transaction.provider_id) > tuple_(*last_pair))
+        pairs = [tuple(p) for p in pairs_query.order_by(Transaction.user_id, Transaction.provider_id).limit(batch_size).all()]
+        if not pairs:
+            return
+        yield pairs
+        last_pair = pairs[-1]
+
+
+def rebuild_rollups(db: Session, batch_size: int = 500) -> int:
+    """
+    Recompute all rollups from the ledger, `batch_size` pairs per committed chunk.
+    Returns the number of pairs processed.
+    """
+    day = func.date(Transaction.date)
+    processed = 0
+
+    for pairs in iter_pair_batches(db, batch_size):
+        pair_filter = tuple_(Transaction.user_id, Transaction.provider_id).in_(pairs)
+        rows = db.query(
+            Transaction.user_id,
+            Transaction.provider_id,
+            day.label("day"),
+            func.coalesce(func.sum(case((Transaction.type == TransactionType.DEBT, Transaction.amount), else_=0)), 0).label("debt_total"),
+            func.coalesce(func.sum(case((Transaction.type == TransactionType.PAYMENT, Transaction.amount), else_=0)), 0).label("payment_total"),
+            func.count(Transaction.id).label("transaction_count")
+        ).filter(
+            pair_filter,
+            Transaction.status == TransactionStatus.CONFIRMED
+        ).group_by(Transaction.user_id, Transaction.provider_id, day).all()
+
+        db.query(TransactionDailyRollup).filter(
+            tuple_(TransactionDailyRollup.user_id, TransactionDailyRollup.provider_id).in_(pairs)
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(TransactionDailyRollup, [
+            {
+                "user_id": row.user_id,
+                "provider_id": row.provider_id,
+                "day": _as_date(row.day),
+                "debt_total": row.debt_total,
+                "payment_total": row.payment_total,
+                "transaction_count": row.transaction_count,
+                "updated_at": datetime.utcnow()
+            }
+            for row in rows
+        ])
+        db.commit()
+        processed += len(pairs)
+
+    return processed
@@ -0,0 +1,88 @@
+import re
+from typing import List
+from fastapi import HTTPException, status
+from sqlalchemy import Table, and_, or_, select, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.text_search import TS_CONFIG, fts_table, search_document
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a user query into words; punctuation and operators are dropped so nothing reaches the index syntax"""
+    terms = _WORD.findall(query.lower())[:settings.SEARCH_MAX_TERMS]
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+    return terms
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _sqlite_ids(db: Session, table: Table, columns: List[str], owner_column: str, owner_id: int, terms: List[str], limit: int, offset: int) -> List[int]:
+    fts = fts_table(table.name)
+    # Every word must match, each as a prefix: "acme co" -> "acme"* "co"*
+    match = " ".join(f'"{term}"*' for term in terms)
+    rows = db.execute(text(
+        f"SELECT t.id FROM {fts} JOIN {table.name} t ON t.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :match AND t.{owner_column} = :owner "
+        f"ORDER BY bm25({fts}), t.id LIMIT :limit OFFSET :offset"
+    ), {"match": match, "owner": owner_id, "limit": limit, "offset": offset})
+    return [row.id for row in rows]
+
+
+def _postgres_ids(db: Session, table: Table, columns: List[str], owner_column: str, owner_id: int, terms: List[str], limit: int, offset: int) -> List[int]:
+    document = search_document(columns, alias="t")
+    vector = f"to_tsvector('{TS_CONFIG}', {document})"
+    query = f"to_tsquery('{TS_CONFIG}', :tsquery)"
+    # Word-prefix matches come from the tsvector index and rank first; substrings inside words
+    # (e.g. "mart" in "walmart") fall back to ILIKE, which the trigram index serves
+    rows = db.execute(text(
+        f"SELECT t.id FROM {table.name} t "
+        f"WHERE t.{owner_column} = :owner AND ({vector} @@ {query} OR {document} ILIKE :pattern) "
+        f"ORDER BY ts_rank({vector}, {query}) DESC, t.id LIMIT :limit OFFSET :offset"
+    ), {
+        "tsquery": " & ".join(f"{term}:*" for term in terms),
+        "pattern": "%" + "%".join(_escape_like(term) for term in terms) + "%",
+        "owner": owner_id,
+        "limit": limit,
+        "offset": offset
+    })
+    return [row.id for row in rows]
+
+
+def _fallback_ids(db: Session, table: Table, columns: List[str], owner_column: str, owner_id: int, terms: List[str], limit: int, offset: int) -> List[int]:
+    # Unindexed substring match for other databases; ordered by id since there is no rank
+    matches = and_(*[
+        or_(*[table.c[column].ilike(f"%{_escape_like(term)}%", escape="\\") for column in columns])
+        for term in terms
+    ])
+    statement = select(table.c.id).where(table.c[owner_column] == owner_id, matches).order_by(table.c.id).limit(limit).offset(offset)
+    return [row.id for row in db.execute(statement)]
+
+
+_BACKENDS = {
+    "sqlite": _sqlite_ids,
+    "postgresql": _postgres_ids,
+}
+
+
+def ranked_ids(db: Session, table: Table, columns: List[str], owner_column: str, owner_id: int, query: str, limit: int, offset: int) -> List[int]:
+    """
+    Ids of `table` rows owned by `owner_id` whose `columns` match every word of `query`, best match first.
+    Uses the text index created by register_text_search for the session's dialect.
+    """
+    terms = search_terms(query)
+    search = _BACKENDS.get(db.get_bind().dialect.name, _fallback_ids)
+    return search(db, table, columns, owner_column, owner_id, terms, limit, offset)
+
+
+def in_id_order(rows: list, ids: List[int]) -> list:
+    """Reorder rows loaded with `id IN (...)` to follow `ids`"""
+    by_id = {row.id: row for row in rows}
+    return [by_id[row_id] for row_id in ids if row_id in by_id]
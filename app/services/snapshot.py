@@ -0,0 +1,162 @@
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, case, select, tuple_, update
+from app.core.config import settings
+from app.models.balance_snapshot import BalanceSnapshot
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.rollup import iter_pair_batches
+
+logger = logging.getLogger(__name__)
+
+
+def _pair_totals_statement(bounded: bool):
+    statement = select(
+        func.coalesce(func.sum(case((Transaction.type == TransactionType.DEBT, Transaction.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.type == TransactionType.PAYMENT, Transaction.amount), else_=0)), 0)
+    ).where(
+        Transaction.user_id == bindparam("user_id"),
+        Transaction.provider_id == bindparam("provider_id"),
+        Transaction.status == TransactionStatus.CONFIRMED,
+        Transaction.id > bindparam("after_id")
+    )
+    if bounded:
+        statement = statement.where(Transaction.id <= bindparam("up_to_id"))
+    return statement
+
+
+# Every balance read runs these; built once so only the parameters change and the compiled SQL is reused
+_pair_totals = _pair_totals_statement(bounded=False)
+_pair_totals_up_to = _pair_totals_statement(bounded=True)
+_pair_snapshot = select(BalanceSnapshot).where(
+    BalanceSnapshot.user_id == bindparam("user_id"),
+    BalanceSnapshot.provider_id == bindparam("provider_id")
+)
+
+
+def pair_totals(db: Session, user_id: int, provider_id: int, after_id: int = 0, up_to_id: Optional[int] = None) -> Tuple[Decimal, Decimal]:
+    """Confirmed (debt, payment) sums for a pair over transaction ids in (after_id, up_to_id]"""
+    params = {"user_id": user_id, "provider_id": provider_id, "after_id": after_id}
+    if up_to_id is None:
+        debt_total, payment_total = db.execute(_pair_totals, params).one()
+    else:
+        debt_total, payment_total = db.execute(_pair_totals_up_to, dict(params, up_to_id=up_to_id)).one()
+    return Decimal(debt_total or 0), Decimal(payment_total or 0)
+
+
+def balance_totals(db: Session, user_id: int, provider_id: int) -> Tuple[Decimal, Decimal]:
+    """Confirmed (debt, payment) totals for a pair: latest snapshot plus the rows after it"""
+    snapshot = db.scalars(_pair_snapshot, {"user_id": user_id, "provider_id": provider_id}).first()
+    if snapshot is None:
+        return pair_totals(db, user_id, provider_id)
+    debt_delta, payment_delta = pair_totals(db, user_id, provider_id, after_id=snapshot.last_transaction_id)
+    return snapshot.debt_total + debt_delta, snapshot.payment_total + payment_delta
+
+
+def _snapshot_boundaries(db: Session, pairs: List[Tuple[int, int]]) -> dict:
+    """
+    Highest transaction id each pair can be snapshotted at.
+    Only rows older than the snapshot lag count, so a transaction that took a lower id but commits later is
+    never skipped. PENDING rows do not hold the boundary back: they are left out of every sum, and a debt
+    confirmed after the snapshot passed it is added to the snapshot by record_confirmed_in_snapshot.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.BALANCE_SNAPSHOT_LAG_SECONDS)
+    rows = db.query(
+        Transaction.user_id,
+        Transaction.provider_id,
+        func.max(Transaction.id)
+    ).filter(
+        tuple_(Transaction.user_id, Transaction.provider_id).in_(pairs),
+        Transaction.date < cutoff
+    ).group_by(Transaction.user_id, Transaction.provider_id).all()
+    return {(user_id, provider_id): max_id for user_id, provider_id, max_id in rows}
+
+
+def record_confirmed_in_snapshot(db: Session, tx: Transaction) -> None:
+    """
+    Add a transaction confirmed after it was created to its pair's snapshot, if the snapshot already covers
+    its id (otherwise the row is still in the delta). Run after the status UPDATE, in the same transaction.
+    """
+    column = BalanceSnapshot.debt_total if tx.type == TransactionType.DEBT else BalanceSnapshot.payment_total
+    db.execute(
+        update(BalanceSnapshot).where(
+            BalanceSnapshot.user_id == tx.user_id,
+            BalanceSnapshot.provider_id == tx.provider_id,
+            BalanceSnapshot.last_transaction_id >= tx.id
+        ).values({column: column + tx.amount})
+    )
+
+
+def snapshot_balances(db: Session, batch_size: int = 500) -> int:
+    """
+    Advance every pair's snapshot to its current boundary, `batch_size` pairs per committed chunk.
+    Only the rows between the previous and the new boundary are summed. Returns snapshots written.
+    """
+    written = 0
+    for pairs in iter_pair_batches(db, batch_size):
+        # Lock the pairs' PENDING rows until this chunk commits: an approval either waits and then finds the
+        # new snapshot to add itself to, or commits first and is summed here as CONFIRMED
+        db.query(Transaction.id).filter(
+            tuple_(Transaction.user_id, Transaction.provider_id).in_(pairs),
+            Transaction.status == TransactionStatus.PENDING
+        ).with_for_update().all()
+        boundaries = _snapshot_boundaries(db, pairs)
+        existing = {
+            (s.user_id, s.provider_id): s
+            for s in db.query(BalanceSnapshot).filter(
+                tuple_(BalanceSnapshot.user_id, BalanceSnapshot.provider_id).in_(pairs)
+            ).all()
+        }
+        for pair in pairs:
+            boundary = boundaries.get(pair)
+            snapshot = existing.get(pair)
+            previous = snapshot.last_transaction_id if snapshot else 0
+            if boundary is None or boundary <= previous:
+                continue
+            debt_delta, payment_delta = pair_totals(db, pair[0], pair[1], after_id=previous, up_to_id=boundary)
+            if snapshot is None:
+                db.add(BalanceSnapshot(
+                    user_id=pair[0],
+                    provider_id=pair[1],
+                    last_transaction_id=boundary,
+                    debt_total=debt_delta,
+                    payment_total=payment_delta
+                ))
+            else:
+                snapshot.last_transaction_id = boundary
+                snapshot.debt_total = snapshot.debt_total + debt_delta
+                snapshot.payment_total = snapshot.payment_total + payment_delta
+            written += 1
+        db.commit()
+    return written
+
+
+def verify_pair(db: Session, user_id: int, provider_id: int) -> Optional[dict]:
+    """Compare snapshot+delta against a full recompute; returns the mismatch or None"""
+    fast = balance_totals(db, user_id, provider_id)
+    full = pair_totals(db, user_id, provider_id)
+    if fast == full:
+        return None
+    mismatch = {
+        "user_id": user_id,
+        "provider_id": provider_id,
+        "snapshot_debt": fast[0],
+        "snapshot_payments": fast[1],
+        "full_debt": full[0],
+        "full_payments": full[1]
+    }
+    logger.warning("Balance snapshot mismatch: %s", mismatch)
+    return mismatch
+
+
+def verify_snapshots(db: Session, batch_size: int = 500) -> List[dict]:
+    """Full-recompute check of every pair's snapshot balance"""
+    mismatches = []
+    for pairs in iter_pair_batches(db, batch_size):
+        for user_id, provider_id in pairs:
+            mismatch = verify_pair(db, user_id, provider_id)
+            if mismatch:
+                mismatches.append(mismatch)
+    return mismatches
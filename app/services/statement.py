@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator, Optional
+from sqlalchemy import Select, case, func, literal, select, true, type_coerce
+from app.core.database import engine
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.models.types import Money
+
+CSV_FIELDS = ["id", "date", "type", "amount", "balance"]
+
+
+def statement_query(user_id: int, provider_id: int, start: Optional[date] = None, end: Optional[date] = None) -> Select:
+    """
+    Confirmed transactions of a pair in (date, id) order with the balance after each one, as a single query.
+    The running balance is SUM() OVER the rows in range plus the opening balance (everything before `start`),
+    which is joined in so it is returned even when the range has no rows.
+    """
+    signed = case((Transaction.type == TransactionType.DEBT, Transaction.amount), else_=-Transaction.amount)
+    pair = [
+        Transaction.user_id == user_id,
+        Transaction.provider_id == provider_id,
+        Transaction.status == TransactionStatus.CONFIRMED
+    ]
+
+    if start is not None:
+        opening = select(
+            type_coerce(func.coalesce(func.sum(signed), 0), Money()).label("opening_balance")
+        ).where(*pair, Transaction.date < start).subquery("opening")
+    else:
+        opening = select(literal(Decimal("0"), Money()).label("opening_balance")).subquery("opening")
+
+    in_range = list(pair)
+    if start is not None:
+        in_range.append(Transaction.date >= start)
+    if end is not None:
+        in_range.append(Transaction.date < end + timedelta(days=1))
+    entries = select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.type,
+        Transaction.amount,
+        type_coerce(func.sum(signed).over(order_by=(Transaction.date, Transaction.id)), Money()).label("running")
+    ).where(*in_range).subquery("entries")
+
+    return select(
+        opening.c.opening_balance,
+        entries.c.id,
+        entries.c.date,
+        entries.c.type,
+        entries.c.amount,
+        type_coerce(opening.c.opening_balance + entries.c.running, Money()).label("balance")
+    ).select_from(opening.outerjoin(entries, true())).order_by(entries.c.date, entries.c.id)
+
+
+def iter_statement(user_id: int, provider_id: int, start: Optional[date] = None, end: Optional[date] = None, batch_size: int = 500) -> Iterator:
+    """
+    Stream statement rows `batch_size` at a time (a server-side cursor on Postgres). The first row always
+    carries opening_balance; when the range is empty it is the only row and its entry columns are NULL.
+    Uses its own connection so it can outlive the request's session while the response streams.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            statement_query(user_id, provider_id, start, end)
+        )
+        yield from result
+
+
+def _entry(row) -> dict:
+    return {
+        "id": row.id,
+        "date": row.date.isoformat(),
+        "type": row.type.value,
+        "amount": str(row.amount),
+        "balance": str(row.balance)
+    }
+
+
+def statement_json_chunks(user_id: int, provider_id: int, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[str]:
+    """The statement as one JSON document (see PairStatement), written entry by entry"""
+    closing = None
+    for row in iter_statement(user_id, provider_id, start, end):
+        if closing is None:
+            closing = row.opening_balance
+            header = {
+                "user_id": user_id,
+                "provider_id": provider_id,
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+                "opening_balance": str(row.opening_balance)
+            }
+            yield json.dumps(header)[:-1] + ', "entries": ['
+            separator = ""
+        if row.id is not None:
+            yield separator + json.dumps(_entry(row))
+            separator = ","
+            closing = row.balance
+    yield '], "closing_balance": ' + json.dumps(str(closing)) + "}"
+
+
+def statement_csv_chunks(user_id: int, provider_id: int, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[str]:
+    """The statement as CSV for printing: an opening balance line, then one line per entry"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    first = True
+    for row in iter_statement(user_id, provider_id, start, end):
+        if first:
+            writer.writerow(["", start.isoformat() if start else "", "opening", "", str(row.opening_balance)])
+            first = False
+        if row.id is not None:
+            entry = _entry(row)
+            writer.writerow([entry[field] for field in CSV_FIELDS])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
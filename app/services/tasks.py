@@ -0,0 +1,36 @@
+"""
+Job tasks run by the background workers (python -m app.worker).
+Each task wraps a maintenance service so it can be queued with enqueue_job instead of running in a request.
+"""
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.jobs import task
+from app.services.anomaly import scan_anomalies
+from app.services.idempotency import cleanup_expired_keys
+from app.services.rollup import rebuild_rollups
+from app.services.snapshot import snapshot_balances, verify_snapshots
+
+
+@task("rollups.rebuild", timeout_seconds=3600)
+def rebuild_rollups_task(db: Session, batch_size: int = 500) -> dict:
+    return {"pairs_processed": rebuild_rollups(db, batch_size=batch_size)}
+
+
+@task("idempotency.cleanup")
+def cleanup_idempotency_task(db: Session, batch_size: int = 1000) -> dict:
+    return {"deleted": cleanup_expired_keys(db, batch_size=batch_size)}
+
+
+@task("snapshots.run", timeout_seconds=3600)
+def snapshot_balances_task(db: Session, batch_size: int = 500) -> dict:
+    return {"snapshots_written": snapshot_balances(db, batch_size=batch_size)}
+
+
+@task("snapshots.verify", max_attempts=1, timeout_seconds=3600)
+def verify_snapshots_task(db: Session, batch_size: int = 500) -> dict:
+    return {"mismatches": verify_snapshots(db, batch_size=batch_size)}
+
+
+@task("anomalies.scan", timeout_seconds=3600)
+def scan_anomalies_task(db: Session, chunk_size: Optional[int] = None) -> dict:
+    return scan_anomalies(db, chunk_size=chunk_size)
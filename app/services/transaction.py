@@ -1,18 +1,61 @@
+from datetime import date
 from decimal import Decimal
+from typing import Optional
 from fastapi import HTTPException, status
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.models.transaction import Transaction, TransactionType, TransactionStatus
 from app.models.user import User, UserRole, ProviderType
 from app.models.user_provider import UserProvider
-from app.utils.verification_code_gener import generate_verification_code
+from app.core.config import settings
+from app.core.write_pipeline import WriteOutcomeUnknown, group_writer
+from app.core.writes import insert_returning
+from app.utils.otp_verifier import otp_verifier
+from app.services.rollup import record_confirmed_transaction, daily_series
+from app.services.idempotency import mark_written
+from app.services.ledger_events import record_ledger_event
+from app.services.versioning import bump_version, pair_scope, provider_ledger_scope
+from app.services.snapshot import balance_totals, record_confirmed_in_snapshot, verify_pair
+
+
+# Hot lookups built once with bound parameters, so each call reuses the compiled SQL
+_pair_link = (UserProvider.user_id == bindparam("user_id"), UserProvider.provider_id == bindparam("provider_id"))
+_link_id = select(UserProvider.id).where(*_pair_link)
+_link_client_secret = select(UserProvider.id, User.secret_key).join(User, User.id == UserProvider.user_id).where(*_pair_link)
 
 
 def _check_link_exists(db: Session, user_id: int, provider_id: int):
-    return db.query(UserProvider).filter(UserProvider.user_id == user_id, UserProvider.provider_id == provider_id).first()
+    return db.execute(_link_id, {"user_id": user_id, "provider_id": provider_id}).first()
+
+
+def _get_link_client_secret(db: Session, user_id: int, provider_id: int):
+    # Link check and the client's OTP secret in one round trip; None when there is no link
+    return db.execute(_link_client_secret, {"user_id": user_id, "provider_id": provider_id}).first()
+
+
+def _record_created(db: Session, tx: Transaction):
+    # Rollup first so the event carries the balance including this transaction
+    if tx.status == TransactionStatus.CONFIRMED:
+        record_confirmed_transaction(db, tx)
+    bump_version(db, pair_scope(tx.user_id, tx.provider_id), provider_ledger_scope(tx.provider_id))
+    record_ledger_event(db, tx, "transaction.created")
+
+
+def authorize_pair_access(db: Session, requester: User, user_id: int, provider_id: int):
+    # Authorization: requester must be either the user (client) or the provider
+    if requester.role == UserRole.USER and requester.id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    if requester.role == UserRole.PROVIDER and requester.id != provider_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    # Ensure link exists (except admin maybe) when not admin
+    if requester.role != UserRole.ADMIN and not _check_link_exists(db, user_id, provider_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Link does not exist")
 
 
-def create_transaction(db: Session, provider: User, user_id: int, amount: Decimal, t_type: TransactionType, otp: str = None):
+def create_transaction(
+    db: Session, provider: User, user_id: int, amount: Decimal, t_type: TransactionType, otp: str = None,
+    idempotency_key: Optional[str] = None
+):
     # Provider must be provider role
     if provider.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only providers can create transactions")
@@ -25,7 +68,8 @@ def create_transaction(db: Session, provider: User, user_id: int, amount: Decima
         )
     
     # Link must exist
-    if not _check_link_exists(db, user_id, provider.id):
+    link = _get_link_client_secret(db, user_id, provider.id)
+    if not link:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Link does not exist")
 
     # Determine transaction status based on type and OTP validation
@@ -37,19 +81,50 @@ def create_transaction(db: Session, provider: User, user_id: int, amount: Decima
         if not otp:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP is required for debt transactions")
 
-        # Get the code of user based on user id
-        user = db.query(User).filter(User.id == user_id).first()
-        SERVER_OTP = generate_verification_code(user.secret_key)
-        print("Server OTP:", SERVER_OTP)  # For debugging purposes only, remove in production
-        if otp == SERVER_OTP:
+        # Verify against the client's secret (drift window + single use per step)
+        if otp_verifier.verify(user_id, link.secret_key, otp):
             status_value = TransactionStatus.CONFIRMED
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP. Transaction failed.")
 
-    tx = Transaction(user_id=user_id, provider_id=provider.id, type=t_type, amount=amount, status=status_value)
-    db.add(tx)
+    def record_created(session: Session, tx: Transaction):
+        _record_created(session, tx)
+        mark_written(session, provider.id, idempotency_key, tx.id)
+
+    if settings.GROUP_COMMIT_ENABLED:
+        # Validation is done; the background writer commits the row together with other requests
+        try:
+            return group_writer.insert(
+                Transaction,
+                dict(user_id=user_id, provider_id=provider.id, type=t_type, amount=amount, status=status_value),
+                after_insert=record_created
+            )
+        except TimeoutError:
+            # Withdrawn before the writer took it: nothing was saved, so the same OTP can be sent again
+            if otp:
+                otp_verifier.release(user_id, link.secret_key, otp)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Transaction was not saved, the server is busy. Please retry.",
+                headers={"Retry-After": "1"}
+            )
+        except WriteOutcomeUnknown:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Transaction may not have been saved. Retry with the same Idempotency-Key, or check before recording it again.",
+                headers={"Retry-After": "5"}
+            )
+
+    tx = insert_returning(db, Transaction, dict(user_id=user_id, provider_id=provider.id, type=t_type, amount=amount, status=status_value))
+    record_created(db, tx)
     db.commit()
-    db.refresh(tx)
+    return tx
+
+
+def get_provider_transaction(db: Session, provider: User, transaction_id: int) -> Transaction:
+    tx = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.provider_id == provider.id).first()
+    if not tx:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
     return tx
 
 
@@ -60,39 +135,38 @@ def approve_debt(db: Session, client: User, transaction_id: int):
     if tx.type != TransactionType.DEBT or tx.status != TransactionStatus.PENDING:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transaction not pending debt")
     # Future: Verify OTP here
-    tx.status = TransactionStatus.CONFIRMED
-    db.add(tx)
+    # Conditional, so two concurrent approvals cannot both count the debt; this also waits for a snapshot
+    # run holding the row
+    confirmed = db.query(Transaction).filter(
+        Transaction.id == tx.id,
+        Transaction.status == TransactionStatus.PENDING
+    ).update({Transaction.status: TransactionStatus.CONFIRMED})
+    if not confirmed:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Transaction not pending debt")
+    record_confirmed_in_snapshot(db, tx)
+    record_confirmed_transaction(db, tx)
+    bump_version(db, pair_scope(tx.user_id, tx.provider_id), provider_ledger_scope(tx.provider_id))
+    record_ledger_event(db, tx, "transaction.confirmed")
     db.commit()
-    db.refresh(tx)
     return tx
 
 
-def list_transactions_for_pair(db: Session, requester: User, user_id: int, provider_id: int):
-    # Authorization: requester must be either the user (client) or the provider
-    if requester.role == UserRole.USER and requester.id != user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    if requester.role == UserRole.PROVIDER and requester.id != provider_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    if requester.role == UserRole.ADMIN:
-        pass
-    # Ensure link exists (except admin maybe) when not admin
-    if requester.role != UserRole.ADMIN and not _check_link_exists(db, user_id, provider_id):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Link does not exist")
+def list_transactions_for_pair(db: Session, requester: User, user_id: int, provider_id: int, authorized: bool = False):
+    if not authorized:
+        authorize_pair_access(db, requester, user_id, provider_id)
     return db.query(Transaction).filter(Transaction.user_id == user_id, Transaction.provider_id == provider_id).all()
 
 
-def compute_balance(db: Session, requester: User, user_id: int, provider_id: int):
+def compute_balance(db: Session, requester: User, user_id: int, provider_id: int, authorized: bool = False):
     # Authorization same as list
-    if requester.role == UserRole.USER and requester.id != user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    if requester.role == UserRole.PROVIDER and requester.id != provider_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    if requester.role != UserRole.ADMIN and not _check_link_exists(db, user_id, provider_id):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Link does not exist")
+    if not authorized:
+        authorize_pair_access(db, requester, user_id, provider_id)
 
-    confirmed = db.query(Transaction).filter(Transaction.user_id == user_id, Transaction.provider_id == provider_id, Transaction.status == TransactionStatus.CONFIRMED)
-    debt_total = confirmed.filter(Transaction.type == TransactionType.DEBT).with_entities(func.coalesce(func.sum(Transaction.amount), 0)).scalar()  # type: ignore
-    payment_total = confirmed.filter(Transaction.type == TransactionType.PAYMENT).with_entities(func.coalesce(func.sum(Transaction.amount), 0)).scalar()  # type: ignore
+    # Latest snapshot plus only the confirmed rows after it
+    debt_total, payment_total = balance_totals(db, user_id, provider_id)
+    if settings.BALANCE_SNAPSHOT_VERIFY:
+        verify_pair(db, user_id, provider_id)
     balance = (debt_total or 0) - (payment_total or 0)
     return {
         "user_id": user_id,
@@ -101,3 +175,18 @@ def compute_balance(db: Session, requester: User, user_id: int, provider_id: int
         "total_payments": payment_total or 0,
         "balance": balance
     }
+
+
+def get_pair_history(
+    db: Session,
+    requester: User,
+    user_id: int,
+    provider_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> dict:
+    """Daily debt/payment series for a pair, read from the rollup table"""
+    authorize_pair_access(db, requester, user_id, provider_id)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    return daily_series(db, user_id, provider_id, start, end)
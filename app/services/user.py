@@ -1,8 +1,22 @@
+import base64
+import binascii
+import json
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from app.models.user import User, UserRole, ProviderType
+from app.models.user import User, UserRole, ProviderType, USER_SEARCH_ROLE_FILTER
+from app.core.config import settings
 from app.core.security import get_password_hash
-from typing import Optional
+from app.core.writes import insert_returning
+from app.models.user_provider import UserProvider
+from app.services.versioning import user_links_scope
+from app.utils.response_cache import invalidate_after_commit
+from app.utils.cache import TTLCache
+from typing import List, Optional, Tuple
+
+# user_id -> {"id", "name", "email"}
+_public_profiles = TTLCache(max_entries=settings.PUBLIC_PROFILE_CACHE_SIZE, ttl_seconds=settings.PUBLIC_PROFILE_CACHE_TTL_SECONDS)
 
 
 def create_user(
@@ -13,10 +27,6 @@ def create_user(
     role: UserRole = UserRole.USER,
     provider_type: Optional[ProviderType] = None
 ) -> User:
-    existing = db.query(User).filter(User.email == email).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    
     # Validate provider_type is only set for providers
     if provider_type is not None and role != UserRole.PROVIDER:
         raise HTTPException(
@@ -24,20 +34,38 @@ def create_user(
             detail="Provider type can only be set for provider role"
         )
     
-    user = User(
-        name=name, 
-        email=email, 
-        password=get_password_hash(password), 
-        role=role,
-        provider_type=provider_type,
-        secret_key=User.generate_secret_key()  # Generate unique secret key
-    )
-    db.add(user)
+    # The unique index on email rejects a registered address, also when two signups race
+    try:
+        user = insert_returning(db, User, dict(
+            name=name, 
+            email=email, 
+            password=get_password_hash(password), 
+            role=role,
+            provider_type=provider_type,
+            secret_key=User.generate_secret_key()  # Generate unique secret key
+        ))
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     db.commit()
-    db.refresh(user)
     return user
 
 
+def update_provider_type(db: Session, provider: User, provider_type: ProviderType) -> User:
+    """Change a provider's type; its linked clients' cached provider lists show it, so they are invalidated"""
+    if provider.role != UserRole.PROVIDER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Only providers can set provider type"
+        )
+    
+    provider.provider_type = provider_type
+    client_ids = db.query(UserProvider.user_id).filter(UserProvider.provider_id == provider.id).all()
+    invalidate_after_commit(db, [user_links_scope(client_id) for client_id, in client_ids])
+    db.commit()
+    return provider
+
+
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
@@ -58,3 +86,91 @@ def get_user_public_info(db: Session, user_id: int) -> User:
             detail="User not found"
         )
     return user
+
+
+def get_users_public_info(db: Session, user_ids: List[int]) -> List[dict]:
+    """
+    Get public user information for many user IDs with one IN query for the ids not already cached.
+    Returns profiles in request order; unknown ids are skipped.
+    """
+    if len(user_ids) > settings.PUBLIC_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PUBLIC_LOOKUP_MAX_IDS} ids per request"
+        )
+    unique_ids = list(dict.fromkeys(user_ids))
+    profiles = {}
+    missing = []
+    for user_id in unique_ids:
+        profile = _public_profiles.get(user_id)
+        if profile is None:
+            missing.append(user_id)
+        else:
+            profiles[user_id] = profile
+
+    if missing:
+        rows = db.query(User.id, User.name, User.email).filter(User.id.in_(missing)).all()
+        for row in rows:
+            profile = {"id": row.id, "name": row.name, "email": row.email}
+            _public_profiles.set(row.id, profile)
+            profiles[row.id] = profile
+
+    return [profiles[user_id] for user_id in unique_ids if user_id in profiles]
+
+
+def _encode_cursor(key: str, user_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key, user_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        key, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(key, str) or not isinstance(user_id, int):
+            raise ValueError
+        return key, user_id
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def search_users(db: Session, provider: User, query: str, field: str = "name", limit: int = 20, cursor: Optional[str] = None) -> dict:
+    """
+    Find role USER accounts whose name or email starts with `query` (case-insensitive), for providers adding clients.
+    Each page is one range scan of the partial (lower(field), id) index; pass `next_cursor` back to continue.
+    """
+    if provider.role != UserRole.PROVIDER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only providers can search users"
+        )
+    prefix = query.strip().lower()
+    if len(prefix) < settings.USER_SEARCH_MIN_PREFIX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search needs at least {settings.USER_SEARCH_MIN_PREFIX} characters"
+        )
+
+    column = User.email if field == "email" else User.name
+    key = func.lower(column)
+    if db.get_bind().dialect.name == "postgresql":
+        key = key.collate("C")  # Match the index collation
+    # Range instead of LIKE so both SQLite and Postgres can use the expression index
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    rows = db.query(User.id, User.name, User.email, key.label("sort_key")).filter(
+        text(f"users.{USER_SEARCH_ROLE_FILTER}"),  # Literal so the partial index applies
+        key >= prefix,
+        key < upper
+    )
+    if cursor is not None:
+        last_key, last_id = _decode_cursor(cursor)
+        rows = rows.filter(tuple_(key, User.id) > tuple_(last_key, last_id))
+    rows = rows.order_by(key, User.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].sort_key, rows[-1].id)
+    return {
+        "items": [{"id": row.id, "name": row.name, "email": row.email} for row in rows],
+        "next_cursor": next_cursor
+    }
@@ -1,22 +1,54 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from typing import List
+from app.core.events import publish_after_commit
+from app.core.writes import insert_returning
 from app.models.user import User, UserRole
 from app.models.user_provider import UserProvider, LinkStatus
+from app.services.versioning import bump_version, provider_links_scope, user_links_scope
+
+
+def link_topic(user: User) -> str:
+    """Stream a user or provider receives link events on"""
+    if user.role == UserRole.USER:
+        return f"links:user:{user.id}"
+    if user.role == UserRole.PROVIDER:
+        return f"links:provider:{user.id}"
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only users and providers have link streams")
+
+
+def _publish_link_event(db: Session, link: UserProvider, client: User, provider: User, kind: str):
+    # Published after commit; carries both parties so clients need no follow-up lookups
+    publish_after_commit(db, [f"links:user:{client.id}", f"links:provider:{provider.id}"], {
+        "event": kind,
+        "data": {
+            "link_id": link.id,
+            "user_id": client.id,
+            "user_name": client.name,
+            "user_email": client.email,
+            "provider_id": provider.id,
+            "provider_name": provider.name,
+            "provider_email": provider.email,
+            "status": link.status.value,
+            "created_at": link.created_at.isoformat() if link.created_at else None
+        }
+    })
 
 
 def link_user_provider(db: Session, provider: User, client: User):
     # Authorization: provider must be Provider role
     if provider.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only providers can link clients")
-    # Prevent duplicate
-    existing = db.query(UserProvider).filter(UserProvider.user_id == client.id, UserProvider.provider_id == provider.id).first()
-    if existing:
-        return existing
-    link = UserProvider(user_id=client.id, provider_id=provider.id, status=LinkStatus.PENDING)
-    db.add(link)
+    # uq_user_provider rejects a second link for the pair
+    try:
+        link = insert_returning(db, UserProvider, dict(user_id=client.id, provider_id=provider.id, status=LinkStatus.PENDING))
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provider is already linked with this user")
+    _publish_link_event(db, link, client, provider, "link.invited")
+    bump_version(db, provider_links_scope(provider.id), user_links_scope(client.id))
     db.commit()
-    db.refresh(link)
     return link
 
 
@@ -32,7 +64,7 @@ def get_client_providers(db: Session, client: User):
 
 def get_user_invitations(db: Session, user: User) -> List[UserProvider]:
     """Get all pending invitations for a user"""
-    return db.query(UserProvider).filter(
+    return db.query(UserProvider).options(joinedload(UserProvider.provider)).filter(
         UserProvider.user_id == user.id,
         UserProvider.status == LinkStatus.PENDING
     ).all()
@@ -42,12 +74,12 @@ def get_provider_applications(db: Session, provider: User) -> List[UserProvider]
     """Get all applications (pending and decided) for a provider"""
     if provider.role != UserRole.PROVIDER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a provider")
-    return db.query(UserProvider).filter(UserProvider.provider_id == provider.id).all()
+    return db.query(UserProvider).options(joinedload(UserProvider.user)).filter(UserProvider.provider_id == provider.id).all()
 
 
 def update_link_status(db: Session, link_id: int, user: User, new_status: LinkStatus) -> UserProvider:
     """Update the status of a user-provider link"""
-    link = db.query(UserProvider).filter(UserProvider.id == link_id).first()
+    link = db.query(UserProvider).options(joinedload(UserProvider.provider)).filter(UserProvider.id == link_id).first()
     if not link:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link not found")
     
@@ -60,6 +92,8 @@ def update_link_status(db: Session, link_id: int, user: User, new_status: LinkSt
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Can only update pending invitations")
     
     link.status = new_status
+    if new_status != LinkStatus.PENDING:
+        _publish_link_event(db, link, user, link.provider, f"link.{new_status.value}")
+    bump_version(db, provider_links_scope(link.provider_id), user_links_scope(link.user_id))
     db.commit()
-    db.refresh(link)
     return link
@@ -0,0 +1,48 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.core.writes import upsert_statement
+from app.models.resource_version import ResourceVersion
+from app.utils.response_cache import invalidate_after_commit
+
+
+def pair_scope(user_id: int, provider_id: int) -> str:
+    return f"pair:{user_id}:{provider_id}"
+
+
+def provider_ledger_scope(provider_id: int) -> str:
+    # Any ledger write of the provider, across all of its clients
+    return f"ledger:provider:{provider_id}"
+
+
+def provider_links_scope(provider_id: int) -> str:
+    return f"links:provider:{provider_id}"
+
+
+def user_links_scope(user_id: int) -> str:
+    return f"links:user:{user_id}"
+
+
+def employers_scope(provider_id: int) -> str:
+    return f"employers:{provider_id}"
+
+
+def work_payments_scope(provider_id: int) -> str:
+    return f"work_payments:{provider_id}"
+
+
+def bump_version(db: Session, *scopes: str) -> None:
+    """Increment the change counter of each scope and invalidate responses cached under it. Does not commit."""
+    invalidate_after_commit(db, scopes)
+    now = datetime.utcnow()
+    for scope in scopes:
+        # One statement whether or not the row exists yet, also when two writers create it at once
+        statement = upsert_statement(db, ResourceVersion, dict(scope=scope, version=1, updated_at=now))
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[ResourceVersion.scope],
+            set_={"version": ResourceVersion.version + 1, "updated_at": now}
+        ))
+
+
+def get_version(db: Session, scope: str) -> int:
+    version = db.query(ResourceVersion.version).filter(ResourceVersion.scope == scope).scalar()
+    return version or 0
@@ -2,11 +2,24 @@ from datetime import datetime
 from decimal import Decimal
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import func, desc
 from typing import List, Optional
 from app.models.user import User, UserRole, ProviderType
 from app.models.employer import Employer
 from app.models.work_payment import WorkPayment
+from app.core.config import settings
+from app.core.write_pipeline import WriteOutcomeUnknown, group_writer
+from app.core.writes import insert_returning, update_returning
+from app.services.employer import get_employer
+from app.services.idempotency import mark_written
+from app.services.search import ranked_ids, in_id_order
+from app.services.versioning import bump_version, employers_scope, work_payments_scope
+
+
+def _bump_provider_versions(db: Session, provider_id: int):
+    # Employer listings include payment counts, so both scopes change
+    bump_version(db, work_payments_scope(provider_id), employers_scope(provider_id))
 
 
 def create_work_payment(
@@ -15,7 +28,8 @@ def create_work_payment(
     employer_id: int, 
     amount: Decimal, 
     description: Optional[str] = None,
-    payment_date: Optional[datetime] = None
+    payment_date: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None
 ) -> WorkPayment:
     """Create a new work payment received from an employer"""
     # Only PAYER providers can add work payments
@@ -32,16 +46,7 @@ def create_work_payment(
         )
     
     # Verify employer exists and belongs to this provider
-    employer = db.query(Employer).filter(
-        Employer.id == employer_id,
-        Employer.created_by == provider.id
-    ).first()
-    
-    if not employer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Employer not found"
-        )
+    employer = get_employer(db, provider, employer_id)
     
     # Validate amount
     if amount <= 0:
@@ -50,7 +55,7 @@ def create_work_payment(
             detail="Payment amount must be greater than 0"
         )
     
-    work_payment = WorkPayment(
+    values = dict(
         employer_id=employer_id,
         provider_id=provider.id,
         amount=amount,
@@ -58,15 +63,34 @@ def create_work_payment(
         payment_date=payment_date or datetime.utcnow()
     )
     
-    db.add(work_payment)
-    db.commit()
-    db.refresh(work_payment)
-    
-    # Load the employer relationship
-    work_payment = db.query(WorkPayment).options(joinedload(WorkPayment.employer)).filter(
-        WorkPayment.id == work_payment.id
-    ).first()
+    def record_created(session: Session, work_payment: WorkPayment):
+        _bump_provider_versions(session, work_payment.provider_id)
+        mark_written(session, provider.id, idempotency_key, work_payment.id)
+
+    if settings.GROUP_COMMIT_ENABLED:
+        # Committed by the background writer in a batch with other requests
+        try:
+            work_payment = group_writer.insert(WorkPayment, values, after_insert=record_created)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Work payment was not saved, the server is busy. Please retry.",
+                headers={"Retry-After": "1"}
+            )
+        except WriteOutcomeUnknown:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Work payment may not have been saved. Retry with the same Idempotency-Key, or check before recording it again.",
+                headers={"Retry-After": "5"}
+            )
+        set_committed_value(work_payment, "employer", employer)
+        return work_payment
     
+    work_payment = insert_returning(db, WorkPayment, values)
+    # The response shows the employer name; hand over the instance loaded above instead of a lazy load
+    set_committed_value(work_payment, "employer", employer)
+    record_created(db, work_payment)
+    db.commit()
     return work_payment
 
 
@@ -89,19 +113,25 @@ def get_provider_work_payments(db: Session, provider: User) -> List[WorkPayment]
     ).order_by(desc(WorkPayment.payment_date)).all()
 
 
+def search_work_payments(db: Session, provider: User, query: str, limit: int = 20, offset: int = 0) -> List[WorkPayment]:
+    """Search a provider's work payments by description, best match first"""
+    if provider.role != UserRole.PROVIDER or provider.provider_type != ProviderType.PAYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Only PAYER providers can access work payments"
+        )
+    
+    ids = ranked_ids(db, WorkPayment.__table__, ["description"], "provider_id", provider.id, query, limit, offset)
+    if not ids:
+        return []
+    payments = db.query(WorkPayment).options(joinedload(WorkPayment.employer)).filter(WorkPayment.id.in_(ids)).all()
+    return in_id_order(payments, ids)
+
+
 def get_employer_work_payments(db: Session, provider: User, employer_id: int) -> List[WorkPayment]:
     """Get all work payments from a specific employer"""
     # Verify employer belongs to this provider
-    employer = db.query(Employer).filter(
-        Employer.id == employer_id,
-        Employer.created_by == provider.id
-    ).first()
-    
-    if not employer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Employer not found"
-        )
+    get_employer(db, provider, employer_id)
     
     return db.query(WorkPayment).options(joinedload(WorkPayment.employer)).filter(
         WorkPayment.employer_id == employer_id,
@@ -134,30 +164,38 @@ def update_work_payment(
     payment_date: Optional[datetime] = None
 ) -> WorkPayment:
     """Update a work payment"""
-    payment = get_work_payment(db, provider, payment_id)
-    
+    values = {}
     if amount is not None:
         if amount <= 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
                 detail="Payment amount must be greater than 0"
             )
-        payment.amount = amount
+        values["amount"] = amount
     
     if description is not None:
-        payment.description = description
+        values["description"] = description
         
     if payment_date is not None:
-        payment.payment_date = payment_date
+        values["payment_date"] = payment_date
     
-    db.commit()
-    db.refresh(payment)
+    if not values:
+        return get_work_payment(db, provider, payment_id)
     
-    # Reload with employer relationship
-    payment = db.query(WorkPayment).options(joinedload(WorkPayment.employer)).filter(
-        WorkPayment.id == payment.id
-    ).first()
+    # Ownership is part of the WHERE clause, so no row back means not found
+    payment = update_returning(db, WorkPayment, [
+        WorkPayment.id == payment_id,
+        WorkPayment.provider_id == provider.id
+    ], values)
     
+    if not payment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="Work payment not found"
+        )
+    
+    _bump_provider_versions(db, provider.id)
+    db.commit()
     return payment
 
 
@@ -166,6 +204,7 @@ def delete_work_payment(db: Session, provider: User, payment_id: int) -> bool:
     payment = get_work_payment(db, provider, payment_id)
     
     db.delete(payment)
+    _bump_provider_versions(db, provider.id)
     db.commit()
     return True
 
@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import Response, status
+from sqlalchemy.orm import Session
+from app.services.versioning import get_version
+
+
+def make_etag(scope: str, variant: str, version: int) -> str:
+    return f'W/"{variant}:{scope}:{version}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: ignore the W/ prefix on either side
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((c[2:] if c.startswith("W/") else c) == bare for c in candidates)
+
+
+def conditional_response(db: Session, scope: str, variant: str, if_none_match: Optional[str], response: Response) -> Optional[Response]:
+    """
+    Resolve the current ETag for `scope` from its version counter.
+    Returns a 304 response when the client's copy is current; otherwise sets ETag on `response` and returns None.
+    Call it after authorization and before loading the data.
+    """
+    etag = make_etag(scope, variant, get_version(db, scope))
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
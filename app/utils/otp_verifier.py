@@ -0,0 +1,92 @@
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+_COUNTER = struct.Struct(">Q")
+_TRUNCATED = struct.Struct(">I")
+
+
+def totp_code(mac: "hmac.HMAC", counter: int) -> str:
+    """6-digit code for `counter` from a keyed HMAC-SHA1 (the prepared object is copied, not consumed)"""
+    h = mac.copy()
+    h.update(_COUNTER.pack(counter))
+    digest = h.digest()
+    offset = digest[-1] & 0xF
+    binary_code = _TRUNCATED.unpack_from(digest, offset)[0] & 0x7FFFFFFF
+    return f"{binary_code % 1000000:06d}"
+
+
+class OTPVerifier:
+    """
+    Verifies time-based codes produced by `generate_verification_code`.
+    - Accepts codes from up to `drift_steps` steps before or after the current one
+    - Rejects a second use of the same (user, step) while it is still inside the window
+    - Keeps keyed HMAC objects for recently seen secrets so the key schedule is not rebuilt per request
+    """
+
+    def __init__(
+        self,
+        step_seconds: int = 60,
+        drift_steps: int = 1,
+        secret_cache_size: int = 10000,
+        replay_cache_size: int = 100000
+    ):
+        self.step_seconds = step_seconds
+        self.drift_steps = drift_steps
+        self._keys = TTLCache(max_entries=secret_cache_size)
+        # A used step can only be replayed while it is still accepted, i.e. for (2 * drift + 1) steps
+        self._used = TTLCache(max_entries=replay_cache_size, ttl_seconds=step_seconds * (2 * drift_steps + 2))
+
+    def _mac(self, secret_key: str) -> "hmac.HMAC":
+        mac = self._keys.get(secret_key)
+        if mac is None:
+            mac = hmac.new(bytes.fromhex(secret_key), digestmod=hashlib.sha1)
+            self._keys.set(secret_key, mac)
+        return mac
+
+    def current_step(self, now: Optional[float] = None) -> int:
+        return int(time.time() if now is None else now) // self.step_seconds
+
+    def generate(self, secret_key: str, now: Optional[float] = None) -> str:
+        return totp_code(self._mac(secret_key), self.current_step(now))
+
+    def matching_step(self, secret_key: str, code: str, now: Optional[float] = None) -> Optional[int]:
+        """Step whose code equals `code` inside the drift window, or None"""
+        if not secret_key or not code:
+            return None
+        mac = self._mac(secret_key)
+        step = self.current_step(now)
+        # Check the current step first, then widen outwards
+        for delta in sorted(range(-self.drift_steps, self.drift_steps + 1), key=abs):
+            if hmac.compare_digest(totp_code(mac, step + delta), code):
+                return step + delta
+        return None
+
+    def verify(self, user_id: int, secret_key: str, code: str, now: Optional[float] = None) -> bool:
+        """True if `code` is valid for the user and has not been used before; marks it used"""
+        step = self.matching_step(secret_key, code, now)
+        if step is None:
+            return False
+        return self._used.add((user_id, step))
+
+    def release(self, user_id: int, secret_key: str, code: str, now: Optional[float] = None) -> None:
+        """Make a verified code usable again, for when the write it authorized was never made"""
+        step = self.matching_step(secret_key, code, now)
+        if step is not None:
+            self._used.pop((user_id, step))
+
+    def reset(self) -> None:
+        self._keys.clear()
+        self._used.clear()
+
+
+otp_verifier = OTPVerifier(
+    step_seconds=settings.OTP_STEP_SECONDS,
+    drift_steps=settings.OTP_DRIFT_STEPS,
+    secret_cache_size=settings.OTP_SECRET_CACHE_SIZE,
+    replay_cache_size=settings.OTP_REPLAY_CACHE_SIZE
+)
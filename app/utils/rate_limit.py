@@ -0,0 +1,46 @@
+import math
+import threading
+import time
+from typing import Callable, Hashable
+from fastapi import HTTPException, status
+from app.utils.cache import TTLCache
+
+
+class RateLimiter:
+    """
+    Fixed-window request limit per key (e.g. user id), kept in process memory.
+    Counters live in a bounded TTL cache so idle keys cost nothing once their window ends.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._counters = TTLCache(max_entries=max_keys, ttl_seconds=window_seconds, clock=clock)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def retry_after(self, key: Hashable) -> float:
+        """Count a request for `key`; returns 0 if allowed, else seconds until the window resets"""
+        now = self._clock()
+        window = int(now // self.window_seconds)
+        with self._lock:
+            counter = self._counters.get((key, window))
+            if counter is None:
+                counter = [0]
+                self._counters.set((key, window), counter)
+            counter[0] += 1
+            if counter[0] <= self.limit:
+                return 0.0
+            self.rejected += 1
+        return (window + 1) * self.window_seconds - now
+
+    def check(self, key: Hashable) -> None:
+        """Raise 429 with Retry-After once `key` exceeds the limit in the current window"""
+        wait = self.retry_after(key)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
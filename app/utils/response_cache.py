@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+
+class ResponseCache:
+    """
+    Serialized JSON responses keyed by (route, user id, params), evicted LRU by entry count and total bytes,
+    expired by TTL, and invalidated by tag (the same scopes that resource versions use, e.g. "employers:7").
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (body, tags, expires_at)
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: Hashable) -> None:
+        body, tags, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, body: bytes, tags: Iterable[str]) -> None:
+        if len(body) > self.max_bytes:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, tags, time.monotonic() + self.ttl_seconds)
+            self._bytes += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def cached_json_response(route: str, user_id: int, tags: Iterable[str], build: Callable[[], Any], **params) -> Response:
+    """
+    Return the cached response for (route, user_id, params) or build, serialize and cache it.
+    `build` returns the response data (models or lists of models); errors it raises are not cached.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return Response(content=json.dumps(jsonable_encoder(build())), media_type="application/json")
+    key = (route, user_id, tuple(sorted(params.items())))
+    body = response_cache.get(key)
+    if body is None:
+        body = json.dumps(jsonable_encoder(build())).encode()
+        response_cache.set(key, body, tags)
+    return Response(content=body, media_type="application/json")
+
+
+def invalidate_after_commit(db: Session, tags: Iterable[str]) -> None:
+    """Drop cached responses tagged with `tags` once the current transaction commits"""
+    db.info.setdefault("invalidate_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_pending_tags(session: Session) -> None:
+    tags = session.info.pop("invalidate_tags", None)
+    if tags:
+        response_cache.invalidate_tags(tags)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_tags(session: Session, transaction) -> None:
+    # Only when the outermost transaction ends without committing; rolling back a savepoint keeps
+    # what the rest of the unit of work queued
+    if transaction.parent is None:
+        session.info.pop("invalidate_tags", None)
@@ -1,23 +1,16 @@
 import hashlib
 import hmac
 import time
-import struct
 
-def generate_verification_code(secret_key):
+from app.core.config import settings
+from app.utils.otp_verifier import totp_code
+
+def generate_verification_code(secret_key, interval=None):
+    # Same step as the verifier (OTP_STEP_SECONDS), or codes stop verifying once the setting changes
+    interval = interval or settings.OTP_STEP_SECONDS
     key = bytes.fromhex(secret_key)
     
     current_time = int(time.time())
-    time_counter = current_time // 60  
-    
-    time_bytes = struct.pack(">Q", time_counter)
-    
-    hmac_hash = hmac.new(key, time_bytes, hashlib.sha1).digest()
+    time_counter = current_time // interval
     
-    offset = hmac_hash[-1] & 0xF
-    binary_code = struct.unpack(">I", hmac_hash[offset:offset + 4])[0]
-    binary_code = binary_code & 0x7FFFFFFF
-    
-    otp = binary_code % 1000000
-    print(f"Generated OTP: {otp:06d}")
-    return f"{otp:06d}"
-
+    return totp_code(hmac.new(key, digestmod=hashlib.sha1), time_counter)
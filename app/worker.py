@@ -0,0 +1,45 @@
+"""
+Background job worker.
+
+    python -m app.worker                      # run JOB_WORKER_PROCESSES worker processes
+    python -m app.worker --processes 4
+    python -m app.worker --drain              # run queued jobs in this process and exit
+    python -m app.worker --enqueue rollups.rebuild --payload '{"batch_size": 200}'
+"""
+import argparse
+import json
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.logging_setup import configure_logging
+from app.core.jobs import JobWorker, enqueue_job, run_worker_pool, tasks
+from app.models.types import verify_money_storage
+import app.services.tasks  # noqa: F401  registers the tasks
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run DebtMe background jobs")
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--drain", action="store_true", help="Run runnable jobs in this process until the queue is empty")
+    parser.add_argument("--enqueue", metavar="TASK", choices=sorted(tasks), help="Queue a job and exit")
+    parser.add_argument("--payload", default="{}", help="JSON keyword arguments for --enqueue")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    verify_money_storage(engine)
+
+    if args.enqueue:
+        db = SessionLocal()
+        try:
+            job = enqueue_job(db, args.enqueue, json.loads(args.payload))
+            db.commit()
+            print(job.id)
+        finally:
+            db.close()
+    elif args.drain:
+        print(JobWorker().run_pending())
+    else:
+        run_worker_pool(args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: work payment cash-flow analytics over a large payment history.
+Seeds one PAYER provider with N payments spread over 50 employers and 5 years, then times
+loading the columns from the database and the vectorized computation separately.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.cash_flow [payments] [budget_ms]
+
+Without DATABASE_URL a temporary SQLite file is used. Exits non-zero when a cold run exceeds the budget.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "cash_flow.db")
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.employer import Employer  # noqa: E402
+from app.models.user import User, UserRole, ProviderType  # noqa: E402
+from app.models.work_payment import WorkPayment  # noqa: E402
+from app.services.analytics import compute_cash_flow, get_cash_flow_analytics, load_payment_columns  # noqa: E402
+
+
+def _seed(payments: int) -> User:
+    db = SessionLocal()
+    provider = User(name="bench contractor", email=f"contractor{time.time_ns()}@bench.local", password="x",
+                    role=UserRole.PROVIDER, provider_type=ProviderType.PAYER)
+    db.add(provider)
+    db.flush()
+    employers = [Employer(name=f"employer {i}", created_by=provider.id) for i in range(50)]
+    db.add_all(employers)
+    db.flush()
+    employer_ids = [e.id for e in employers]
+
+    random.seed(11)
+    start = datetime.utcnow() - timedelta(days=5 * 365)
+    span = 5 * 365 * 86400
+    batch = []
+    for i in range(payments):
+        batch.append({
+            "employer_id": random.choice(employer_ids),
+            "provider_id": provider.id,
+            "amount": Decimal(random.randint(1000, 500000)).scaleb(-2),
+            "payment_date": start + timedelta(seconds=random.randrange(span)),
+            "created_at": start
+        })
+        if len(batch) == 50000:
+            db.execute(WorkPayment.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(WorkPayment.__table__.insert(), batch)
+    db.commit()
+    db.refresh(provider)
+    db.expunge(provider)
+    db.close()
+    return provider
+
+
+def main(payments: int = 1000000, budget_ms: float = 3000.0):
+    print(f"seeding {payments:,} payments on {os.environ['DATABASE_URL'].split('://')[0]} ...")
+    provider = _seed(payments)
+    db = SessionLocal()
+
+    start = time.perf_counter()
+    columns = load_payment_columns(db, provider.id)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    compute_cash_flow(columns, {}, date.today(), months=60, horizon=6)
+    compute_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    get_cash_flow_analytics(db, provider, months=60, horizon=6)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    get_cash_flow_analytics(db, provider, months=60, horizon=6)
+    cached_ms = (time.perf_counter() - start) * 1000
+    db.close()
+
+    print(f"load columns : {load_ms:>9.1f} ms")
+    print(f"compute      : {compute_ms:>9.1f} ms")
+    print(f"cold request : {cold_ms:>9.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"cached       : {cached_ms:>9.1f} ms")
+    if cold_ms > budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    args = [int(sys.argv[1])] if len(sys.argv) > 1 else []
+    if len(sys.argv) > 2:
+        args.append(float(sys.argv[2]))
+    main(*args)
@@ -0,0 +1,97 @@
+"""
+Parallel duplicate inserts against the uniqueness constraints.
+Fires the same employer create, link and signup from many threads at once: exactly one request per case
+must succeed, the others must get the usual 400 (or 503 when admission control sheds them), and only one
+row may exist afterwards.
+
+    python -m benchmarks.duplicate_inserts [threads]
+
+Uses a temporary SQLite database by default; set DATABASE_URL to run against Postgres, where the
+requests really overlap (SQLite serializes the writers but still interleaves the transactions).
+"""
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "duplicate_inserts.db")
+
+import app.core.database  # noqa: E402,F401  # loads the models in their normal order
+from fastapi.testclient import TestClient  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.employer import Employer  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.models.user_provider import UserProvider  # noqa: E402
+from app.services.user import create_user  # noqa: E402
+
+
+def fire(threads: int, method: str, url: str, **kwargs) -> Counter:
+    """Send the same request from `threads` threads released together; returns status code counts"""
+    barrier = threading.Barrier(threads)
+    codes = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        with TestClient(app) as client:
+            barrier.wait()
+            response = client.request(method, url, **kwargs)
+        with lock:
+            codes[response.status_code] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return codes
+
+
+def check(label: str, codes: Counter, rows: int) -> bool:
+    # 503 is admission control shedding the burst (auth has a small limit); those never reach the database
+    ok = codes[200] == 1 and codes[400] + codes[503] == sum(codes.values()) - 1 and codes[400] > 0 and rows == 1
+    print(f"{label}: {dict(codes)}, rows: {rows} -> {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main(threads: int = 16) -> int:
+    db = SessionLocal()
+    create_user(db, "admin", "admin@bench.example.com", "pw", UserRole.ADMIN)
+    db.close()
+    client = TestClient(app)
+
+    def login(email):
+        response = client.post("/auth/login", json={"email": email, "password": "pw"})
+        return {"Authorization": "Bearer " + response.json()["access_token"]}, response.json()["user"]
+
+    admin, _ = login("admin@bench.example.com")
+    client.post("/auth/provider", json={"name": "Shop", "email": "shop@bench.example.com", "password": "pw", "provider_type": "lender"}, headers=admin)
+    client.post("/auth/provider", json={"name": "Builder", "email": "builder@bench.example.com", "password": "pw", "provider_type": "payer"}, headers=admin)
+    client.post("/auth/register", json={"name": "Client", "email": "client@bench.example.com", "password": "pw"})
+    lender, _ = login("shop@bench.example.com")
+    payer, builder = login("builder@bench.example.com")
+    _, client_user = login("client@bench.example.com")
+
+    results = []
+    codes = fire(threads, "POST", "/employers/", json={"name": "Acme"}, headers=payer)
+    with SessionLocal() as db:
+        rows = db.query(Employer).filter(Employer.created_by == builder["id"], Employer.name == "Acme").count()
+    results.append(check("POST /employers/", codes, rows))
+
+    codes = fire(threads, "POST", "/links/link", json={"user_id": client_user["id"]}, headers=lender)
+    with SessionLocal() as db:
+        rows = db.query(UserProvider).filter(UserProvider.user_id == client_user["id"]).count()
+    results.append(check("POST /links/link", codes, rows))
+
+    codes = fire(threads, "POST", "/auth/register", json={"name": "Twin", "email": "twin@bench.example.com", "password": "pw"})
+    with SessionLocal() as db:
+        rows = db.query(User).filter(User.email == "twin@bench.example.com").count()
+    results.append(check("POST /auth/register", codes, rows))
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
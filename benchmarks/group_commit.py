@@ -0,0 +1,82 @@
+"""
+Benchmark: ledger inserts/sec with commit-per-request vs the group-commit writer.
+Simulates concurrent request threads inserting confirmed payments for one pair.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.group_commit [threads] [writes_per_thread]
+
+Without DATABASE_URL a temporary SQLite file is used.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "group_commit.db")
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.write_pipeline import GroupCommitWriter  # noqa: E402
+from app.models.transaction import Transaction, TransactionType, TransactionStatus  # noqa: E402
+from app.models.user import User, UserRole, ProviderType  # noqa: E402
+from app.services.rollup import record_confirmed_transaction  # noqa: E402
+
+
+def _setup_pair():
+    db = SessionLocal()
+    stamp = time.time_ns()
+    client = User(name="bench client", email=f"client{stamp}@bench.local", password="x", role=UserRole.USER)
+    provider = User(name="bench shop", email=f"shop{stamp}@bench.local", password="x", role=UserRole.PROVIDER, provider_type=ProviderType.LENDER)
+    db.add_all([client, provider])
+    db.commit()
+    pair = (client.id, provider.id)
+    db.close()
+    return pair
+
+
+def _values(pair):
+    return dict(user_id=pair[0], provider_id=pair[1], type=TransactionType.PAYMENT, amount=Decimal("1.00"), status=TransactionStatus.CONFIRMED)
+
+
+def _run(threads: int, per_thread: int, write_one) -> float:
+    workers = [threading.Thread(target=lambda: [write_one() for _ in range(per_thread)]) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * per_thread / (time.perf_counter() - start)
+
+
+def main(threads: int = 16, per_thread: int = 100):
+    pair = _setup_pair()
+
+    def commit_per_request():
+        db = SessionLocal()
+        tx = Transaction(**_values(pair))
+        db.add(tx)
+        db.flush()
+        record_confirmed_transaction(db, tx)
+        db.commit()
+        db.refresh(tx)
+        db.close()
+
+    print(f"{threads} threads x {per_thread} writes on {os.environ['DATABASE_URL'].split('://')[0]}")
+    print(f"commit per request       : {_run(threads, per_thread, commit_per_request):>10,.0f} writes/sec")
+
+    for max_batch, latency_ms in ((16, 2.0), (64, 5.0), (256, 10.0)):
+        writer = GroupCommitWriter(max_batch_size=max_batch, max_latency_ms=latency_ms)
+
+        def grouped():
+            writer.submit(Transaction, _values(pair), after_insert=record_confirmed_transaction).result(timeout=30)
+
+        rate = _run(threads, per_thread, grouped)
+        writer.stop()
+        stats = writer.stats()
+        print(f"group commit {max_batch:>3}/{latency_ms:>4}ms : {rate:>10,.0f} writes/sec (avg batch {stats['avg_batch_size']:.1f})")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
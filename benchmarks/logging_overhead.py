@@ -0,0 +1,103 @@
+"""
+Benchmark: time the request thread spends on logging per request.
+Compares the old stdout prints on the login path, a JSON handler writing synchronously on the request
+thread, and the queued setup the app uses now (QueueHandler on the request thread, formatting and I/O on the
+listener thread). Each "request" emits two records, an app record and the access record, once into a plain
+file and once into a file that is fsynced per record to stand in for a slow sink.
+
+    python -m benchmarks.logging_overhead [requests]
+
+Files are temporary and flushed per record like stderr is. With a fast sink both JSON paths cost about
+the same (the listener competes for the GIL); the queue pays off when the sink blocks.
+"""
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Unbounded, so no record is dropped and every one of them is really written
+os.environ["LOG_QUEUE_SIZE"] = "0"
+
+from app.core.logging_setup import JsonFormatter, RequestIdFilter, queued, request_id, stop_logging  # noqa: E402
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+class _SyncedFile:
+    """A file whose flush also fsyncs: stands in for a slow sink (network disk, a full stderr pipe)"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "a")
+
+    def write(self, text: str) -> None:
+        self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+
+def _file_handler(path: str, synced: bool) -> logging.Handler:
+    handler = logging.StreamHandler(_SyncedFile(path) if synced else open(path, "a"))
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def run(emit, requests: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for index in range(requests):
+            token = request_id.set(f"{index:032x}")
+            emit(index)
+            request_id.reset(token)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+def _emit(logger: logging.Logger):
+    def emit(index):
+        logger.info("Login for user %s", index)
+        logger.info("POST /auth/login 200", extra={"status": 200, "duration_ms": 1.0})
+    return emit
+
+
+def main(requests: int = 5000):
+    directory = tempfile.mkdtemp()
+    hashed = "$2b$12$" + "x" * 53
+
+    with open(os.path.join(directory, "stdout.log"), "a") as stdout, contextlib.redirect_stdout(stdout):
+        def prints(index):
+            print(hashed)
+            print("pw")
+            sys.stdout.flush()
+        print_us = run(prints, requests)
+
+    print(f"{'logging path':<32} {'us/request':>11}")
+    print(f"{'prints to a file (before)':<32} {print_us:>11.2f}")
+    for synced in (False, True):
+        sink = "fsynced file" if synced else "file"
+        sync_handler = _file_handler(os.path.join(directory, f"sync-{sink}.log"), synced)
+        sync_handler.addFilter(RequestIdFilter())
+        sync_us = run(_emit(_logger(f"bench.sync.{synced}", sync_handler)), requests)
+
+        handler = queued(_file_handler(os.path.join(directory, f"queued-{sink}.log"), synced))
+        queued_us = run(_emit(_logger(f"bench.queued.{synced}", handler)), requests)
+        drain_start = time.perf_counter()
+        stop_logging()  # Wait for the listener to write what is left
+        drain_s = time.perf_counter() - drain_start
+
+        print(f"{'JSON, synchronous, ' + sink:<32} {sync_us:>11.2f}")
+        print(f"{'JSON, queued (now), ' + sink:<32} {queued_us:>11.2f}   (listener finished {drain_s:.2f}s later, {handler.dropped} dropped)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
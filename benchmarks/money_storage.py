@@ -0,0 +1,71 @@
+"""
+Benchmark: NUMERIC(12, 2) vs BIGINT minor-unit money storage.
+Measures a grouped SUM aggregate and fetching + serializing rows through the Money type.
+
+    python -m benchmarks.money_storage [rows]
+
+Uses an in-memory SQLite database by default; pass BENCH_DATABASE_URL to run against Postgres.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, func, select
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "money_storage.db")
+
+import app.core.database  # noqa: E402,F401  # loads the models in their normal order
+from app.models.types import Money  # noqa: E402
+
+
+class AmountRead(BaseModel):
+    id: int
+    pair: int
+    amount: Decimal
+
+
+def _timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(rows: int = 200000):
+    engine = create_engine(os.environ.get("BENCH_DATABASE_URL", "sqlite://"))
+    metadata = MetaData()
+    tables = {
+        "numeric": Table("bench_money_numeric", metadata, Column("id", Integer, primary_key=True), Column("pair", Integer), Column("amount", Money(minor_units=False))),
+        "minor_units": Table("bench_money_minor", metadata, Column("id", Integer, primary_key=True), Column("pair", Integer), Column("amount", Money(minor_units=True))),
+    }
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    random.seed(7)
+    data = [{"id": i, "pair": i % 500, "amount": Decimal(random.randint(1, 10000000)).scaleb(-2)} for i in range(1, rows + 1)]
+    with engine.begin() as conn:
+        for table in tables.values():
+            conn.execute(table.insert(), data)
+
+    print(f"rows: {rows}")
+    for name, table in tables.items():
+        with engine.connect() as conn:
+            aggregate = _timed(lambda: conn.execute(select(table.c.pair, func.sum(table.c.amount)).group_by(table.c.pair)).all())
+            fetch = _timed(lambda: conn.execute(select(table.c.id, table.c.pair, table.c.amount)).all(), repeat=3)
+            result = conn.execute(select(table.c.id, table.c.pair, table.c.amount)).all()
+            serialize = _timed(lambda: [AmountRead(id=r.id, pair=r.pair, amount=r.amount).model_dump_json() for r in result], repeat=3)
+            total = conn.execute(select(func.sum(table.c.amount))).scalar()
+        print(f"{name:>12}: grouped SUM {aggregate * 1000:8.1f} ms | fetch {fetch * 1000:8.1f} ms | serialize {serialize * 1000:8.1f} ms | total={total}")
+
+    metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: OTP verifications per second.
+Compares the original per-request path (rebuild the HMAC key, exact step only)
+with OTPVerifier (cached keyed HMAC, +/- drift window, replay cache).
+
+    python -m benchmarks.otp_verifier [iterations]
+"""
+import secrets as token_source
+import sys
+import time
+
+from app.utils.verification_code_gener import generate_verification_code
+from app.utils.otp_verifier import OTPVerifier
+
+
+def _rate(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    fn(iterations)
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations: int = 100000):
+    secrets = [token_source.token_hex(16) for _ in range(1000)]
+    now = time.time()
+
+    def legacy(n):
+        for i in range(n):
+            secret = secrets[i % len(secrets)]
+            generate_verification_code(secret) == "000000"
+
+    verifier = OTPVerifier(drift_steps=1)
+    codes = [verifier.generate(s, now) for s in secrets]
+
+    def cached(n):
+        for i in range(n):
+            j = i % len(secrets)
+            verifier.matching_step(secrets[j], codes[j], now)
+
+    def cached_miss(n):
+        # Worst case: wrong code, every step in the window is computed
+        for i in range(n):
+            verifier.matching_step(secrets[i % len(secrets)], "000000", now)
+
+    def replay(n):
+        verifier.reset()
+        for i in range(n):
+            j = i % len(secrets)
+            verifier.verify(j, secrets[j], codes[j], now)
+
+    print(f"iterations: {iterations}")
+    print(f"legacy generate+compare : {_rate(legacy, iterations):>12,.0f} verifications/sec")
+    print(f"verifier (hit, step 0)  : {_rate(cached, iterations):>12,.0f} verifications/sec")
+    print(f"verifier (miss, 3 steps): {_rate(cached_miss, iterations):>12,.0f} verifications/sec")
+    print(f"verifier + replay cache : {_rate(replay, iterations):>12,.0f} verifications/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
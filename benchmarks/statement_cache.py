@@ -0,0 +1,105 @@
+"""
+Benchmark: per-query Python overhead of the hot lookups, rebuilt with db.query(...).filter(...) on every
+call (before) vs the module-level select() constructs with bound parameters the services use now (after).
+
+    python -m benchmarks.statement_cache [calls]
+
+Runs against a small temporary SQLite database so the time is dominated by statement construction,
+cache-key generation and result processing rather than by the database.
+"""
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "statement_cache.db")
+
+import app.core.database  # noqa: E402,F401  # loads the models in their normal order
+from sqlalchemy import case, func  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.writes import insert_returning  # noqa: E402
+from app.models.balance_snapshot import BalanceSnapshot  # noqa: E402
+from app.models.employer import Employer  # noqa: E402
+from app.models.transaction import Transaction, TransactionType, TransactionStatus  # noqa: E402
+from app.models.user import User, UserRole, ProviderType  # noqa: E402
+from app.models.user_provider import UserProvider, LinkStatus  # noqa: E402
+from app.services.employer import _owned_employer  # noqa: E402
+from app.services.snapshot import _pair_snapshot, _pair_totals  # noqa: E402
+from app.services.transaction import _link_id  # noqa: E402
+from app.utils.dependencies import _user_by_id  # noqa: E402
+
+
+def _seed():
+    db = SessionLocal()
+    provider = insert_returning(db, User, dict(name="Shop", email="shop@bench.example.com", password="x", role=UserRole.PROVIDER, provider_type=ProviderType.PAYER, secret_key="s"))
+    client = insert_returning(db, User, dict(name="Client", email="client@bench.example.com", password="x", role=UserRole.USER, secret_key="s"))
+    insert_returning(db, UserProvider, dict(user_id=client.id, provider_id=provider.id, status=LinkStatus.APPROVED))
+    employer = insert_returning(db, Employer, dict(name="Acme", created_by=provider.id))
+    for i in range(20):
+        db.add(Transaction(user_id=client.id, provider_id=provider.id, type=TransactionType.DEBT if i % 2 else TransactionType.PAYMENT, status=TransactionStatus.CONFIRMED, amount=Decimal("5.00")))
+    db.commit()
+    ids = {"user_id": client.id, "provider_id": provider.id, "employer_id": employer.id}
+    db.close()
+    return ids
+
+
+def before(ids):
+    p = ids["provider_id"]
+    u = ids["user_id"]
+    return {
+        "current user": lambda db: db.query(User).filter(User.id == p).first(),
+        "link exists": lambda db: db.query(UserProvider).filter(UserProvider.user_id == u, UserProvider.provider_id == p).first(),
+        "balance snapshot": lambda db: db.query(BalanceSnapshot).filter(BalanceSnapshot.user_id == u, BalanceSnapshot.provider_id == p).first(),
+        "balance sums": lambda db: db.query(
+            func.coalesce(func.sum(case((Transaction.type == TransactionType.DEBT, Transaction.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((Transaction.type == TransactionType.PAYMENT, Transaction.amount), else_=0)), 0)
+        ).filter(
+            Transaction.user_id == u, Transaction.provider_id == p,
+            Transaction.status == TransactionStatus.CONFIRMED, Transaction.id > 0
+        ).one(),
+        "employer owner": lambda db: db.query(Employer).filter(Employer.id == ids["employer_id"], Employer.created_by == p).first(),
+    }
+
+
+def after(ids):
+    p = ids["provider_id"]
+    u = ids["user_id"]
+    return {
+        "current user": lambda db: db.scalars(_user_by_id, {"user_id": p}).first(),
+        "link exists": lambda db: db.execute(_link_id, {"user_id": u, "provider_id": p}).first(),
+        "balance snapshot": lambda db: db.scalars(_pair_snapshot, {"user_id": u, "provider_id": p}).first(),
+        "balance sums": lambda db: db.execute(_pair_totals, {"user_id": u, "provider_id": p, "after_id": 0}).one(),
+        "employer owner": lambda db: db.scalars(_owned_employer, {"employer_id": ids["employer_id"], "provider_id": p}).first(),
+    }
+
+
+def _per_call(fn, calls: int) -> float:
+    db = SessionLocal()
+    try:
+        for _ in range(50):
+            fn(db)  # Warm the compiled-statement cache
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(calls):
+                fn(db)
+            best = min(best, time.perf_counter() - start)
+        return best / calls * 1e6
+    finally:
+        db.close()
+
+
+def main(calls: int = 5000):
+    ids = _seed()
+    old, new = before(ids), after(ids)
+    print(f"{'query':<18} {'before (us)':>12} {'after (us)':>12} {'saved':>7}")
+    for name in old:
+        old_us = _per_call(old[name], calls)
+        new_us = _per_call(new[name], calls)
+        print(f"{name:<18} {old_us:>12.1f} {new_us:>12.1f} {1 - new_us / old_us:>7.0%}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
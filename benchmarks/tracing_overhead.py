@@ -0,0 +1,78 @@
+"""
+Benchmark: per-request cost of tracing.
+Times the same authenticated balance read with tracing off, enabled but sampled out (ratio 0) and
+sampling every request (ratio 1, in-memory exporter). Settings are read at startup, so each mode runs in
+its own interpreter.
+
+    python -m benchmarks.tracing_overhead [requests]
+
+Uses a temporary SQLite database per mode.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "off": {"TRACING_ENABLED": "false"},
+    "sampled out": {"TRACING_ENABLED": "true", "TRACING_SAMPLE_RATIO": "0"},
+    "every request": {"TRACING_ENABLED": "true", "TRACING_SAMPLE_RATIO": "1", "TRACING_EXPORTER": "memory"},
+}
+
+
+def measure(requests: int) -> float:
+    """Best-of-three microseconds per GET /transactions/balance in this process's configuration"""
+    import app.core.database  # noqa: F401  # loads the models in their normal order
+    from fastapi.testclient import TestClient
+    from app.core.database import SessionLocal
+    from app.core.writes import insert_returning
+    from app.main import app
+    from app.models.user import UserRole
+    from app.models.user_provider import UserProvider, LinkStatus
+    from app.services.user import create_user
+
+    db = SessionLocal()
+    provider = create_user(db, "Shop", "shop@bench.example.com", "pw", UserRole.PROVIDER)
+    client_user = create_user(db, "Client", "client@bench.example.com", "pw", UserRole.USER)
+    insert_returning(db, UserProvider, dict(user_id=client_user.id, provider_id=provider.id, status=LinkStatus.APPROVED))
+    db.commit()
+    url = f"/transactions/balance/{client_user.id}/{provider.id}"
+    db.close()
+
+    client = TestClient(app)
+    token = client.post("/auth/login", json={"email": "client@bench.example.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": "Bearer " + token}
+    for _ in range(50):
+        assert client.get(url, headers=headers).status_code == 200
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get(url, headers=headers)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+def main(requests: int = 1000):
+    results = {}
+    for label, env in MODES.items():
+        env = dict(os.environ, **env)
+        env["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tracing_overhead.db")
+        env["ADMISSION_ENABLED"] = "false"
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.tracing_overhead", "--measure", str(requests)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results[label] = float(output.strip().splitlines()[-1])
+    base = results["off"]
+    print(f"{'tracing':<14} {'us/request':>11} {'overhead':>9}")
+    for label, per_request in results.items():
+        print(f"{label:<14} {per_request:>11.1f} {per_request / base - 1:>9.1%}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        print(measure(int(sys.argv[2])))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:]))
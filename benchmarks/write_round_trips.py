@@ -0,0 +1,109 @@
+"""
+Statements per write endpoint.
+Runs each create/update endpoint once through the app and lists the SQL it sent. A created row must come
+back from its own INSERT ... RETURNING, and no endpoint may SELECT the table it wrote after the write
+(a refresh or a reload): either fails the run.
+
+    python -m benchmarks.write_round_trips
+
+Uses a temporary SQLite database (RETURNING needs SQLite 3.35+); set DATABASE_URL to run against Postgres.
+"""
+import os
+import re
+import sys
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "write_round_trips.db")
+
+import app.core.database  # noqa: E402,F401  # loads the models in their normal order
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+from app.services.user import create_user  # noqa: E402
+from app.utils.verification_code_gener import generate_verification_code  # noqa: E402
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _record(conn, cursor, statement, parameters, context, executemany):
+    statements.append(" ".join(statement.split()))
+
+
+def _verb_and_table(statement: str):
+    match = re.match(r"(INSERT INTO|UPDATE|DELETE FROM|SELECT .*? FROM) \"?(\w+)", statement)
+    if not match:
+        return statement.split(" ", 1)[0], ""
+    return match.group(1).split(" ", 1)[0], match.group(2)
+
+
+def run(client: TestClient, label: str, table: str, method: str, url: str, **kwargs) -> dict:
+    statements.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, (label, response.status_code, response.text)
+    sent = list(statements)
+
+    written_at = None
+    for index, statement in enumerate(sent):
+        verb, name = _verb_and_table(statement)
+        if verb in ("INSERT", "UPDATE") and name == table:
+            written_at = index
+            break
+    assert written_at is not None, (label, "no write to " + table, sent)
+    if sent[written_at].startswith("INSERT"):
+        assert "RETURNING" in sent[written_at], (label, sent[written_at])
+    reloads = [s for s in sent[written_at + 1:] if _verb_and_table(s) == ("SELECT", table)]
+
+    print(f"{label}: {len(sent)} statements")
+    for statement in sent:
+        print("    " + statement[:110])
+    if reloads:
+        print(f"    FAIL: {table} read again after its write")
+    return {"label": label, "statements": len(sent), "reloads": len(reloads), "json": response.json()}
+
+
+def main() -> int:
+    db = SessionLocal()
+    create_user(db, "admin", "admin@bench.example.com", "pw", UserRole.ADMIN)
+    db.close()
+    client = TestClient(app)
+
+    def login(email):
+        response = client.post("/auth/login", json={"email": email, "password": "pw"})
+        return {"Authorization": "Bearer " + response.json()["access_token"]}, response.json()["user"]
+
+    admin, _ = login("admin@bench.example.com")
+    client.post("/auth/provider", json={"name": "Shop", "email": "shop@bench.example.com", "password": "pw", "provider_type": "lender"}, headers=admin)
+    client.post("/auth/provider", json={"name": "Builder", "email": "builder@bench.example.com", "password": "pw", "provider_type": "payer"}, headers=admin)
+    client.post("/auth/register", json={"name": "Client", "email": "client@bench.example.com", "password": "pw"})
+    lender, _ = login("shop@bench.example.com")
+    payer, _ = login("builder@bench.example.com")
+    user, client_user = login("client@bench.example.com")
+
+    results = []
+    link = run(client, "POST /links/link", "user_provider", "POST", "/links/link", json={"user_id": client_user["id"]}, headers=lender)
+    results.append(link)
+    results.append(run(client, "PUT /links/invitations/{id}/status", "user_provider", "PUT", f"/links/invitations/{link['json']['id']}/status", json={"status": "approved"}, headers=user))
+    otp = generate_verification_code(client_user["secret_key"])
+    debt = run(client, "POST /transactions/ (debt)", "transactions", "POST", "/transactions/", json={"user_id": client_user["id"], "type": "debt", "amount": "10.00", "otp": otp}, headers=lender)
+    results.append(debt)
+    results.append(run(client, "POST /transactions/ (payment)", "transactions", "POST", "/transactions/", json={"user_id": client_user["id"], "type": "payment", "amount": "4.00"}, headers=lender))
+    employer = run(client, "POST /employers/", "employers", "POST", "/employers/", json={"name": "Acme", "contact_info": "Main st"}, headers=payer)
+    results.append(employer)
+    results.append(run(client, "PUT /employers/{id}", "employers", "PUT", f"/employers/{employer['json']['id']}", json={"name": "Acme Ltd"}, headers=payer))
+    payment = run(client, "POST /work-payments/", "work_payments", "POST", "/work-payments/", json={"employer_id": employer["json"]["id"], "amount": "120.00", "description": "roof"}, headers=payer)
+    results.append(payment)
+    results.append(run(client, "PUT /work-payments/{id}", "work_payments", "PUT", f"/work-payments/{payment['json']['id']}", json={"employer_id": employer["json"]["id"], "amount": "125.00"}, headers=payer))
+    results.append(run(client, "PUT /users/me/provider-type", "users", "PUT", "/users/me/provider-type", json={"provider_type": "lender"}, headers=payer))
+
+    failed = [result["label"] for result in results if result["reloads"]]
+    print()
+    print("FAIL: " + ", ".join(failed) if failed else "OK: every write returned its row without a reload")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
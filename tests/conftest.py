@@ -0,0 +1,74 @@
+"""
+Shared fixtures. The app runs against a temporary SQLite database created for the test session; the
+environment is set before anything from app/ is imported, since settings and the engine are built at import.
+"""
+import os
+import tempfile
+import threading
+import uuid
+from collections import Counter
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["ADMISSION_ENABLED"] = "false"  # Concurrency tests must reach the database, not be shed with 503
+os.environ["SLOW_QUERY_LOG_FILE"] = ""
+os.environ["LOG_ACCESS"] = "false"
+
+import pytest  # noqa: E402
+import app.core.database  # noqa: E402,F401  # loads the models in their normal order
+from fastapi.testclient import TestClient  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import UserRole, ProviderType  # noqa: E402
+from app.services.user import create_user  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user():
+    """Create a user and return (auth headers, user); every call gets a fresh email"""
+    def make(role: UserRole = UserRole.USER, provider_type: ProviderType = None):
+        db = SessionLocal()
+        try:
+            user = create_user(db, role.value, f"{uuid.uuid4().hex}@tests.example.com", "pw", role, provider_type)
+        finally:
+            db.close()
+        token = create_access_token(subject=str(user.id), role=user.role.value)
+        return {"Authorization": "Bearer " + token}, user
+    return make
+
+
+def _fire(threads: int, method: str, url: str, bodies=None, **kwargs) -> Counter:
+    """
+    Send `threads` requests released together by a barrier; `bodies` optionally gives each its own JSON
+    body and url. Returns the count of each status code.
+    """
+    barrier = threading.Barrier(threads)
+    codes = Counter()
+    lock = threading.Lock()
+
+    def worker(index):
+        request_url, request_kwargs = url, dict(kwargs)
+        if bodies is not None:
+            request_url, request_kwargs["json"] = bodies[index]
+        thread_client = TestClient(app)
+        barrier.wait()
+        response = thread_client.request(method, request_url, **request_kwargs)
+        with lock:
+            codes[response.status_code] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return codes
+
+
+@pytest.fixture
+def fire():
+    return _fire
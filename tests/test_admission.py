@@ -0,0 +1,103 @@
+"""Admission control: the excess is rejected at once with 503 + Retry-After, reads first, /health never"""
+import asyncio
+from app.core.admission import AUTH, HEALTH, READ, STREAM, WRITE, AdmissionController, AdmissionMiddleware, route_class
+from app.core.config import settings
+from app.models.user import UserRole
+
+
+def _controller(**limits) -> AdmissionController:
+    return AdmissionController(limits=limits, total_limit=4, read_share=0.5, retry_after_seconds=3)
+
+
+def test_route_classes():
+    assert route_class("GET", "/health") == HEALTH
+    assert route_class("GET", "/events/ledger") == STREAM
+    assert route_class("POST", "/auth/login") == AUTH
+    assert route_class("GET", "/transactions/flags") == READ
+    assert route_class("PUT", "/employers/1") == WRITE
+
+
+def test_reads_are_shed_before_writes():
+    controller = _controller()
+    assert controller.try_acquire(READ) and controller.try_acquire(WRITE)
+
+    assert not controller.try_acquire(READ)  # Half the budget is in flight
+    assert controller.try_acquire(WRITE) and controller.try_acquire(AUTH)
+    assert not controller.try_acquire(WRITE)
+    assert controller.try_acquire(HEALTH)
+
+    controller.release(WRITE)
+    assert controller.try_acquire(WRITE)
+    stats = controller.stats()["classes"]
+    assert (stats[READ]["shed"], stats[WRITE]["shed"], stats[WRITE]["peak"]) == (1, 1, 2)
+
+
+def test_class_limits_and_streams():
+    controller = _controller(**{AUTH: 1, STREAM: 2})
+    assert controller.try_acquire(AUTH)
+    assert not controller.try_acquire(AUTH)
+
+    assert controller.try_acquire(STREAM) and controller.try_acquire(STREAM)
+    assert not controller.try_acquire(STREAM)
+    # Open streams do not use the shared budget
+    assert controller.try_acquire(WRITE) and controller.try_acquire(WRITE) and controller.try_acquire(WRITE)
+
+
+def test_middleware_rejects_while_the_slot_is_held(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    controller = _controller(**{WRITE: 1})
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = AdmissionMiddleware(app, controller)
+        scope = {"type": "http", "method": "POST", "path": "/transactions/"}
+
+        async def request():
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+            await middleware(scope, None, send)
+            return sent
+
+        held = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        rejected = await request()
+        release.set()
+        return await held, rejected
+
+    held, rejected = asyncio.run(scenario())
+
+    assert held[0]["status"] == 200
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"3") in rejected[0]["headers"]
+    assert controller.in_flight[WRITE] == 0
+
+
+def test_disabled_middleware_admits_everything(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", False)
+    controller = _controller(**{WRITE: 0})
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    asyncio.run(AdmissionMiddleware(app, controller)({"type": "http", "method": "POST", "path": "/x"}, None, None))
+
+    assert calls == ["/x"]
+    assert controller.stats()["classes"][WRITE]["shed"] == 0
+
+
+def test_admission_stats_endpoint(client, make_user):
+    headers, _ = make_user(UserRole.ADMIN)
+
+    response = client.get("/admin/admission/stats", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["total_limit"] == settings.ADMISSION_TOTAL_LIMIT
@@ -0,0 +1,89 @@
+"""Debt aging: payments settle the oldest debts first, buckets are counted back from the report day, and reports are memoized until the next ledger write"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.core.database import SessionLocal
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import UserRole, ProviderType
+from app.services.aging import get_debt_aging
+
+
+def _add(db, provider, user, kind: TransactionType, amount: str, when: datetime, status=TransactionStatus.CONFIRMED):
+    db.add(Transaction(user_id=user.id, provider_id=provider.id, type=kind, status=status, amount=Decimal(amount), date=when))
+
+
+def test_report_for_a_past_day(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    with SessionLocal() as db:
+        _add(db, provider, user, TransactionType.DEBT, "100.00", datetime(2026, 12, 15, 10))
+        _add(db, provider, user, TransactionType.DEBT, "60.00", datetime(2027, 1, 20, 9))
+        _add(db, provider, user, TransactionType.PAYMENT, "25.00", datetime(2027, 1, 31, 23, 59))
+        _add(db, provider, user, TransactionType.DEBT, "500.00", datetime(2027, 1, 25), TransactionStatus.PENDING)
+        # After the report day
+        _add(db, provider, user, TransactionType.PAYMENT, "30.00", datetime(2027, 2, 1, 0, 0))
+        _add(db, provider, user, TransactionType.DEBT, "40.00", datetime(2027, 2, 3))
+        db.commit()
+
+        report = get_debt_aging(db, provider, date(2027, 1, 31))
+
+    [client] = report["clients"]
+    assert client["user_id"] == user.id
+    # The oldest debt absorbs the payment first
+    assert client["days_31_60"] == Decimal("75.00")
+    assert client["days_0_30"] == Decimal("60.00")
+    assert client["days_61_90"] == client["days_over_90"] == Decimal("0")
+    assert client["outstanding"] == report["totals"]["outstanding"] == Decimal("135.00")
+
+
+def test_fully_paid_clients_are_left_out(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    with SessionLocal() as db:
+        _add(db, provider, user, TransactionType.DEBT, "10.00", datetime(2027, 1, 1))
+        _add(db, provider, user, TransactionType.PAYMENT, "10.00", datetime(2027, 1, 2))
+        db.commit()
+
+        report = get_debt_aging(db, provider, date(2027, 1, 31))
+
+    assert report["clients"] == []
+    assert report["totals"]["outstanding"] == Decimal("0")
+
+
+def test_bucket_boundaries(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    as_of = date(2027, 6, 30)
+    with SessionLocal() as db:
+        for days_old, amount in [(30, "1.00"), (31, "2.00"), (60, "4.00"), (61, "8.00"), (90, "16.00"), (91, "32.00")]:
+            _add(db, provider, user, TransactionType.DEBT, amount, datetime(2027, 6, 30) - timedelta(days=days_old))
+        db.commit()
+
+        [client] = get_debt_aging(db, provider, as_of)["clients"]
+
+    assert [client[name] for name in ("days_0_30", "days_31_60", "days_61_90", "days_over_90")] == [
+        Decimal("1.00"), Decimal("6.00"), Decimal("24.00"), Decimal("32.00")
+    ]
+
+
+def test_report_is_rebuilt_after_a_ledger_write(client, make_user):
+    lender, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user_headers, user = make_user()
+    link = client.post("/links/link", json={"user_id": user.id}, headers=lender).json()
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user_headers)
+    with SessionLocal() as db:
+        _add(db, provider, user, TransactionType.DEBT, "50.00", datetime.utcnow() - timedelta(days=45))
+        db.commit()
+    # Inserted without a version bump, so the first report is built from it and then memoized
+    assert client.get("/providers/me/aging", headers=lender).json()["totals"]["outstanding"] == "50.00"
+
+    client.post("/transactions/", json={"user_id": user.id, "type": "payment", "amount": "20.00"}, headers=lender)
+
+    report = client.get("/providers/me/aging", headers=lender).json()
+    assert report["totals"]["outstanding"] == "30.00"
+    assert report["as_of"] == datetime.utcnow().date().isoformat()
+
+
+def test_only_lenders_have_aging(client, make_user):
+    payer, _ = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+
+    assert client.get("/providers/me/aging", headers=payer).status_code == 403
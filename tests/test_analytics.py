@@ -0,0 +1,95 @@
+"""Cash-flow analytics over work payments"""
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+from sqlalchemy import event, inspect
+from app.core.database import SessionLocal, engine
+from app.models.employer import Employer
+from app.models.user import UserRole, ProviderType
+from app.models.work_payment import WorkPayment
+from app.services.analytics import compute_cash_flow, get_cash_flow_analytics, load_payment_columns
+
+
+def _payer_with_payments(make_user):
+    _, payer = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    with SessionLocal() as db:
+        acme = Employer(name="Acme", created_by=payer.id)
+        globex = Employer(name="Globex", created_by=payer.id)
+        db.add_all([acme, globex])
+        db.flush()
+        for employer, amount, when in [
+            (acme, "100.00", datetime(2027, 1, 5)),
+            (globex, "50.50", datetime(2027, 1, 20)),
+            (acme, "200.00", datetime(2027, 3, 1)),
+            (acme, "10.00", datetime(2025, 6, 1)),  # Outside a three-month window
+        ]:
+            db.add(WorkPayment(employer_id=employer.id, provider_id=payer.id, amount=Decimal(amount), payment_date=when))
+        db.commit()
+        return payer, acme.id, globex.id
+
+
+def test_monthly_totals_and_intervals(make_user):
+    payer, acme, globex = _payer_with_payments(make_user)
+    with SessionLocal() as db:
+        result = get_cash_flow_analytics(db, payer, months=3, horizon=1, today=date(2027, 3, 15))
+
+    assert result["payment_count"] == 4
+    assert result["total_amount"] == Decimal("360.50")
+    assert [(month["month"], month["total"]) for month in result["monthly"]] == [
+        ("2027-01", Decimal("150.50")), ("2027-02", Decimal("0.00")), ("2027-03", Decimal("200.00"))
+    ]
+    assert result["monthly"][2]["moving_avg_3"] == Decimal("116.83")
+    assert {(row["employer_name"], row["month"], row["total"]) for row in result["employer_monthly"]} == {
+        ("Acme", "2027-01", Decimal("100.00")), ("Globex", "2027-01", Decimal("50.50")), ("Acme", "2027-03", Decimal("200.00"))
+    }
+    assert result["intervals"]["count"] == 3
+    assert len(result["forecast"]) == 1
+
+
+def test_payment_scan_goes_through_engine_events(make_user):
+    payer, _, _ = _payer_with_payments(make_user)
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            columns = load_payment_columns(db, payer.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert any("FROM work_payments" in statement for statement in seen)
+    assert columns["cents"].tolist() == [1000, 10000, 5050, 20000]  # Sorted by payment date
+
+
+def test_covering_index_exists_without_migrations():
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("work_payments")}
+    assert indexes["ix_work_payments_provider_date"] == ["provider_id", "payment_date", "employer_id", "amount"]
+
+
+def test_without_payments():
+    empty = {"employer_id": np.array([], dtype=np.int64), "seconds": np.array([], dtype=np.int64), "cents": np.array([], dtype=np.float64)}
+
+    result = compute_cash_flow(empty, {}, date(2027, 3, 15), months=2, horizon=2)
+
+    assert (result["payment_count"], result["total_amount"]) == (0, Decimal("0.00"))
+    assert [month["total"] for month in result["monthly"]] == [Decimal("0.00"), Decimal("0.00")]
+    assert result["employer_monthly"] == [] and result["forecast"] == []
+    assert result["intervals"] is None
+
+
+def test_analytics_refresh_after_a_work_payment(client, make_user):
+    payer, _ = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    lender, _ = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    employer = client.post("/employers/", json={"name": "Acme"}, headers=payer).json()
+    client.post("/work-payments/", json={"employer_id": employer["id"], "amount": "10.00"}, headers=payer)
+    assert client.get("/work-payments/analytics", params={"months": 1}, headers=payer).json()["payment_count"] == 1
+
+    client.post("/work-payments/", json={"employer_id": employer["id"], "amount": "15.00"}, headers=payer)
+
+    result = client.get("/work-payments/analytics", params={"months": 1}, headers=payer).json()
+    assert (result["payment_count"], result["total_amount"]) == (2, "25.00")
+    assert result["monthly"][-1]["month"] == datetime.utcnow().strftime("%Y-%m")  # The current UTC month
+    assert client.get("/work-payments/analytics", headers=lender).status_code == 403
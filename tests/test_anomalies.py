@@ -0,0 +1,104 @@
+"""Anomaly scan: scoring in chunks with carried pair stats matches one pass, and each run resumes at its high-water mark"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.anomaly import TransactionFlag
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.services.anomaly import AMOUNT_ZSCORE, DEBT_BURST, scan_anomalies, score_chunk
+
+SCORING = dict(zscore_threshold=3.0, min_history=5, burst_count=3, burst_window=600)
+
+
+def _chunk(rows):
+    """rows: (id, user_id, provider_id, seconds, cents)"""
+    table = np.array(rows, dtype=np.int64).reshape(-1, 5)
+    return {"id": table[:, 0], "user_id": table[:, 1], "provider_id": table[:, 2], "seconds": table[:, 3], "cents": table[:, 4].astype(np.float64)}
+
+
+def _reasons(flags):
+    return sorted((flag["transaction_id"], flag["reason"]) for flag in flags)
+
+
+HISTORY = [
+    # Pair (1, 2): five ordinary debts a day apart, then one far above them
+    *[(n, 1, 2, n * 86400, 10000 + n * 100) for n in range(1, 6)],
+    (6, 1, 2, 6 * 86400, 90000),
+    # Pair (3, 2): three debts inside ten minutes
+    (7, 3, 2, 100, 500), (8, 3, 2, 200, 500), (9, 3, 2, 300, 500),
+]
+
+
+def test_scores_unusual_amounts_and_bursts():
+    flags, stats = score_chunk(_chunk(HISTORY), {}, **SCORING)
+
+    assert _reasons(flags) == [(6, AMOUNT_ZSCORE), (9, DEBT_BURST)]
+    assert stats[(1, 2)][0] == 6
+    assert stats[(3, 2)][3] == [200, 300]  # The times a later debt needs to complete a burst
+
+
+def test_chunks_with_carried_stats_match_one_pass():
+    whole, whole_stats = score_chunk(_chunk(HISTORY), {}, **SCORING)
+
+    first, prior = score_chunk(_chunk(HISTORY[:4] + HISTORY[6:8]), {}, **SCORING)
+    second, split_stats = score_chunk(_chunk(HISTORY[4:6] + HISTORY[8:]), prior, **SCORING)
+
+    assert _reasons(first + second) == _reasons(whole)
+    assert split_stats[(1, 2)][:3] == pytest.approx(whole_stats[(1, 2)][:3])
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A database of its own: the scan's high-water mark covers every transaction in it"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'anomalies.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _debts(db, user_id, amounts, start):
+    for offset, amount in enumerate(amounts):
+        db.add(Transaction(
+            user_id=user_id, provider_id=100, type=TransactionType.DEBT, status=TransactionStatus.CONFIRMED,
+            amount=Decimal(amount), date=start + timedelta(hours=offset)
+        ))
+    db.commit()
+
+
+def test_scan_resumes_from_the_high_water_mark(db):
+    old = datetime.utcnow() - timedelta(days=10)
+    _debts(db, 1, ["100.00", "101.00", "99.00", "100.50", "100.00"], old)
+
+    first = scan_anomalies(db, chunk_size=2)
+    assert (first["scanned"], first["flagged"]) == (5, 0)
+    assert scan_anomalies(db)["scanned"] == 0
+
+    _debts(db, 1, ["2500.00"], old + timedelta(days=1))
+    second = scan_anomalies(db)
+
+    assert (second["scanned"], second["flagged"]) == (1, 1)
+    [flag] = db.query(TransactionFlag).all()
+    assert (flag.transaction_id, flag.reason) == (second["last_id"], AMOUNT_ZSCORE)
+
+
+def test_recent_rows_wait_for_a_later_run(db):
+    old = datetime.utcnow() - timedelta(days=1)
+    _debts(db, 1, ["10.00"], old)
+    _debts(db, 1, ["10.00"], datetime.utcnow())
+    _debts(db, 2, ["10.00"], old)  # Older date but a higher id: still behind the recent row
+
+    result = scan_anomalies(db)
+
+    assert result["scanned"] == 1
+    assert result["last_id"] == 1
+
+
+def test_flags_are_only_for_providers(client, make_user):
+    headers, _ = make_user()
+
+    assert client.get("/transactions/flags", headers=headers).status_code == 403
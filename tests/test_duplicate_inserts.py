@@ -0,0 +1,62 @@
+"""Concurrent duplicates hit the unique constraints and get a 400, never a 500 or a second row"""
+from app.core.database import SessionLocal
+from app.models.employer import Employer
+from app.models.user import UserRole, ProviderType
+
+THREADS = 8
+
+
+def _employer_count(provider_id: int, name: str) -> int:
+    with SessionLocal() as db:
+        return db.query(Employer).filter(Employer.created_by == provider_id, Employer.name == name).count()
+
+
+def test_concurrent_duplicate_employer_creates(fire, make_user):
+    headers, provider = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+
+    codes = fire(THREADS, "POST", "/employers/", json={"name": "Acme"}, headers=headers)
+
+    assert codes == {200: 1, 400: THREADS - 1}
+    assert _employer_count(provider.id, "Acme") == 1
+
+
+def test_rename_to_existing_name(client, make_user):
+    headers, provider = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    client.post("/employers/", json={"name": "Acme"}, headers=headers)
+    other = client.post("/employers/", json={"name": "Other"}, headers=headers).json()
+
+    response = client.put(f"/employers/{other['id']}", json={"name": "Acme"}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Employer with this name already exists"
+    assert _employer_count(provider.id, "Acme") == 1
+    assert _employer_count(provider.id, "Other") == 1
+
+
+def test_concurrent_renames_to_the_same_name(client, fire, make_user):
+    headers, provider = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    ids = [client.post("/employers/", json={"name": f"Employer {index}"}, headers=headers).json()["id"] for index in range(THREADS)]
+
+    codes = fire(THREADS, "PUT", None, bodies=[(f"/employers/{employer_id}", {"name": "Same"}) for employer_id in ids], headers=headers)
+
+    assert codes == {200: 1, 400: THREADS - 1}
+    assert _employer_count(provider.id, "Same") == 1
+
+
+def test_concurrent_duplicate_links(client, fire, make_user):
+    headers, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+
+    codes = fire(THREADS, "POST", "/links/link", json={"user_id": user.id}, headers=headers)
+
+    assert codes == {200: 1, 400: THREADS - 1}
+    response = client.get("/links/applications", headers=headers)
+    assert [link["user_id"] for link in response.json()] == [user.id]
+
+
+def test_concurrent_duplicate_signups(fire):
+    body = {"name": "Twin", "email": "twin@tests.example.com", "password": "pw"}
+
+    codes = fire(THREADS, "POST", "/auth/register", json=body)
+
+    assert codes == {200: 1, 400: THREADS - 1}
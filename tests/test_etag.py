@@ -0,0 +1,70 @@
+"""Conditional GETs: a current If-None-Match gets 304, and any write to the scope changes the ETag"""
+from app.models.user import UserRole, ProviderType
+from app.utils.etag import _matches, make_etag
+
+
+def _linked_pair(client, make_user):
+    lender, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user_headers, user = make_user()
+    link = client.post("/links/link", json={"user_id": user.id}, headers=lender).json()
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user_headers)
+    return lender, user_headers, provider, user
+
+
+def test_weak_comparison():
+    etag = make_etag("pair:1:2", "balance", 3)
+
+    assert _matches(etag, etag)
+    assert _matches('"balance:pair:1:2:3"', etag)
+    assert _matches('W/"other", ' + etag, etag)
+    assert _matches("*", etag)
+    assert not _matches(make_etag("pair:1:2", "balance", 4), etag)
+    assert not _matches(make_etag("pair:1:2", "pair", 3), etag)
+
+
+def test_balance_is_not_modified_until_the_next_write(client, make_user):
+    lender, user_headers, provider, user = _linked_pair(client, make_user)
+    url = f"/transactions/balance/{user.id}/{provider.id}"
+
+    first = client.get(url, headers=user_headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    repeat = client.get(url, headers={**user_headers, "If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
+    assert repeat.content == b""
+
+    client.post("/transactions/", json={"user_id": user.id, "type": "payment", "amount": "5.00"}, headers=lender)
+
+    changed = client.get(url, headers={**user_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["total_payments"] == "5.00"
+
+
+def test_list_and_balance_etags_differ(client, make_user):
+    _, user_headers, provider, user = _linked_pair(client, make_user)
+
+    pair_etag = client.get(f"/transactions/pair/{user.id}/{provider.id}", headers=user_headers).headers["ETag"]
+    balance = client.get(f"/transactions/balance/{user.id}/{provider.id}", headers={**user_headers, "If-None-Match": pair_etag})
+
+    assert balance.status_code == 200
+
+
+def test_other_users_cannot_probe_etags(client, make_user):
+    _, _, provider, user = _linked_pair(client, make_user)
+    stranger, _ = make_user()
+
+    response = client.get(f"/transactions/balance/{user.id}/{provider.id}", headers={**stranger, "If-None-Match": "*"})
+
+    assert response.status_code == 403
+
+
+def test_employer_list_etag_changes_on_create(client, make_user):
+    payer, _ = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    etag = client.get("/employers/", headers=payer).headers["ETag"]
+
+    assert client.get("/employers/", headers={**payer, "If-None-Match": etag}).status_code == 304
+    client.post("/employers/", json={"name": "Acme"}, headers=payer)
+    assert client.get("/employers/", headers={**payer, "If-None-Match": etag}).status_code == 200
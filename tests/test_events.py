@@ -0,0 +1,214 @@
+"""Event broker and SSE streams: events go out only after commit, and slow connections never block publishers"""
+import asyncio
+import json
+import pytest
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core import events
+from app.core.events import EventBroker, PostgresNotifyBackend, broker, publish_after_commit
+from app.models.user import UserRole, ProviderType
+from app.routes.events import format_sse, sse_stream
+
+
+class _Request:
+    """Stands in for a Starlette request that stays connected for `polls` checks"""
+
+    def __init__(self, polls: int):
+        self.polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self.polls -= 1
+        return self.polls < 0
+
+
+async def _collect(stream) -> list:
+    return [chunk async for chunk in stream]
+
+
+@pytest.fixture(autouse=True)
+def short_heartbeat(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_HEARTBEAT_SECONDS", 0.05)
+
+
+def test_link_invitation_is_pushed_to_both_parties(client, make_user):
+    lender, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+
+    async def scenario():
+        client_side = broker.subscribe([f"links:user:{user.id}"])
+        provider_side = broker.subscribe([f"links:provider:{provider.id}"])
+        try:
+            link = client.post("/links/link", json={"user_id": user.id}, headers=lender).json()
+            return link, await client_side.get(timeout=1), await provider_side.get(timeout=1)
+        finally:
+            client_side.close()
+            provider_side.close()
+
+    link, received, sent = asyncio.run(scenario())
+
+    assert received == sent
+    assert received["event"] == "link.invited"
+    assert received["data"]["link_id"] == link["id"]
+    assert (received["data"]["user_email"], received["data"]["provider_email"]) == (user.email, provider.email)
+
+
+def test_events_are_dropped_when_the_write_rolls_back():
+    async def scenario():
+        subscription = broker.subscribe(["tests:rollback"])
+        try:
+            with SessionLocal() as db:
+                db.execute(select(1))  # Services publish after their write, inside its transaction
+                publish_after_commit(db, ["tests:rollback"], {"event": "discarded", "data": {}})
+                db.rollback()
+                db.execute(select(1))
+                publish_after_commit(db, ["tests:rollback"], {"event": "kept", "data": {}})
+                db.commit()
+            return await subscription.get(timeout=1), await subscription.get(timeout=0.05)
+        finally:
+            subscription.close()
+
+    first, second = asyncio.run(scenario())
+
+    assert first["event"] == "kept"
+    assert second is None
+
+
+def test_slow_link_stream_drops_oldest_and_asks_for_resync():
+    local = EventBroker()
+
+    async def scenario():
+        subscription = local.subscribe(["links:user:1"], max_queue=2, drop_oldest=True)
+        for number in range(5):
+            local.publish(["links:user:1"], {"id": number, "event": "link.invited", "data": {"n": number}})
+        await asyncio.sleep(0)  # Let the queued deliveries run
+        return await _collect(sse_stream(_Request(polls=3), subscription, []))
+
+    chunks = asyncio.run(scenario())
+
+    assert chunks[0] == format_sse({"event": "resync", "data": {"dropped": 3}})
+    assert [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks[1:3]] == [{"n": 3}, {"n": 4}]
+    assert local.subscriber_count() == 0  # The stream unsubscribed when it ended
+
+
+def test_full_ledger_stream_ends_with_overflow():
+    local = EventBroker()
+
+    async def scenario():
+        subscription = local.subscribe(["user:1"], max_queue=1)
+        local.publish(["user:1"], {"id": 1, "event": "transaction.created", "data": {}})
+        local.publish(["user:1"], {"id": 2, "event": "transaction.created", "data": {}})
+        await asyncio.sleep(0)
+        return await _collect(sse_stream(_Request(polls=5), subscription, []))
+
+    assert asyncio.run(scenario()) == ["event: overflow\ndata: {}\n\n"]
+
+
+def test_backlog_events_are_not_sent_twice():
+    local = EventBroker()
+
+    async def scenario():
+        subscription = local.subscribe(["user:1"])
+        backlog = [{"id": 7, "event": "transaction.created", "data": {}}]
+        local.publish(["user:1"], {"id": 7, "event": "transaction.created", "data": {}})
+        local.publish(["user:1"], {"id": 6, "event": "transaction.confirmed", "data": {}})
+        await asyncio.sleep(0)
+        return await _collect(sse_stream(_Request(polls=2), subscription, backlog))
+
+    chunks = asyncio.run(scenario())
+
+    assert [chunk.split("\n")[:2] for chunk in chunks] == [
+        ["id: 7", "event: transaction.created"],
+        ["id: 6", "event: transaction.confirmed"]  # A lower id arriving live is new
+    ]
+
+
+def test_resync_reaches_every_subscriber():
+    local = EventBroker()
+
+    async def scenario():
+        ledger = local.subscribe(["user:1"])
+        links = local.subscribe(["links:provider:2"])
+        local._dispatch_all({"event": "resync", "data": {"reason": "listener_reconnected"}})
+        return await ledger.get(timeout=1), await links.get(timeout=1)
+
+    ledger_event, link_event = asyncio.run(scenario())
+
+    assert ledger_event["event"] == link_event["event"] == "resync"
+
+
+class _Stop(Exception):
+    pass
+
+
+class _ListenEngine:
+    """Hands out connections from `outcomes`: an exception to raise, or a connection that LISTENs"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.invalidated = 0
+
+    def raw_connection(self):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        engine = self
+
+        class Cursor:
+            def execute(self, statement):
+                assert statement == f"LISTEN {PostgresNotifyBackend.channel}"
+
+        class Driver:
+            autocommit = False
+
+            def cursor(self):
+                return Cursor()
+
+        class Raw:
+            driver_connection = Driver()
+
+            def invalidate(self):
+                engine.invalidated += 1
+
+        return Raw()
+
+
+def _run_listener(monkeypatch, outcomes, max_sleeps):
+    sleeps, resyncs = [], []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) >= max_sleeps:
+            raise _Stop
+
+    class Select:
+        @staticmethod
+        def select(*args):
+            raise OSError("connection lost")
+
+    monkeypatch.setattr(events.time, "sleep", sleep)
+    monkeypatch.setattr(events, "select", Select)
+    engine = _ListenEngine(outcomes)
+    backend = PostgresNotifyBackend(engine)
+    backend._dispatch = lambda topics, event_data: None
+    backend._dispatch_all = resyncs.append
+    with pytest.raises(_Stop):
+        backend._listen()
+    return sleeps, resyncs, engine
+
+
+def test_listener_reconnects_and_asks_every_stream_to_resync(monkeypatch):
+    sleeps, resyncs, engine = _run_listener(monkeypatch, [OSError("refused"), "ok", "ok"], max_sleeps=3)
+
+    assert sleeps == [1.0, 1.0, 1.0]  # The backoff starts over once a connection succeeds
+    assert engine.invalidated == 2  # Lost connections never go back to the pool
+    assert resyncs == [{"event": "resync", "data": {"reason": "listener_reconnected"}}]  # Not on the first connect
+
+
+def test_listener_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_LISTEN_RECONNECT_MAX_SECONDS", 5.0)
+
+    sleeps, resyncs, _ = _run_listener(monkeypatch, [OSError("refused")] * 5, max_sleeps=5)
+
+    assert sleeps == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert resyncs == []
@@ -0,0 +1,103 @@
+"""A group-commit timeout must never report failure for a row that is committed afterwards"""
+import threading
+from decimal import Decimal
+import pytest
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.write_pipeline import GroupCommitWriter, WriteOutcomeUnknown
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import UserRole
+
+
+@pytest.fixture
+def pair(make_user):
+    _, user = make_user()
+    _, provider = make_user(UserRole.PROVIDER)
+    return dict(user_id=user.id, provider_id=provider.id, type=TransactionType.PAYMENT, status=TransactionStatus.CONFIRMED)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_TIMEOUT_SECONDS", 0.2)
+    writer = GroupCommitWriter(max_batch_size=1, max_latency_ms=0)
+    yield writer
+    writer.stop(timeout=5)
+
+
+def _stalled_insert(writer, values, release):
+    """Insert in the background whose batch blocks inside the transaction until `release` is set"""
+    result = {}
+    taken = threading.Event()
+
+    def stall(session, row):
+        taken.set()
+        release.wait(5)
+
+    def run():
+        result["row"] = writer.insert(Transaction, values, after_insert=stall)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    taken.wait(5)
+    return thread, result
+
+
+def _count(pair) -> int:
+    with SessionLocal() as db:
+        return db.query(Transaction).filter_by(user_id=pair["user_id"], provider_id=pair["provider_id"]).count()
+
+
+def test_queued_row_is_withdrawn_on_timeout(writer, pair):
+    release = threading.Event()
+    thread, _ = _stalled_insert(writer, dict(pair, amount=Decimal("1.00")), release)
+    try:
+        with pytest.raises(TimeoutError):
+            writer.insert(Transaction, dict(pair, amount=Decimal("2.00")))
+    finally:
+        release.set()
+        thread.join()
+    writer.stop(timeout=5)
+    assert _count(pair) == 1
+
+
+def test_taken_row_is_awaited_past_the_timeout(writer, pair):
+    release = threading.Event()
+    thread, result = _stalled_insert(writer, dict(pair, amount=Decimal("3.00")), release)
+    threading.Timer(0.5, release.set).start()
+    thread.join()
+    row = result["row"]
+    assert row.id is not None and row.amount == Decimal("3.00")
+    assert _count(pair) == 1
+
+
+def test_stuck_writer_does_not_hold_the_request(writer, pair, monkeypatch):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_OUTCOME_TIMEOUT_SECONDS", 0.3)
+    release = threading.Event()
+    try:
+        with pytest.raises(WriteOutcomeUnknown):
+            writer.insert(Transaction, dict(pair, amount=Decimal("4.00")), after_insert=lambda session, row: release.wait(5))
+    finally:
+        release.set()
+
+
+def test_dead_writer_thread_is_replaced(writer, pair):
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    writer._thread = dead
+
+    row = writer.insert(Transaction, dict(pair, amount=Decimal("5.00")))
+
+    assert row.id is not None and writer._thread.is_alive()
+
+
+def test_unexpected_batch_error_fails_the_batch_not_the_thread(writer, pair):
+    def broken(batch):
+        raise RuntimeError("session factory unavailable")
+
+    writer._write = broken
+    with pytest.raises(RuntimeError):
+        writer.insert(Transaction, dict(pair, amount=Decimal("6.00")))
+    del writer._write
+
+    assert writer.insert(Transaction, dict(pair, amount=Decimal("7.00"))).id is not None
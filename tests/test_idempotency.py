@@ -0,0 +1,128 @@
+"""Reservations left behind by a crashed request must not block retries until the key expires"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.models.transaction import Transaction
+from app.models.user import UserRole, ProviderType
+from app.routes import transaction as transaction_routes
+from app.services.idempotency import _completed, begin_request, complete_request, mark_written, release_request
+
+SCOPE = "POST /transactions/"
+
+
+def _backdate(user_id: int, key: str, **columns) -> None:
+    with SessionLocal() as db:
+        db.query(IdempotencyKey).filter_by(user_id=user_id, key=key).update(columns, synchronize_session=False)
+        db.commit()
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()[1]
+
+
+def test_fresh_reservation_conflicts(user):
+    key = uuid.uuid4().hex
+    with SessionLocal() as db:
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 1}) is None
+        with pytest.raises(HTTPException) as error:
+            begin_request(db, user.id, key, SCOPE, {"amount": 1})
+    assert error.value.status_code == 409
+
+
+def test_stale_reservation_is_taken_over(user):
+    key = uuid.uuid4().hex
+    with SessionLocal() as db:
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 1}) is None
+    stale = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS + 1)
+    _backdate(user.id, key, created_at=stale)
+
+    with SessionLocal() as db:
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 1}) is None
+        complete_request(db, user.id, key, {"id": 7})
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 1}) == {"status_code": 200, "body": {"id": 7}}
+
+
+def test_one_retry_wins_a_stale_reservation(user):
+    key = uuid.uuid4().hex
+    with SessionLocal() as db:
+        begin_request(db, user.id, key, SCOPE, {"amount": 1})
+    _backdate(user.id, key, created_at=datetime.utcnow() - timedelta(days=1))
+
+    threads = 8
+    barrier = threading.Barrier(threads)
+    outcomes = []
+
+    def retry():
+        with SessionLocal() as db:
+            barrier.wait()
+            try:
+                outcomes.append(begin_request(db, user.id, key, SCOPE, {"amount": 1}))
+            except HTTPException as error:
+                outcomes.append(error.status_code)
+
+    workers = [threading.Thread(target=retry) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert sorted(outcomes, key=str) == [409] * (threads - 1) + [None]
+
+
+def test_expired_key_is_free_for_a_new_request(user):
+    key = uuid.uuid4().hex
+    with SessionLocal() as db:
+        begin_request(db, user.id, key, SCOPE, {"amount": 1})
+        complete_request(db, user.id, key, {"id": 1})
+    _backdate(user.id, key, expires_at=datetime.utcnow() - timedelta(seconds=1))
+    _completed.clear()  # As in another worker process, which never cached the response
+
+    with SessionLocal() as db:
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 2}) is None
+
+
+def test_committed_write_is_returned_not_repeated(client, make_user, monkeypatch):
+    headers, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user_headers, user = make_user()
+    link = client.post("/links/link", json={"user_id": user.id}, headers=headers).json()
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user_headers)
+    headers = dict(headers, **{"Idempotency-Key": uuid.uuid4().hex})
+    body = {"user_id": user.id, "type": "payment", "amount": "5.00"}
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("died before the response was stored")
+
+    # The write commits, then the request fails before its response is stored
+    monkeypatch.setattr(transaction_routes, "complete_request", crash)
+    with pytest.raises(RuntimeError):
+        client.post("/transactions/", json=body, headers=headers)
+    monkeypatch.undo()
+
+    first = client.post("/transactions/", json=body, headers=headers)
+    second = client.post("/transactions/", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    with SessionLocal() as db:
+        assert db.query(Transaction).filter_by(user_id=user.id, provider_id=provider.id).count() == 1
+
+
+def test_written_reservation_is_never_taken_over(user):
+    key = uuid.uuid4().hex
+    with SessionLocal() as db:
+        begin_request(db, user.id, key, SCOPE, {"amount": 1})
+        mark_written(db, user.id, key, 42)
+        db.commit()
+        release_request(db, user.id, key)  # Something failed after the commit
+    _backdate(user.id, key, created_at=datetime.utcnow() - timedelta(days=1))
+
+    with SessionLocal() as db:
+        assert begin_request(db, user.id, key, SCOPE, {"amount": 1}) == {"resource_id": 42}
+        with pytest.raises(HTTPException) as error:
+            mark_written(db, user.id, key, 43)
+    assert error.value.status_code == 409
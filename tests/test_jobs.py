@@ -0,0 +1,125 @@
+"""Job queue: retries, claims that expire mid-run, and jobs queued through the admin endpoints"""
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jobs import JobWorker, enqueue_job, task
+from app.models.job import Job, JobStatus
+from app.models.user import UserRole
+
+calls = []
+
+
+@task("tests.echo")
+def _echo(db, value):
+    calls.append(value)
+    return {"value": value}
+
+
+@task("tests.flaky", max_attempts=2)
+def _flaky(db):
+    raise RuntimeError("flaky")
+
+
+@task("tests.reclaimed")
+def _reclaimed(db, fail: bool = False):
+    # Stalls past the lock; meanwhile another worker claims the job again
+    with SessionLocal() as other:
+        other.query(Job).filter(Job.name == "tests.reclaimed", Job.status == JobStatus.RUNNING).update(
+            {Job.locked_until: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+        )
+        other.commit()
+        assert JobWorker(worker_id="second").claim(other) is not None
+    if fail:
+        raise RuntimeError("late failure")
+    return "late result"
+
+
+@task("tests.slow", timeout_seconds=0.6)
+def _slow(db):
+    deadline = time.monotonic() + 1.5
+    while time.monotonic() < deadline:
+        with SessionLocal() as other:
+            calls.append(JobWorker(worker_id="second").claim(other))
+        time.sleep(0.1)
+    return "slow"
+
+
+@pytest.fixture(autouse=True)
+def empty_queue():
+    with SessionLocal() as db:
+        db.query(Job).delete()
+        db.commit()
+    calls.clear()
+
+
+def _enqueue(name: str, **payload) -> int:
+    with SessionLocal() as db:
+        job_id = enqueue_job(db, name, payload).id
+        db.commit()
+    return job_id
+
+
+def _job(job_id: int) -> Job:
+    with SessionLocal() as db:
+        return db.get(Job, job_id)
+
+
+def test_runs_a_job_once():
+    job_id = _enqueue("tests.echo", value=3)
+
+    assert JobWorker(worker_id="first").run_pending() == 1
+
+    job = _job(job_id)
+    assert job.status == JobStatus.DONE and job.result == '{"value": 3}' and job.locked_by is None
+    assert calls == [3]
+
+
+def test_failed_job_is_retried_then_failed(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    job_id = _enqueue("tests.flaky")
+    worker = JobWorker(worker_id="first")
+
+    worker.run_once()
+    assert _job(job_id).status == JobStatus.QUEUED
+    worker.run_once()
+
+    job = _job(job_id)
+    assert job.status == JobStatus.FAILED and job.attempts == 2 and "flaky" in job.last_error
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_expired_claim_does_not_overwrite_the_new_one(fail):
+    job_id = _enqueue("tests.reclaimed", fail=fail)
+
+    JobWorker(worker_id="first").run_once()
+
+    job = _job(job_id)
+    assert job.status == JobStatus.RUNNING
+    assert job.locked_by == "second" and job.attempts == 2
+    assert job.result is None and job.last_error is None
+
+
+def test_heartbeat_keeps_a_long_task_claimed():
+    job_id = _enqueue("tests.slow")
+
+    JobWorker(worker_id="first").run_once()
+
+    assert calls and all(claimed is None for claimed in calls)
+    job = _job(job_id)
+    assert job.status == JobStatus.DONE and job.attempts == 1
+
+
+def test_queued_rebuild_reports_its_result(client, make_user):
+    admin, _ = make_user(UserRole.ADMIN)
+
+    queued = client.post("/transactions/rollups/rebuild", params={"background": "true", "batch_size": 50}, headers=admin)
+    assert queued.status_code == 202
+    assert queued.json()["status"] == "queued"
+    assert JobWorker(worker_id="first").run_pending() == 1
+
+    job = client.get(f"/admin/jobs/{queued.json()['job_id']}", headers=admin).json()
+    assert (job["name"], job["status"], job["attempts"]) == ("rollups.rebuild", "done", 1)
+    assert job["result"]["pairs_processed"] >= 0
+    assert client.get("/admin/jobs/999999999", headers=admin).status_code == 404
@@ -0,0 +1,66 @@
+"""Last-Event-ID replay must not skip an event whose lower id committed after a higher one was delivered"""
+import json
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.ledger_event import LedgerEvent
+from app.models.user import UserRole
+from app.services.ledger_events import LedgerCursor, get_ledger_events_since, resync_cursor
+
+
+def _event(db, user, provider, age_seconds: float = 0) -> LedgerEvent:
+    row = LedgerEvent(
+        user_id=user.id, provider_id=provider.id, kind="transaction.created", payload=json.dumps({}),
+        created_at=datetime.utcnow() - timedelta(seconds=age_seconds)
+    )
+    db.add(row)
+    db.flush()
+    return row
+
+
+def test_lower_id_committed_late_is_replayed(make_user):
+    _, user = make_user()
+    _, provider = make_user(UserRole.PROVIDER)
+    lag = settings.EVENT_REPLAY_COMMIT_LAG_SECONDS
+    with SessionLocal() as db:
+        old = _event(db, user, provider, age_seconds=lag * 2)
+        late = _event(db, user, provider)  # Flushed first, commits after `delivered`
+        delivered = _event(db, user, provider)
+        db.commit()
+
+        cursor = LedgerCursor()
+        cursor.advance(old.id, old.created_at.isoformat())
+        cursor.advance(delivered.id, delivered.created_at.isoformat())
+        assert str(cursor) == f"{old.id}:{delivered.id}"
+
+        events, truncated = get_ledger_events_since(db, user, LedgerCursor.parse(str(cursor)))
+        assert [event["id"] for event in events] == [late.id]
+        assert not truncated
+
+
+def test_plain_integer_last_event_id(make_user):
+    _, user = make_user()
+    _, provider = make_user(UserRole.PROVIDER)
+    with SessionLocal() as db:
+        first = _event(db, user, provider)
+        second = _event(db, user, provider)
+        db.commit()
+
+        events, _ = get_ledger_events_since(db, user, LedgerCursor.parse(str(first.id)))
+        assert [event["id"] for event in events] == [second.id]
+
+
+def test_truncated_backlog_asks_for_resync(make_user):
+    _, user = make_user()
+    _, provider = make_user(UserRole.PROVIDER)
+    lag = settings.EVENT_REPLAY_COMMIT_LAG_SECONDS
+    with SessionLocal() as db:
+        rows = [_event(db, user, provider, age_seconds=lag * 2) for _ in range(3)] + [_event(db, user, provider)]
+        db.commit()
+
+        events, truncated = get_ledger_events_since(db, user, LedgerCursor(), limit=2)
+        assert events == [] and truncated
+
+        cursor = resync_cursor(db, user)
+        assert str(cursor) == f"{rows[2].id}:{rows[3].id}"
+        assert get_ledger_events_since(db, user, cursor) == ([], False)
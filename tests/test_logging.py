@@ -0,0 +1,53 @@
+"""Queued log records must not hold tracebacks, and dropped records must be visible"""
+import json
+import logging
+import queue
+import sys
+from app.core.logging_setup import BackgroundQueueHandler, JsonFormatter
+from app.models.user import UserRole
+
+
+def _record_with_exception() -> logging.LogRecord:
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        return logging.getLogger("tests").makeRecord("tests", logging.ERROR, __file__, 1, "failed %s", ("job",), sys.exc_info())
+
+
+def test_prepare_renders_the_traceback_and_drops_exc_info():
+    handler = BackgroundQueueHandler(queue.Queue())
+
+    prepared = handler.prepare(_record_with_exception())
+
+    assert prepared.exc_info is None
+    assert "ValueError: boom" in prepared.exc_text
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "failed job"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_dropped_records_are_counted_and_reported():
+    handler = BackgroundQueueHandler(queue.Queue(2))
+    record = logging.makeLogRecord({"msg": "hello"})
+    for _ in range(4):
+        handler.enqueue(record)
+    assert handler.dropped == 2
+
+    while not handler.queue.empty():
+        handler.queue.get_nowait()
+    handler.enqueue(record)
+
+    warning = handler.queue.get_nowait()
+    assert warning.levelno == logging.WARNING
+    assert warning.getMessage() == "Log queue was full; dropped 2 records"
+    assert handler.queue.get_nowait() is record
+    assert handler.dropped == 2
+
+
+def test_logging_stats_endpoint(client, make_user):
+    headers, _ = make_user(UserRole.ADMIN)
+
+    response = client.get("/admin/logging/stats", headers=headers)
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"queued", "dropped"}
@@ -0,0 +1,81 @@
+"""Money columns: BIGINT minor units round-trip exactly, and the 0001 migration converts both ways without loss"""
+import os
+import sqlite3
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, func, select, type_coerce
+from app.core.config import settings
+from app.models.types import MINOR_UNITS, Money, verify_money_storage
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _money_table(minor_units: bool):
+    metadata = MetaData()
+    table = Table("amounts", metadata, Column("id", Integer, primary_key=True), Column("amount", Money(minor_units)))
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    return engine, table
+
+
+def test_minor_units_round_trip():
+    engine, table = _money_table(minor_units=True)
+    amounts = [Decimal("0.01"), Decimal("12.34"), Decimal("99999999.99"), Decimal("-5.10"), Decimal("0.005")]
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"amount": amount} for amount in amounts])
+        stored = conn.exec_driver_sql("SELECT amount FROM amounts ORDER BY id").scalars().all()
+        loaded = conn.execute(select(table.c.amount).order_by(table.c.id)).scalars().all()
+        total = conn.execute(select(type_coerce(func.sum(table.c.amount), Money(True)))).scalar()
+
+    assert stored == [1, 1234, 9999999999, -510, 1]  # Half a cent rounds up
+    assert loaded == [Decimal("0.01"), Decimal("12.34"), Decimal("99999999.99"), Decimal("-5.10"), Decimal("0.01")]
+    assert total == Decimal("100000007.25")
+    assert total.as_tuple().exponent == -2
+
+
+def test_numeric_storage_is_unchanged():
+    engine, table = _money_table(minor_units=False)
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"amount": Decimal("12.34")}])
+        assert conn.execute(select(table.c.amount)).scalar() == Decimal("12.34")
+
+
+@pytest.mark.parametrize("minor_units", [True, False])
+def test_startup_check_rejects_a_mismatched_schema(monkeypatch, minor_units):
+    engine, _ = _money_table(minor_units)
+    monkeypatch.setattr(settings, "MONEY_STORAGE", "numeric" if minor_units else MINOR_UNITS)
+
+    with pytest.raises(RuntimeError, match="MONEY_STORAGE"):
+        verify_money_storage(engine, "amounts", "amount")
+
+    monkeypatch.setattr(settings, "MONEY_STORAGE", MINOR_UNITS if minor_units else "numeric")
+    verify_money_storage(engine, "amounts", "amount")
+
+
+def _alembic(database: Path, money_storage: str, *args: str) -> None:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", MONEY_STORAGE=money_storage)
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+def test_migration_converts_both_ways(tmp_path):
+    database = tmp_path / "money.db"
+    _alembic(database, "numeric", "upgrade", "head")
+    with sqlite3.connect(database) as conn:
+        conn.execute("INSERT INTO transactions (user_id, provider_id, type, status, amount, date) VALUES (1, 2, 'DEBT', 'CONFIRMED', 12.34, '2027-01-01')")
+        conn.execute("INSERT INTO work_payments (provider_id, employer_id, amount, payment_date, created_at) VALUES (2, 1, 0.07, '2027-01-01', '2027-01-01')")
+
+    _alembic(database, MINOR_UNITS, "downgrade", "base")
+    _alembic(database, MINOR_UNITS, "upgrade", "head")
+    with sqlite3.connect(database) as conn:
+        assert conn.execute("SELECT amount FROM transactions").fetchone() == (1234,)
+        assert conn.execute("SELECT amount FROM work_payments").fetchone() == (7,)
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(work_payments)")}
+    assert "ix_work_payments_provider_date" in indexes
+
+    _alembic(database, MINOR_UNITS, "downgrade", "base")
+    with sqlite3.connect(database) as conn:
+        assert conn.execute("SELECT amount FROM transactions").fetchone() == (12.34,)
+        assert conn.execute("SELECT amount FROM work_payments").fetchone() == (0.07,)
@@ -0,0 +1,43 @@
+"""Generated codes verify with the same step, once per step, inside the drift window"""
+import time
+import pytest
+from app.core.config import settings
+from app.utils.otp_verifier import OTPVerifier, otp_verifier
+from app.utils.verification_code_gener import generate_verification_code
+
+SECRET = "00112233445566778899aabbccddeeff"
+
+
+def test_default_step_matches_the_verifier():
+    assert otp_verifier.step_seconds == settings.OTP_STEP_SECONDS
+    assert otp_verifier.matching_step(SECRET, generate_verification_code(SECRET)) is not None
+
+
+@pytest.mark.parametrize("step", [30, 90])
+def test_non_default_step(monkeypatch, step):
+    monkeypatch.setattr(settings, "OTP_STEP_SECONDS", step)
+    verifier = OTPVerifier(step_seconds=step)
+
+    assert verifier.verify(1, SECRET, generate_verification_code(SECRET))
+
+
+def test_code_is_single_use_per_user():
+    verifier = OTPVerifier(step_seconds=settings.OTP_STEP_SECONDS)
+    code = generate_verification_code(SECRET)
+
+    assert verifier.verify(1, SECRET, code)
+    assert not verifier.verify(1, SECRET, code)
+    assert verifier.verify(2, SECRET, code)  # Another client with the same secret is a different key
+
+    verifier.release(1, SECRET, code)
+    assert verifier.verify(1, SECRET, code)
+
+
+def test_drift_window():
+    verifier = OTPVerifier(step_seconds=60, drift_steps=1)
+    now = time.time()
+    previous = verifier.generate(SECRET, now - 60)
+    too_old = verifier.generate(SECRET, now - 180)
+
+    assert verifier.verify(1, SECRET, previous, now)
+    assert not verifier.verify(1, SECRET, too_old, now)
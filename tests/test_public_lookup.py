@@ -0,0 +1,53 @@
+"""Batch public profile lookup: one IN query for the ids not cached yet, results in request order"""
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.database import engine
+
+
+def _selects(client, url):
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return response, sent
+
+
+def test_profiles_in_request_order(client, make_user):
+    _, first = make_user()
+    _, second = make_user()
+    unknown = second.id + 10 ** 6
+
+    response, sent = _selects(client, f"/users/public?ids={second.id},{unknown},{first.id},{second.id}")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": second.id, "name": second.name, "email": second.email},
+        {"id": first.id, "name": first.name, "email": first.email}
+    ]
+    assert len(sent) == 1
+
+
+def test_cached_profiles_need_no_query(client, make_user):
+    _, first = make_user()
+    _, second = make_user()
+    client.get(f"/users/public?ids={first.id}")
+
+    response, sent = _selects(client, f"/users/public?ids={first.id}")
+    assert [user["id"] for user in response.json()] == [first.id]
+    assert sent == []
+
+    response, sent = _selects(client, f"/users/public?ids={first.id},{second.id}")
+    assert [user["id"] for user in response.json()] == [first.id, second.id]
+    assert len(sent) == 1 and "IN" in sent[0]
+
+
+def test_rejects_bad_and_oversized_id_lists(client):
+    assert client.get("/users/public?ids=1,two").status_code == 400
+    too_many = ",".join(str(n) for n in range(1, settings.PUBLIC_LOOKUP_MAX_IDS + 2))
+    assert client.get(f"/users/public?ids={too_many}").status_code == 400
@@ -0,0 +1,88 @@
+"""Per-user response cache: bounded by entries and bytes, and emptied by the writes that change a cached scope"""
+import time
+from sqlalchemy import select
+from app.core.database import SessionLocal
+from app.models.user import UserRole, ProviderType
+from app.utils.response_cache import ResponseCache, invalidate_after_commit, response_cache
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ResponseCache(max_entries=10, max_bytes=10)
+    cache.set("a", b"aaaa", ["t"])
+    cache.set("b", b"bbbb", ["t"])
+    assert cache.get("a") == b"aaaa"  # "b" is now the least recently used
+
+    cache.set("c", b"cccc", ["u"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache(ttl_seconds=0.01)
+    cache.set("a", b"{}", [])
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidating_a_tag_removes_only_its_entries():
+    cache = ResponseCache()
+    cache.set("a", b"1", ["links:user:1"])
+    cache.set("b", b"2", ["links:user:1", "employers:3"])
+    cache.set("c", b"3", ["employers:3"])
+
+    assert cache.invalidate_tags(["links:user:1"]) == 2
+
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == b"3"
+    cache.invalidate_tags(["employers:3"])
+    assert cache.stats()["entries"] == cache.stats()["bytes"] == 0
+
+
+def test_invalidation_waits_for_commit():
+    response_cache.set("tests.key", b"{}", ["tests:scope"])
+    with SessionLocal() as db:
+        db.execute(select(1))  # Inside a write's transaction, as services call it
+        invalidate_after_commit(db, ["tests:scope"])
+        db.rollback()
+        assert response_cache.get("tests.key") == b"{}"
+        assert "invalidate_tags" not in db.info
+
+        invalidate_after_commit(db, ["tests:scope"])
+        db.commit()
+    assert response_cache.get("tests.key") is None
+
+
+def test_provider_type_change_refreshes_linked_clients_lists(client, make_user):
+    lender, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user_headers, user = make_user()
+    link = client.post("/links/link", json={"user_id": user.id}, headers=lender).json()
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user_headers)
+
+    [listed] = client.get("/users/me/providers", headers=user_headers).json()
+    hits = response_cache.stats()["hits"]
+    assert client.get("/users/me/providers", headers=user_headers).json() == [listed]
+    assert response_cache.stats()["hits"] == hits + 1
+    assert listed["provider_type"] == "lender"
+
+    client.put("/users/me/provider-type", json={"provider_type": "payer"}, headers=lender)
+
+    [listed] = client.get("/users/me/providers", headers=user_headers).json()
+    assert listed["provider_type"] == "payer"
+
+
+def test_link_approval_refreshes_both_lists(client, make_user):
+    lender, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user_headers, user = make_user()
+    link = client.post("/links/link", json={"user_id": user.id}, headers=lender).json()
+    assert client.get("/users/me/providers", headers=user_headers).json() == []
+    assert client.get("/providers/me/clients", headers=lender).json() == []
+
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user_headers)
+
+    assert [p["id"] for p in client.get("/users/me/providers", headers=user_headers).json()] == [provider.id]
+    assert [c["id"] for c in client.get("/providers/me/clients", headers=lender).json()] == [user.id]
@@ -0,0 +1,88 @@
+"""Daily rollups: incremental upserts and a full rebuild give the same per-day totals and balances"""
+from datetime import date, datetime
+from decimal import Decimal
+from app.core.database import SessionLocal
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.models.user import UserRole, ProviderType
+from app.services.rollup import daily_series, rebuild_rollups, record_confirmed_transaction
+
+
+def _add(db, user, provider, kind, amount: str, when: datetime, status=TransactionStatus.CONFIRMED) -> Transaction:
+    tx = Transaction(user_id=user.id, provider_id=provider.id, type=kind, status=status, amount=Decimal(amount), date=when)
+    db.add(tx)
+    db.flush()
+    if status == TransactionStatus.CONFIRMED:
+        record_confirmed_transaction(db, tx)
+    return tx
+
+
+def _pair(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    return user, provider
+
+
+def _rows(db, user, provider):
+    return [
+        (row.day, row.debt_total, row.payment_total, row.transaction_count)
+        for row in db.query(TransactionDailyRollup).filter_by(user_id=user.id, provider_id=provider.id).order_by(TransactionDailyRollup.day)
+    ]
+
+
+def test_writes_on_the_same_day_add_to_one_row(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        _add(db, user, provider, TransactionType.DEBT, "100.00", datetime(2027, 3, 1, 9))
+        _add(db, user, provider, TransactionType.DEBT, "20.50", datetime(2027, 3, 1, 18))
+        _add(db, user, provider, TransactionType.PAYMENT, "30.00", datetime(2027, 3, 1, 23, 59))
+        _add(db, user, provider, TransactionType.DEBT, "999.00", datetime(2027, 3, 1, 12), TransactionStatus.PENDING)
+        db.commit()
+
+        assert _rows(db, user, provider) == [(date(2027, 3, 1), Decimal("120.50"), Decimal("30.00"), 3)]
+
+
+def test_series_carries_the_balance_from_before_start(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        _add(db, user, provider, TransactionType.DEBT, "100.00", datetime(2027, 3, 1))
+        _add(db, user, provider, TransactionType.PAYMENT, "40.00", datetime(2027, 3, 2))
+        _add(db, user, provider, TransactionType.DEBT, "15.00", datetime(2027, 3, 5))
+        _add(db, user, provider, TransactionType.DEBT, "7.00", datetime(2027, 3, 9))
+        db.commit()
+
+        series = daily_series(db, user.id, provider.id, start=date(2027, 3, 2), end=date(2027, 3, 5))
+
+    assert series["opening_balance"] == Decimal("100.00")
+    assert [(point["day"], point["balance"]) for point in series["points"]] == [
+        (date(2027, 3, 2), Decimal("60.00")),
+        (date(2027, 3, 5), Decimal("75.00"))
+    ]
+
+
+def test_rebuild_matches_the_incremental_rollups(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        _add(db, user, provider, TransactionType.DEBT, "100.00", datetime(2027, 3, 1, 9))
+        _add(db, user, provider, TransactionType.PAYMENT, "12.34", datetime(2027, 3, 1, 10))
+        _add(db, user, provider, TransactionType.DEBT, "5.00", datetime(2027, 3, 4))
+        _add(db, user, provider, TransactionType.DEBT, "50.00", datetime(2027, 3, 4), TransactionStatus.PENDING)
+        db.commit()
+        incremental = _rows(db, user, provider)
+        db.query(TransactionDailyRollup).filter_by(user_id=user.id, provider_id=provider.id).update({"debt_total": 0})
+        db.commit()
+
+        pairs = rebuild_rollups(db, batch_size=2)  # Several committed chunks
+
+        assert pairs >= 1
+        assert _rows(db, user, provider) == incremental
+
+
+def test_rebuild_requires_admin(client, make_user):
+    provider_headers, _ = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    admin_headers, _ = make_user(UserRole.ADMIN)
+
+    assert client.post("/transactions/rollups/rebuild", headers=provider_headers).status_code == 403
+    response = client.post("/transactions/rollups/rebuild", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["pairs_processed"] >= 0
@@ -0,0 +1,70 @@
+"""Full-text search over employers and work payments: word prefixes, every word required, scoped to the caller"""
+from app.models.user import UserRole, ProviderType
+
+
+def _payer(make_user):
+    return make_user(UserRole.PROVIDER, ProviderType.PAYER)[0]
+
+
+def _employer(client, payer, name, contact_info=None):
+    return client.post("/employers/", json={"name": name, "contact_info": contact_info}, headers=payer).json()
+
+
+def _names(response):
+    assert response.status_code == 200, response.text
+    return sorted(item["name"] for item in response.json())
+
+
+def test_every_word_must_match_as_a_prefix(client, make_user):
+    payer = _payer(make_user)
+    _employer(client, payer, "Acme Construction", "Main st 5")
+    _employer(client, payer, "Acme Plumbing")
+    _employer(client, payer, "Beta Construction")
+
+    assert _names(client.get("/employers/search", params={"q": "acm"}, headers=payer)) == ["Acme Construction", "Acme Plumbing"]
+    assert _names(client.get("/employers/search", params={"q": "CONSTR acme"}, headers=payer)) == ["Acme Construction"]
+    assert _names(client.get("/employers/search", params={"q": "main"}, headers=payer)) == ["Acme Construction"]
+    assert _names(client.get("/employers/search", params={"q": "cme"}, headers=payer)) == []
+
+
+def test_results_are_limited_to_the_callers_employers(client, make_user):
+    payer, other = _payer(make_user), _payer(make_user)
+    _employer(client, payer, "Gamma Roofing")
+    _employer(client, other, "Gamma Roofing")
+
+    response = client.get("/employers/search", params={"q": "gamma"}, headers=payer)
+
+    assert len(response.json()) == 1
+
+
+def test_index_follows_renames(client, make_user):
+    payer = _payer(make_user)
+    employer = _employer(client, payer, "Delta Works")
+    client.put(f"/employers/{employer['id']}", json={"name": "Epsilon Works"}, headers=payer)
+
+    assert _names(client.get("/employers/search", params={"q": "delta"}, headers=payer)) == []
+    assert _names(client.get("/employers/search", params={"q": "epsilon"}, headers=payer)) == ["Epsilon Works"]
+
+
+def test_query_syntax_is_not_passed_to_the_index(client, make_user):
+    payer = _payer(make_user)
+    _employer(client, payer, "Zeta Paving")
+
+    assert client.get("/employers/search", params={"q": '"*) -'}, headers=payer).status_code == 400
+    assert _names(client.get("/employers/search", params={"q": 'zeta" OR "x'}, headers=payer)) == []
+    assert _names(client.get("/employers/search", params={"q": "zeta* (paving)"}, headers=payer)) == ["Zeta Paving"]
+
+
+def test_work_payment_descriptions_with_paging(client, make_user):
+    payer = _payer(make_user)
+    employer = _employer(client, payer, "Eta Builders")
+    for description in ["Kitchen tiling", "Bathroom tiling", "Roof repair"]:
+        client.post("/work-payments/", json={"employer_id": employer["id"], "amount": "50.00", "description": description}, headers=payer)
+
+    first = client.get("/work-payments/search", params={"q": "tiling", "limit": 1}, headers=payer).json()
+    second = client.get("/work-payments/search", params={"q": "tiling", "limit": 1, "offset": 1}, headers=payer).json()
+    third = client.get("/work-payments/search", params={"q": "tiling", "limit": 1, "offset": 2}, headers=payer).json()
+
+    assert sorted(page[0]["description"] for page in (first, second)) == ["Bathroom tiling", "Kitchen tiling"]
+    assert third == []
+    assert first[0]["employer_name"] == "Eta Builders"
@@ -0,0 +1,74 @@
+"""Slow-query log: statements are fingerprinted without their values and attributed to the app code that ran them"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.slow_queries import SlowQueryLog, install_slow_query_log, normalize_sql, parameter_shape, slow_query_log
+from app.models.user import UserRole
+from app.services.snapshot import pair_totals
+
+
+def test_literals_and_in_lists_share_a_fingerprint():
+    first = normalize_sql("SELECT * FROM users WHERE id IN (?, ?, ?) AND name = 'o''brien'\n  AND age > 42")
+    second = normalize_sql("SELECT * FROM users WHERE id IN (?, ?) AND name = 'x' AND age > -1.5")
+
+    assert first == second == "SELECT * FROM users WHERE id IN (?...) AND name = ? AND age > ?"
+    assert normalize_sql("SELECT * FROM t2 WHERE a = %(a_1)s") == "SELECT * FROM t2 WHERE a = ?"
+
+
+def test_parameters_are_logged_as_types_only():
+    assert parameter_shape((1, "secret", None)) == ["int", "str", "NoneType"]
+    assert parameter_shape({"email": "a@b.c"}) == {"email": "str"}
+    assert parameter_shape([(1, "x"), (2, "y")], executemany=True) == {"rows": 2, "row": ["int", "str"]}
+
+
+def test_cheapest_fingerprint_is_dropped_when_full():
+    log = SlowQueryLog(threshold_ms=0, explain_sample_rate=0, max_fingerprints=2)
+    log.record(None, "SELECT 1 FROM a", (), False, 50.0)
+    log.record(None, "SELECT 1 FROM b", (), False, 5.0)
+    log.record(None, "SELECT 1 FROM c", (), False, 20.0)
+    log.record(None, "SELECT 2 FROM a", (), False, 10.0)  # Same fingerprint as the first
+
+    top = log.top()
+    assert [(stats["sql"], stats["count"], stats["total_ms"]) for stats in top] == [("SELECT ? FROM a", 2, 60.0), ("SELECT ? FROM c", 1, 20.0)]
+    assert top[0]["mean_ms"] == 30.0
+
+
+@pytest.fixture
+def logged_engine(tmp_path, monkeypatch):
+    """An engine of its own where every statement is slow and every SELECT gets its plan captured"""
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    monkeypatch.setattr(slow_query_log, "explain_sample_rate", 1.0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    Base.metadata.create_all(engine)
+    install_slow_query_log(engine)
+    slow_query_log.reset()
+    yield engine
+    slow_query_log.reset()
+    engine.dispose()
+
+
+def test_slow_statement_is_attributed_and_explained(logged_engine):
+    with sessionmaker(bind=logged_engine)() as db:
+        pair_totals(db, 1, 2)
+
+    [stats] = [s for s in slow_query_log.top() if "FROM transactions" in s["sql"]]
+    assert stats["callers"] == {"app.services.snapshot:pair_totals": 1}
+    assert stats["plan"] and not stats["plan"][0].startswith("EXPLAIN failed")
+
+
+def test_failed_statement_does_not_skew_the_next_timing(logged_engine):
+    with logged_engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
+
+
+def test_admin_listing(client, make_user):
+    admin, _ = make_user(UserRole.ADMIN)
+    user, _ = make_user()
+
+    assert client.get("/admin/slow-queries", headers=user).status_code == 403
+    assert client.get("/admin/slow-queries", headers=admin).status_code == 200
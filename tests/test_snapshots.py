@@ -0,0 +1,91 @@
+"""Balance snapshots: snapshot plus delta always equals a full recompute of the CONFIRMED rows"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.core.database import SessionLocal
+from app.models.balance_snapshot import BalanceSnapshot
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import UserRole, ProviderType
+from app.services.snapshot import balance_totals, pair_totals, snapshot_balances, verify_pair
+from app.services.transaction import approve_debt
+
+OLD = datetime.utcnow() - timedelta(days=1)  # Well past BALANCE_SNAPSHOT_LAG_SECONDS
+
+
+def _add(db, user, provider, kind, amount, status=TransactionStatus.CONFIRMED, when=OLD) -> Transaction:
+    tx = Transaction(user_id=user.id, provider_id=provider.id, type=kind, status=status, amount=Decimal(amount), date=when)
+    db.add(tx)
+    db.flush()
+    return tx
+
+
+def _pair(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    return user, provider
+
+
+def _snapshot(db, user, provider) -> BalanceSnapshot:
+    return db.query(BalanceSnapshot).filter_by(user_id=user.id, provider_id=provider.id).one()
+
+
+def test_pending_debt_does_not_hold_the_snapshot_back(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        _add(db, user, provider, TransactionType.DEBT, "100.00")
+        _add(db, user, provider, TransactionType.DEBT, "40.00", TransactionStatus.PENDING)
+        last = _add(db, user, provider, TransactionType.PAYMENT, "30.00")
+        recent = _add(db, user, provider, TransactionType.DEBT, "5.00", when=datetime.utcnow())
+        db.commit()
+
+        snapshot_balances(db)
+
+        snapshot = _snapshot(db, user, provider)
+        assert snapshot.last_transaction_id == last.id < recent.id
+        assert (snapshot.debt_total, snapshot.payment_total) == (Decimal("100.00"), Decimal("30.00"))
+        assert balance_totals(db, user.id, provider.id) == (Decimal("105.00"), Decimal("30.00"))
+        assert verify_pair(db, user.id, provider.id) is None
+
+
+def test_debt_approved_after_the_snapshot_is_counted_once(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        pending = _add(db, user, provider, TransactionType.DEBT, "40.00", TransactionStatus.PENDING)
+        _add(db, user, provider, TransactionType.DEBT, "10.00")
+        db.commit()
+        snapshot_balances(db)
+        assert _snapshot(db, user, provider).last_transaction_id > pending.id
+
+        approve_debt(db, user, pending.id)
+
+        assert balance_totals(db, user.id, provider.id) == (Decimal("50.00"), Decimal("0"))
+        assert verify_pair(db, user.id, provider.id) is None
+        # A later run only adds rows past the snapshot
+        snapshot_balances(db)
+        assert balance_totals(db, user.id, provider.id) == pair_totals(db, user.id, provider.id)
+
+
+def test_debt_approved_before_the_snapshot_is_summed(make_user):
+    user, provider = _pair(make_user)
+    with SessionLocal() as db:
+        pending = _add(db, user, provider, TransactionType.DEBT, "40.00", TransactionStatus.PENDING)
+        db.commit()
+        approve_debt(db, user, pending.id)
+
+        snapshot_balances(db)
+
+        assert (_snapshot(db, user, provider).debt_total, _snapshot(db, user, provider).payment_total) == (Decimal("40.00"), Decimal("0"))
+        assert verify_pair(db, user.id, provider.id) is None
+
+
+def test_concurrent_approvals_count_the_debt_once(fire, make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    headers, user = make_user()
+    with SessionLocal() as db:
+        pending = _add(db, user, provider, TransactionType.DEBT, "40.00", TransactionStatus.PENDING)
+        db.commit()
+
+    codes = fire(8, "POST", "/transactions/approve", json={"transaction_id": pending.id}, headers=headers)
+
+    assert codes == {200: 1, 400: 7}
+    with SessionLocal() as db:
+        assert balance_totals(db, user.id, provider.id) == (Decimal("40.00"), Decimal("0"))
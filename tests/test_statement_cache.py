@@ -0,0 +1,72 @@
+"""Hot lookups are built once with bound parameters, so repeated calls reuse the compiled SQL"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi import HTTPException
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+from app.core.database import SessionLocal, engine
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import UserRole, ProviderType
+from app.services.employer import create_employer, get_employer
+from app.services.snapshot import pair_totals
+
+
+@contextmanager
+def executions():
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append((statement, context.cache_hit))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield sent
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_repeated_lookups_are_cache_hits(make_user):
+    _, payer = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    _, other = make_user(UserRole.PROVIDER, ProviderType.PAYER)
+    with SessionLocal() as db:
+        first = create_employer(db, payer, "Iota", None)
+        second = create_employer(db, payer, "Kappa", None)
+        get_employer(db, payer, first.id)
+
+        with executions() as sent:
+            assert get_employer(db, payer, second.id).name == "Kappa"
+            with pytest.raises(HTTPException):
+                get_employer(db, other, first.id)
+
+    assert len(sent) == 2
+    assert sent[0][0] == sent[1][0]
+    assert all(cache_hit == CACHE_HIT for _, cache_hit in sent)
+
+
+def test_authenticated_requests_reuse_the_user_lookup(client, make_user):
+    headers, user = make_user()
+    client.get("/users/me", headers=headers)
+
+    with executions() as sent:
+        assert client.get("/users/me", headers=headers).json()["id"] == user.id
+
+    assert [cache_hit for _, cache_hit in sent] == [CACHE_HIT]
+
+
+def test_bounded_and_open_pair_totals(make_user):
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, user = make_user()
+    when = datetime.utcnow() - timedelta(days=1)
+    with SessionLocal() as db:
+        rows = [
+            Transaction(user_id=user.id, provider_id=provider.id, type=kind, status=TransactionStatus.CONFIRMED, amount=Decimal(amount), date=when)
+            for kind, amount in [(TransactionType.DEBT, "10.00"), (TransactionType.PAYMENT, "4.00"), (TransactionType.DEBT, "2.50")]
+        ]
+        db.add_all(rows)
+        db.commit()
+
+        assert pair_totals(db, user.id, provider.id) == (Decimal("12.50"), Decimal("4.00"))
+        assert pair_totals(db, user.id, provider.id, up_to_id=rows[1].id) == (Decimal("10.00"), Decimal("4.00"))
+        assert pair_totals(db, user.id, provider.id, after_id=rows[0].id, up_to_id=rows[1].id) == (Decimal("0"), Decimal("4.00"))
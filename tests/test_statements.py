@@ -0,0 +1,96 @@
+"""Running-balance statements: one windowed query, opening balance carried from before the range"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app.core.database import SessionLocal
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.user import UserRole, ProviderType
+from app.models.user_provider import LinkStatus, UserProvider
+
+DEBT, PAYMENT = TransactionType.DEBT, TransactionType.PAYMENT
+
+
+@pytest.fixture
+def pair(make_user):
+    """A client with a few months of history; returns (client headers, client, provider, ids by label)"""
+    _, provider = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    headers, user = make_user()
+    ids = {}
+    with SessionLocal() as db:
+        db.add(UserProvider(user_id=user.id, provider_id=provider.id, status=LinkStatus.APPROVED))
+        for label, kind, amount, when, status in [
+            ("old", DEBT, "100.00", datetime(2027, 1, 10), TransactionStatus.CONFIRMED),
+            ("first", DEBT, "50.00", datetime(2027, 2, 1, 0, 0), TransactionStatus.CONFIRMED),
+            ("pending", DEBT, "999.00", datetime(2027, 2, 2), TransactionStatus.PENDING),
+            ("same_day_a", PAYMENT, "30.00", datetime(2027, 2, 14, 12), TransactionStatus.CONFIRMED),
+            ("same_day_b", DEBT, "5.25", datetime(2027, 2, 14, 12), TransactionStatus.CONFIRMED),
+            ("last", PAYMENT, "20.00", datetime(2027, 2, 28, 23, 59), TransactionStatus.CONFIRMED),
+            ("after", DEBT, "7.00", datetime(2027, 3, 1), TransactionStatus.CONFIRMED),
+        ]:
+            tx = Transaction(user_id=user.id, provider_id=provider.id, type=kind, status=status, amount=Decimal(amount), date=when)
+            db.add(tx)
+            db.flush()
+            ids[label] = tx.id
+        db.commit()
+    return headers, user, provider, ids
+
+
+def test_json_statement_for_a_month(client, pair):
+    headers, user, provider, ids = pair
+
+    response = client.get(f"/transactions/statement/{user.id}/{provider.id}", params={"start": "2027-02-01", "end": "2027-02-28"}, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["opening_balance"] == "100.00"
+    assert [(entry["id"], entry["balance"]) for entry in body["entries"]] == [
+        (ids["first"], "150.00"),
+        (ids["same_day_a"], "120.00"),
+        (ids["same_day_b"], "125.25"),
+        (ids["last"], "105.25")
+    ]
+    assert body["closing_balance"] == "105.25"
+
+
+def test_whole_history_without_a_range(client, pair):
+    headers, user, provider, ids = pair
+
+    body = client.get(f"/transactions/statement/{user.id}/{provider.id}", headers=headers).json()
+
+    assert Decimal(body["opening_balance"]) == 0
+    assert ids["pending"] not in [entry["id"] for entry in body["entries"]]
+    assert body["closing_balance"] == "112.25"
+
+
+def test_empty_range_still_has_the_opening_balance(client, pair):
+    headers, user, provider, _ = pair
+
+    body = client.get(f"/transactions/statement/{user.id}/{provider.id}", params={"start": "2027-04-01"}, headers=headers).json()
+
+    assert body["entries"] == []
+    assert body["opening_balance"] == body["closing_balance"] == "112.25"
+
+
+def test_csv_statement(client, pair):
+    headers, user, provider, ids = pair
+
+    response = client.get(f"/transactions/statement/{user.id}/{provider.id}", params={"start": "2027-03-01", "format": "csv"}, headers=headers)
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [
+        ["id", "date", "type", "amount", "balance"],
+        ["", "2027-03-01", "opening", "", "105.25"],
+        [str(ids["after"]), "2027-03-01T00:00:00", "debt", "7.00", "112.25"]
+    ]
+
+
+def test_rejects_reversed_ranges_and_strangers(client, pair, make_user):
+    headers, user, provider, _ = pair
+    stranger, _ = make_user()
+    url = f"/transactions/statement/{user.id}/{provider.id}"
+
+    assert client.get(url, params={"start": "2027-03-01", "end": "2027-02-01"}, headers=headers).status_code == 400
+    assert client.get(url, headers=stranger).status_code == 403
@@ -0,0 +1,134 @@
+"""Tracing: one OTLP trace per sampled request, with service and SQL spans nested under the request's root span"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, text
+from app.core import tracing
+from app.core.tracing import FileExporter, InMemoryExporter, TracingMiddleware, instrument_engine, span, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    memory = InMemoryExporter()
+    monkeypatch.setattr(tracing, "exporter", memory)
+    return memory
+
+
+def _spans(document) -> dict:
+    return {span["name"]: span for span in document["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+
+
+def _request(app, sample_ratio=1.0, path="/things"):
+    async def scenario():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+        await TracingMiddleware(app, sample_ratio)({"type": "http", "method": "GET", "path": path}, None, send)
+        return sent
+    return asyncio.run(scenario())
+
+
+def test_spans_nest_under_the_request(exported, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'traced.db'}")
+    instrument_engine(engine)
+
+    @traced
+    def load_things():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT 42")).scalar()
+
+    async def app(scope, receive, send):
+        assert load_things() == 42
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    _request(app)
+
+    [document] = exported.recent(10)
+    spans = _spans(document)
+    root, service, query = spans["GET /things"], spans[f"{__name__}:test_spans_nest_under_the_request.<locals>.load_things"], spans["db.query"]
+    assert service["parentSpanId"] == root["spanId"] and query["parentSpanId"] == service["spanId"]
+    assert "parentSpanId" not in root
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+    assert {"key": "db.statement", "value": {"stringValue": "SELECT ?"}} in query["attributes"]
+    assert len({s["traceId"] for s in spans.values()}) == 1
+
+
+def test_errors_mark_the_span_and_the_root(exported):
+    async def app(scope, receive, send):
+        with span("failing"):
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        _request(app)
+
+    spans = _spans(exported.recent(1)[0])
+    assert spans["failing"]["status"] == {"code": 2, "message": "ValueError: boom"}
+    assert spans["GET /things"]["status"]["code"] == 2
+
+
+def test_unsampled_requests_are_not_traced(exported):
+    calls = []
+
+    async def app(scope, receive, send):
+        with span("inner") as inner:
+            calls.append(inner)
+
+    _request(app, sample_ratio=0.0)
+
+    assert calls == [None]
+    assert exported.recent(10) == []
+
+
+def test_file_exporter_writes_one_document_per_line(tmp_path, monkeypatch):
+    path = tmp_path / "traces" / "traces.jsonl"
+    monkeypatch.setattr(tracing, "exporter", FileExporter(str(path)))
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+
+    _request(app, path="/a")
+    _request(app, path="/b")
+
+    lines = path.read_text().splitlines()
+    assert [list(_spans(json.loads(line))) for line in lines] == [["GET /a"], ["GET /b"]]
+
+
+def test_enabled_app_traces_services_and_dependencies(tmp_path):
+    """TRACING_ENABLED is read when the app is imported, so this runs in a process of its own"""
+    script = textwrap.dedent("""
+        import json
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.core.database import SessionLocal
+        from app.core.security import create_access_token
+        from app.core.tracing import exporter
+        from app.models.user import UserRole
+        from app.services.user import create_user
+
+        with SessionLocal() as db:
+            user = create_user(db, "Traced", "traced@tests.example.com", "pw", UserRole.USER)
+        headers = {"Authorization": "Bearer " + create_access_token(subject=str(user.id), role=user.role.value)}
+        assert TestClient(app).get("/users/me/providers", headers=headers).status_code == 200
+        [document] = exporter.recent(1)
+        print(json.dumps(sorted({s["name"] for s in document["resourceSpans"][0]["scopeSpans"][0]["spans"]})))
+    """)
+    env = dict(
+        os.environ, TRACING_ENABLED="true", DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}",
+        SLOW_QUERY_LOG_FILE="", LOG_ACCESS="false", ADMISSION_ENABLED="false"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+    names = json.loads(result.stdout.strip().splitlines()[-1])
+    assert "GET /users/me/providers" in names
+    assert "dependency:get_current_user" in names
+    assert "app.services.user_provider:get_client_providers" in names
+    assert "db.query" in names
@@ -0,0 +1,76 @@
+"""Provider search for clients: case-insensitive prefix match on role USER accounts, keyset pages, rate limited"""
+import uuid
+import pytest
+from app.core.database import SessionLocal
+from app.models.user import UserRole, ProviderType
+from app.routes.user import user_search_limiter
+from app.services.user import create_user
+from app.utils.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def provider(make_user):
+    return make_user(UserRole.PROVIDER, ProviderType.LENDER)[0]
+
+
+def _create(name: str, role: UserRole = UserRole.USER, provider_type=None):
+    with SessionLocal() as db:
+        return create_user(db, name, f"{uuid.uuid4().hex}@tests.example.com", "pw", role, provider_type)
+
+
+def test_pages_through_matching_clients(client, provider):
+    prefix = "Zq" + uuid.uuid4().hex[:6]
+    clients = [_create(f"{prefix} {n}") for n in range(5)]
+    _create(f"{prefix} provider", UserRole.PROVIDER, ProviderType.LENDER)
+    _create(f"x{prefix}")
+
+    found, cursor = [], None
+    while True:
+        params = {"q": prefix.upper(), "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/users/search", params=params, headers=provider).json()
+        found += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert found == [user.id for user in clients]
+
+
+def test_email_search(client, provider):
+    user = _create("Email Search")
+
+    page = client.get("/users/search", params={"q": user.email[:12] + "x", "field": "email"}, headers=provider).json()
+    assert page["items"] == []
+    page = client.get("/users/search", params={"q": user.email}, headers=provider).json()
+    assert [item["id"] for item in page["items"]] == [user.id]
+
+
+def test_rejects_short_queries_bad_cursors_and_clients(client, provider, make_user):
+    user_headers, _ = make_user()
+
+    assert client.get("/users/search", params={"q": "a"}, headers=provider).status_code == 400
+    assert client.get("/users/search", params={"q": "ab", "cursor": "not-a-cursor"}, headers=provider).status_code == 400
+    assert client.get("/users/search", params={"q": "ab"}, headers=user_headers).status_code == 403
+
+
+def test_limiter_counts_per_key_and_window():
+    now = [100.0]
+    limiter = RateLimiter(limit=2, window_seconds=60, clock=lambda: now[0])
+
+    assert limiter.retry_after("a") == limiter.retry_after("a") == 0
+    assert limiter.retry_after("a") == 20.0  # The window started at 60
+    assert limiter.retry_after("b") == 0
+    now[0] = 120.0
+    assert limiter.retry_after("a") == 0
+    assert limiter.rejected == 1
+
+
+def test_search_is_rate_limited(client, provider, monkeypatch):
+    monkeypatch.setattr(user_search_limiter, "limit", 1)
+    monkeypatch.setattr(user_search_limiter, "_clock", lambda: 30.0)  # Both requests in the same window
+
+    assert client.get("/users/search", params={"q": "ab"}, headers=provider).status_code == 200
+    response = client.get("/users/search", params={"q": "ab"}, headers=provider)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
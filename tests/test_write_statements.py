@@ -0,0 +1,171 @@
+"""
+Exact SQL statements sent by each write endpoint, counted with a before_cursor_execute listener.
+No endpoint reads back the table it wrote: the row comes from its own INSERT/UPDATE ... RETURNING.
+Every write also upserts one resource_versions row per cached scope it changes (bump_version); those are
+the expected extra statements on top of the write itself. Transaction commits go through the DBAPI, not
+a cursor, so they are not counted.
+"""
+import re
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app.core.database import engine
+from app.models.user import UserRole, ProviderType
+from app.utils.verification_code_gener import generate_verification_code
+
+AUTH = ("SELECT", "users")  # get_current_user
+VERSION_BUMP = ("INSERT", "resource_versions")
+
+
+def _verb_and_table(statement: str):
+    statement = " ".join(statement.split())
+    match = re.match(r"(INSERT INTO|UPDATE|DELETE FROM|SELECT .*? FROM) \"?(\w+)", statement)
+    if not match:
+        return statement.split(None, 1)[0], ""
+    return match.group(1).split(" ", 1)[0], match.group(2)
+
+
+@contextmanager
+def statements():
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(_verb_and_table(statement))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield sent
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _send(client, method: str, url: str, **kwargs):
+    with statements() as sent:
+        response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return response.json(), sent
+
+
+@pytest.fixture
+def lender_and_client(client, make_user):
+    lender, _ = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user, client_user = make_user()
+    link = client.post("/links/link", json={"user_id": client_user.id}, headers=lender).json()
+    client.put(f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user)
+    return lender, client_user
+
+
+@pytest.fixture
+def payer(make_user):
+    return make_user(UserRole.PROVIDER, ProviderType.PAYER)[0]
+
+
+def test_create_link(client, make_user):
+    lender, _ = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    _, client_user = make_user()
+
+    _, sent = _send(client, "POST", "/links/link", json={"user_id": client_user.id}, headers=lender)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "users"),  # The client being linked
+        ("INSERT", "user_provider"),
+        VERSION_BUMP, VERSION_BUMP  # The client's and the provider's link lists
+    ]
+
+
+def test_update_invitation_status(client, make_user):
+    lender, _ = make_user(UserRole.PROVIDER, ProviderType.LENDER)
+    user, client_user = make_user()
+    link = client.post("/links/link", json={"user_id": client_user.id}, headers=lender).json()
+
+    _, sent = _send(client, "PUT", f"/links/invitations/{link['id']}/status", json={"status": "approved"}, headers=user)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "user_provider"),  # The invitation, checked for ownership and status
+        VERSION_BUMP, VERSION_BUMP,
+        ("UPDATE", "user_provider")  # Flushed by the commit
+    ]
+
+
+@pytest.mark.parametrize("kind", ["debt", "payment"])
+def test_create_transaction(client, lender_and_client, kind):
+    lender, client_user = lender_and_client
+    body = {"user_id": client_user.id, "type": kind, "amount": "10.00"}
+    if kind == "debt":
+        body["otp"] = generate_verification_code(client_user.secret_key)
+
+    _, sent = _send(client, "POST", "/transactions/", json=body, headers=lender)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "user_provider"),  # Link and the client's OTP secret in one query
+        ("INSERT", "transactions"),
+        ("INSERT", "transaction_daily_rollups"),  # Upsert of the day's totals
+        VERSION_BUMP, VERSION_BUMP,  # The pair's and the provider's ledgers
+        ("SELECT", "transaction_daily_rollups"),  # Balance after the write, for the ledger event
+        ("INSERT", "ledger_events")
+    ]
+
+
+def test_create_employer(client, payer):
+    _, sent = _send(client, "POST", "/employers/", json={"name": "Acme", "contact_info": "Main st"}, headers=payer)
+
+    assert sent == [
+        AUTH,
+        ("INSERT", "employers"),
+        VERSION_BUMP,  # The provider's employer list
+        ("SELECT", "work_payments")  # Payment count shown in the response
+    ]
+
+
+def test_update_employer(client, payer):
+    employer = client.post("/employers/", json={"name": "Acme"}, headers=payer).json()
+
+    _, sent = _send(client, "PUT", f"/employers/{employer['id']}", json={"name": "Acme Ltd"}, headers=payer)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "employers"),  # Ownership check
+        ("UPDATE", "employers"),  # Flushed inside the duplicate-name check
+        VERSION_BUMP, VERSION_BUMP,  # Employer list and work payments, which show the employer name
+        ("SELECT", "work_payments")
+    ]
+
+
+def test_create_work_payment(client, payer):
+    employer = client.post("/employers/", json={"name": "Acme"}, headers=payer).json()
+
+    _, sent = _send(client, "POST", "/work-payments/", json={"employer_id": employer["id"], "amount": "120.00"}, headers=payer)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "employers"),  # Ownership check; also gives the response its employer name
+        ("INSERT", "work_payments"),
+        VERSION_BUMP, VERSION_BUMP  # Work payments and employers, whose listing counts payments
+    ]
+
+
+def test_update_work_payment(client, payer):
+    employer = client.post("/employers/", json={"name": "Acme"}, headers=payer).json()
+    payment = client.post("/work-payments/", json={"employer_id": employer["id"], "amount": "120.00"}, headers=payer).json()
+
+    _, sent = _send(client, "PUT", f"/work-payments/{payment['id']}", json={"employer_id": employer["id"], "amount": "125.00"}, headers=payer)
+
+    assert sent == [
+        AUTH,
+        ("UPDATE", "work_payments"),  # UPDATE ... RETURNING, scoped to the provider
+        VERSION_BUMP, VERSION_BUMP,
+        ("SELECT", "employers")  # Employer name for the response
+    ]
+
+
+def test_update_provider_type(client, payer):
+    _, sent = _send(client, "PUT", "/users/me/provider-type", json={"provider_type": "lender"}, headers=payer)
+
+    assert sent == [
+        AUTH,
+        ("SELECT", "user_provider"),  # Linked clients, whose cached provider lists are invalidated
+        ("UPDATE", "users")
+    ]